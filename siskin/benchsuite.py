@@ -0,0 +1,254 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Throughput benchmarks for the conversion functions, over the fixture corpora
+in fixtures/ (so this needs a source checkout). Runs offline: OSF
+contributors are served from a URL cache filled from
+fixtures/osf/contributors.json.
+
+    $ siskin bench               # run all, compare against baseline
+    $ siskin bench -u            # run all, store as new baseline
+    $ siskin bench osf imslp     # run some
+
+Absolute numbers depend on the machine, so the baseline stores timings
+relative to a fixed pure Python reference workload, measured in the same
+run. A benchmark regresses, if its relative time grows by more than the
+threshold (default 25%).
+"""
+
+import collections
+import gc
+import json
+import os
+import shutil
+import tempfile
+
+from siskin.benchmark import Timer
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "fixtures")
+BASELINE = os.path.join(FIXTURES, "benchmark", "baseline.json")
+
+# Registered benchmarks, name -> setup function. A setup function takes a
+# scratch directory and returns a list of items and a function to apply to
+# each item. If the function returns a list, its length is the number of
+# records, otherwise one.
+BENCHMARKS = collections.OrderedDict()
+
+
+def register(name):
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+def _lines(path):
+    with open(os.path.join(FIXTURES, path)) as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+@register("osf")
+def setup_osf(directory):
+    from siskin.conversions import osf_to_intermediate
+    from siskin.language import clear_cache
+    from siskin.utils import URLCache
+
+    cache = URLCache(directory=directory, max_tries=1)
+    with open(os.path.join(FIXTURES, "osf/contributors.json")) as handle:
+        for path, page in json.load(handle).items():
+            with open(cache.get_cache_file("https://api.osf.io" + path), "w") as f:
+                json.dump(page, f)
+    docs = [doc for page in _lines("osf/preprints.ldj") for doc in page["data"]]
+
+    def convert(doc):
+        # language detection is the costly part, do not measure cache hits
+        clear_cache()
+        return osf_to_intermediate(doc, cache=cache, offline=True)
+
+    return docs, convert
+
+
+@register("olc")
+def setup_olc(directory):
+    from siskin.conversions import olc_to_intermediate_schema
+
+    return _lines("olc/slub.ldj"), olc_to_intermediate_schema
+
+
+@register("imslp")
+def setup_imslp(directory):
+    from siskin.conversions import imslp_xml_to_marc
+
+    blobs = []
+    for name in sorted(os.listdir(os.path.join(FIXTURES, "imslp"))):
+        if name == "notitle.xml":
+            continue
+        with open(os.path.join(FIXTURES, "imslp", name), "rb") as handle:
+            blobs.append(handle.read())
+    return blobs, lambda blob: imslp_xml_to_marc(blob).as_marc()
+
+
+@register("eastview")
+def setup_eastview(directory):
+    from siskin.conversions import eastview_solr_to_intermediate_schema
+
+    with open(os.path.join(FIXTURES, "eastview/udbedu.xml"), "rb") as handle:
+        return [handle.read()], eastview_solr_to_intermediate_schema
+
+
+@register("openurl")
+def setup_openurl(directory):
+    from siskin.openurl import openurl_parameters_from_intermediateschema
+
+    return _lines("intermediate/docs.ldj"), openurl_parameters_from_intermediateschema
+
+
+@register("openurl-link")
+def setup_openurl_link(directory):
+    from siskin.openurl import compile_openurl_plan
+
+    return _lines("intermediate/docs.ldj"), compile_openurl_plan()
+
+
+@register("metamorph")
+def setup_metamorph(directory):
+    from siskin.metamorph import Metamorph, generic_xml_records, read_flux
+
+    assets = os.path.join(os.path.dirname(__file__), "assets")
+    path, tag, env = read_flux(
+        os.path.join(assets, "87/87.flux"), MAP_DIR=os.path.join(assets, "maps", "")
+    )
+    with open(os.path.join(FIXTURES, "metamorph/ijoc.xml"), "rb") as handle:
+        records = list(generic_xml_records(handle, tag=tag))
+    morph = Metamorph(path, env)
+    return records, lambda record: morph.to_json(*record)
+
+
+def reference():
+    """
+    A fixed workload to calibrate timings against.
+    """
+    doc = {"id": "x", "values": list(range(20)), "title": "reference " * 10}
+    for _ in range(20):
+        doc = json.loads(json.dumps(doc))
+        doc["title"] = doc["title"].upper().lower()
+    return doc
+
+
+def measure(items, func, min_time=0.2, repeat=5):
+    """
+    Apply func to all items, repeatedly for at least `min_time` seconds, take
+    the best of `repeat` rounds. Returns microseconds per record and number of
+    records per pass. One warmup pass is not timed.
+    """
+    records = 0
+    for item in items:
+        result = func(item)
+        records += len(result) if isinstance(result, list) else 1
+    best = None
+    # like timeit, do not let garbage collection runs add noise
+    gcold = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            passes = 0
+            with Timer() as timer:
+                while True:
+                    for item in items:
+                        func(item)
+                    passes += 1
+                    if timer.timer() - timer.start >= min_time:
+                        break
+            us = timer.elapsed_s / (passes * max(records, 1)) * 1e6
+            best = us if best is None else min(best, us)
+    finally:
+        if gcold:
+            gc.enable()
+    return best, records
+
+
+def run_benchmarks(names=None, min_time=0.2, repeat=5):
+    """
+    Run benchmarks (all, if names is None), return a dict with the reference
+    timing and, for each benchmark, µs/record, records/s and the relative
+    time.
+    """
+    unknown = set(names or []) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError("unknown benchmarks: {}".format(", ".join(sorted(unknown))))
+    timings = collections.OrderedDict()
+    # the reference is measured next to each benchmark, the best one is used
+    ref = None
+    directory = tempfile.mkdtemp(prefix="siskin-bench-")
+    try:
+        for name, setup in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            items, func = setup(directory)
+            timings[name] = measure(items, func, min_time=min_time, repeat=repeat)
+            us, _ = measure(
+                [None], lambda _: reference(), min_time=min_time, repeat=repeat
+            )
+            ref = us if ref is None else min(ref, us)
+    finally:
+        shutil.rmtree(directory)
+    results = {"reference_us": ref, "benchmarks": collections.OrderedDict()}
+    for name, (us, records) in timings.items():
+        results["benchmarks"][name] = {
+            "records": records,
+            "us_per_record": round(us, 2),
+            "records_per_s": round(1e6 / us, 1),
+            "relative": round(us / ref, 4),
+        }
+    return results
+
+
+def load_baseline(path=BASELINE):
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_baseline(results, path=BASELINE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as handle:
+        json.dump(results, handle, indent=4)
+        handle.write("\n")
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Return a list of (name, baseline relative, current relative) tuples for
+    all benchmarks, that got slower than the baseline by more than threshold.
+    Benchmarks missing from the baseline are skipped.
+    """
+    regressions = []
+    for name, current in results["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before:
+            continue
+        if current["relative"] > before["relative"] * (1 + threshold):
+            regressions.append((name, before["relative"], current["relative"]))
+    return regressions
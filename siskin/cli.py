@@ -12,6 +12,7 @@ Commands map to the former task* scripts, e.g.:
 Run `siskin --help` for a full list of commands.
 """
 
+import argparse
 import collections
 import configparser
 import datetime
@@ -26,11 +27,13 @@ import re
 import shutil
 import subprocess
 import sys
+import time
 from io import StringIO
 
 import luigi
 import requests
 import urllib3
+import zstandard
 from luigi.cmdline_parser import CmdlineParser
 from luigi.parameter import MissingParameterException
 from luigi.task import Register
@@ -40,8 +43,11 @@ from pygments.formatters import TerminalFormatter
 from pygments.lexers import PythonLexer
 
 from siskin import __version__
-from siskin.benchmark import green, yellow
+from siskin.benchmark import green, red, yellow
 from siskin.configuration import Config
+from siskin.multifile import open_manifest
+from siskin.resources import configure_scheduler
+from siskin.runtimes import plan
 from siskin.utils import get_task_import_cache, iterfiles, random_string
 
 
@@ -120,6 +126,16 @@ def _cat_output(args, out=None):
     if not os.path.exists(path):
         print(f"output does not exist: {path}", file=sys.stderr)
         sys.exit(1)
+    if path.endswith(".manifest"):
+        with open_manifest(path) as f:
+            if path.endswith(".zst.manifest"):
+                # members are zstd files, padded with skippable frames
+                dctx = zstandard.ZstdDecompressor()
+                with dctx.stream_reader(f, read_across_frames=True) as reader:
+                    shutil.copyfileobj(reader, out)
+            else:
+                shutil.copyfileobj(f, out)
+        return
     if path.endswith(".mrc"):
         subprocess.run(["yaz-marcdump", path])
         return
@@ -142,14 +158,54 @@ def _cat_output(args, out=None):
 # ---------------------------------------------------------------------------
 
 
+def _local_scheduler(args):
+    """
+    Return True, if luigi will run with a local scheduler, from the command
+    line or the [core] section of the luigi configuration.
+    """
+    if "--local-scheduler" in args:
+        return True
+    luigi_config = luigi.configuration.get_config()
+    for name in ("local_scheduler", "local-scheduler"):
+        if luigi_config.getboolean("core", name, False):
+            return True
+    return False
+
+
+def _plan(args):
+    """
+    Prioritize the pending tasks by predicted critical path, return the plan
+    or None. Planning is best effort and never stops a run.
+    """
+    try:
+        with CmdlineParser.global_instance(args) as parser:
+            task = parser.get_task_obj()
+            workers = luigi.interface.core().workers
+        return plan([task], workers=workers)
+    except (MissingParameterException, TaskClassNotFoundException):
+        raise
+    except Exception as exc:
+        print(f"planning failed: {exc}", file=sys.stderr)
+        return None
+
+
 def cmd_run():
     """Run a Luigi task."""
     if len(sys.argv) < 2:
         print("usage: siskin run TASKNAME [--param value ...]", file=sys.stderr)
         sys.exit(1)
     _ensure_task_imports(sys.argv[1])
+    configure_scheduler(local=_local_scheduler(sys.argv[1:]))
     try:
+        schedule = _plan(sys.argv[1:])
+        started = time.time()
         luigi.run()
+        if schedule and schedule.graph:
+            print(
+                "makespan: predicted %0.0fs, actual %0.0fs"
+                % (schedule.makespan, time.time() - started),
+                file=sys.stderr,
+            )
     except MissingParameterException as exc:
         print(f"missing parameter: {exc}", file=sys.stderr)
         sys.exit(1)
@@ -161,6 +217,29 @@ def cmd_run():
         sys.exit(1)
 
 
+def cmd_plan():
+    """Show predicted runtimes and priorities of pending tasks."""
+    if len(sys.argv) < 2:
+        print(
+            "usage: siskin plan TASKNAME [--workers N] [--param value ...]",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    _ensure_task_imports(sys.argv[1])
+    try:
+        schedule = _plan(sys.argv[1:])
+    except (MissingParameterException, TaskClassNotFoundException) as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(1)
+    if schedule is None:
+        sys.exit(1)
+    for task, priority in sorted(
+        schedule.priorities.items(), key=lambda item: item[1], reverse=True
+    ):
+        print(f"{schedule.durations[task]:10.0f}\t{priority:10.0f}\t{task}")
+    print(f"predicted makespan: {schedule.makespan:0.0f}s")
+
+
 def cmd_names():
     """List all available task names."""
     task_import_cache, _ = get_task_import_cache()
@@ -498,6 +577,110 @@ def cmd_tags():
         print(f"{getattr(klass, 'TAG')}\t{name}")
 
 
+def cmd_bench():
+    """Run conversion benchmarks, compare against the stored baseline."""
+    from siskin import benchsuite
+
+    parser = argparse.ArgumentParser(prog="siskin bench")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument(
+        "-u", "--update", action="store_true", help="store results as new baseline"
+    )
+    parser.add_argument(
+        "-t", "--threshold", type=float, default=0.25, help="allowed slowdown"
+    )
+    parser.add_argument("-b", "--baseline", default=benchsuite.BASELINE)
+    parser.add_argument("-l", "--list", action="store_true", help="list benchmarks")
+    args = parser.parse_args(sys.argv[1:])
+    if args.list:
+        for name in benchsuite.BENCHMARKS:
+            print(name)
+        return
+    try:
+        results = benchsuite.run_benchmarks(args.names or None)
+    except ValueError as err:
+        print(err, file=sys.stderr)
+        sys.exit(1)
+    baseline = benchsuite.load_baseline(args.baseline) or {}
+    print(f"reference: {results['reference_us']:.1f} µs")
+    for name, r in results["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name, {}).get("relative")
+        change = f"{r['relative'] / before - 1:+.1%}" if before else "n/a"
+        print(
+            f"{name:<10} {r['us_per_record']:>10.1f} µs/record "
+            f"{r['records_per_s']:>10.0f} records/s {change:>8}"
+        )
+    if args.update:
+        benchsuite.save_baseline(results, args.baseline)
+        print(f"baseline written to {args.baseline}")
+        return
+    regressions = benchsuite.compare(results, baseline, threshold=args.threshold)
+    for name, before, current in regressions:
+        print(red(f"{name} regressed: {before} -> {current}"), file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+def cmd_openurl():
+    """Write id and OpenURL link for each record of an intermediate schema task output."""
+    from siskin.openurl import openurl_links
+
+    parser = argparse.ArgumentParser(
+        prog="siskin openurl",
+        description="Read intermediate schema from task output (or stdin, "
+        "if no task is given), write id<TAB>openurl lines.",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=os.cpu_count(), help="processes"
+    )
+    parser.add_argument(
+        "--base", default="http://www.redi-bw.de/links/ubl?rl_site=ubl&"
+    )
+    parser.add_argument("--rfr-id", default="www.ub.uni-leipzig.de")
+    parser.add_argument(
+        "task", nargs=argparse.REMAINDER, help="TASKNAME [--param value ...]"
+    )
+    args = parser.parse_args(sys.argv[1:])
+    proc = None
+    if args.task:
+        path = _get_output_path(args.task)
+        if not os.path.exists(path):
+            print(f"output does not exist: {path}", file=sys.stderr)
+            sys.exit(1)
+        if path.endswith(".zst"):
+            proc = subprocess.Popen(
+                ["unzstd", "-q", "-c", path], stdout=subprocess.PIPE
+            )
+            handle = proc.stdout
+        elif path.endswith(".gz"):
+            handle = gzip.open(path, "rb")
+        else:
+            handle = open(path, "rb")
+    else:
+        handle = sys.stdin.buffer
+    stats = collections.Counter()
+    try:
+        with handle:
+            for blob in openurl_links(
+                handle,
+                base=args.base,
+                rfr_id=args.rfr_id,
+                workers=args.workers,
+                stats=stats,
+            ):
+                sys.stdout.buffer.write(blob)
+    except BrokenPipeError:
+        if proc is not None:
+            proc.kill()
+            proc.wait()
+        return
+    if proc is not None and proc.wait() != 0:
+        print(f"unzstd failed with exit code {proc.returncode}", file=sys.stderr)
+        sys.exit(1)
+    if stats["failed"]:
+        print(f"{stats['failed']} records without link", file=sys.stderr)
+
+
 # ---------------------------------------------------------------------------
 # commands — ported from shell scripts
 # ---------------------------------------------------------------------------
@@ -756,6 +939,7 @@ def cmd_wc():
 
 COMMANDS = {
     "run": cmd_run,
+    "plan": cmd_plan,
     "names": cmd_names,
     "inspect": cmd_inspect,
     "output": cmd_output,
@@ -785,6 +969,8 @@ COMMANDS = {
     "status": cmd_status,
     "tree": cmd_tree,
     "wc": cmd_wc,
+    "bench": cmd_bench,
+    "openurl": cmd_openurl,
 }
 
 # Grouped for help display.
@@ -793,6 +979,7 @@ COMMAND_GROUPS = [
         "Task execution",
         [
             ("run", "Run a Luigi task"),
+            ("plan", "Show predicted runtimes and critical paths"),
             ("redo", "Re-run a task (remove output, then run)"),
             ("help", "Show Luigi help for a task"),
         ],
@@ -821,6 +1008,7 @@ COMMAND_GROUPS = [
             ("ls", "List the task output file"),
             ("open", "Open task output with default application"),
             ("wc", "Count lines in task output"),
+            ("openurl", "Write id and OpenURL link per record of task output"),
             ("rm", "Delete task output files"),
         ],
     ),
@@ -832,6 +1020,7 @@ COMMAND_GROUPS = [
             ("du", "Show disk usage for a task"),
             ("tree", "Display a directory tree for a task"),
             ("ps", "Show running/pending/done tasks from scheduler"),
+            ("bench", "Run conversion benchmarks against a baseline"),
         ],
     ),
     (
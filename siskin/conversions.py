@@ -35,23 +35,22 @@ improving any individual task on it’s own, and made testing difficult.
 
 import base64
 import collections
+import functools
 import json
 import logging
 import os
 import tarfile
 import tempfile
+import zipfile
 from xml.sax.saxutils import escape, unescape
 
 import marcx
-import pymarc
 import requests
 import six
 import xmltodict
 
-from siskin.utils import URLCache
-
-
-language_detector = None
+from siskin.language import detect_language
+from siskin.utils import URLCache, ordered_pool_map
 
 html_escape_table = {'"': "&quot;", "'": "&apos;"}
 html_unescape_table = {v: k for k, v in html_escape_table.items()}
@@ -79,7 +78,12 @@ def html_unescape(text):
 
 
 def imslp_tarball_to_marc(
-    tarball, outputfile=None, legacy_mapping=None, max_failures=30
+    tarball,
+    outputfile=None,
+    legacy_mapping=None,
+    max_failures=30,
+    workers=None,
+    batch_size=100,
 ):
     """
     Convert an IMSLP tarball to MARC binary output file without extracting it.
@@ -89,6 +93,12 @@ def imslp_tarball_to_marc(
 
     A maximum number of failed conversions can be specified with `max_failures`,
     as of 2018-04-25, there were 30 records w/o title.
+
+    The tarball is read as a stream, batches of `batch_size` members are
+    converted by `workers` processes (default: number of CPUs, 1 means no
+    subprocesses). Only a few batches per worker are in flight at any time, so
+    memory use does not depend on the size of the tarball. Records are written
+    in tarball order.
     """
     if outputfile is None:
         _, outputfile = tempfile.mkstemp(prefix="siskin-")
@@ -96,26 +106,23 @@ def imslp_tarball_to_marc(
     stats = collections.Counter()
 
     with open(outputfile, "wb") as output:
-        writer = pymarc.MARCWriter(output)
-        with tarfile.open(tarball) as tar:
-            for member in tar.getmembers():
-                fobj = tar.extractfile(member)
-                try:
-                    record = imslp_xml_to_marc(
-                        fobj.read(), legacy_mapping=legacy_mapping
-                    )
-                    writer.write(record)
-                except ValueError as exc:
-                    logger.warn("conversion failed: %s", exc)
+        for results in ordered_pool_map(
+            _imslp_convert_batch,
+            _imslp_tar_batches(tarball, batch_size=batch_size),
+            workers=workers,
+            initializer=_imslp_worker_init,
+            initargs=(legacy_mapping,),
+        ):
+            for blob, error in results:
+                stats["processed"] += 1
+                if error is not None:
+                    logger.warning("conversion failed: %s", error)
                     stats["failed"] += 1
-                finally:
-                    fobj.close()
-                    stats["processed"] += 1
-
-        writer.close()
+                else:
+                    output.write(blob)
 
         if stats["failed"] > max_failures:
-            logger.warn(
+            logger.warning(
                 "%d records failed, only %d failures allowed",
                 stats["failed"],
                 max_failures,
@@ -129,6 +136,49 @@ def imslp_tarball_to_marc(
     return outputfile
 
 
+def _imslp_tar_batches(tarball, batch_size=100):
+    """
+    Read a (compressed) tarball as a stream and yield lists of member contents.
+    """
+    batch = []
+    with tarfile.open(tarball, mode="r|*") as tar:
+        for member in tar:
+            if member.isfile():
+                fobj = tar.extractfile(member)
+                batch.append(fobj.read())
+                fobj.close()
+            # a streaming tarfile still keeps all headers seen, drop them
+            tar.members = []
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+_imslp_legacy_mapping = None
+
+
+def _imslp_worker_init(legacy_mapping):
+    global _imslp_legacy_mapping
+    _imslp_legacy_mapping = legacy_mapping
+
+
+def _imslp_convert_batch(batch):
+    """
+    Convert a list of IMSLP XML documents, return a list of (MARC blob, error)
+    tuples, with exactly one of both set.
+    """
+    results = []
+    for blob in batch:
+        try:
+            record = imslp_xml_to_marc(blob, legacy_mapping=_imslp_legacy_mapping)
+            results.append((record.as_marc(), None))
+        except ValueError as exc:
+            results.append((None, str(exc)))
+    return results
+
+
 def imslp_xml_to_marc(s, legacy_mapping=None):
     """
     Convert a string containing a single IMSLP XML record to a pymarc MARC record.
@@ -198,7 +248,7 @@ def imslp_xml_to_marc(s, legacy_mapping=None):
 
         for689.append(doc.get("music_arrangement_of", ""))
 
-        for subject in set(for689):
+        for subject in sorted(set(for689)):
             record.add("689", a=subject.title())
 
     record.add("700", a=doc.get("contributor", {}).get("mainForm", ""), e="ctb")
@@ -360,10 +410,60 @@ def de_listify(v, default=None):
     raise ValueError("cannot de-listify: {}".format(v))
 
 
-def osf_to_intermediate(osf, force=False, best_effort=True, max_retries=5, token=None):
+def osf_url_cache(token=None, max_tries=5, directory=None):
+    """
+    Return the URL cache used for OSF API requests, e.g. contributors, in
+    directory or in .urlcache below the temporary directory.
+    """
+    headers = {}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return URLCache(
+        directory=directory or os.path.join(tempfile.gettempdir(), ".urlcache"),
+        max_tries=max_tries,
+        headers=headers,
+    )
+
+
+def osf_contributors_link(doc):
+    """
+    Return the contributors link of an OSF preprint or None.
+    """
+    try:
+        return doc["relationships"]["contributors"]["links"]["related"]["href"]
+    except (KeyError, TypeError):
+        return None
+
+
+def osf_next_links(content):
+    """
+    Given the content of an OSF API response, return a list containing the
+    link to the next page, or an empty list.
+    """
+    try:
+        link = json.loads(content)["links"]["next"]
+    except (KeyError, TypeError, ValueError):
+        return []
+    return [link] if link else []
+
+
+def osf_to_intermediate(
+    osf,
+    force=False,
+    best_effort=True,
+    max_retries=5,
+    token=None,
+    languages=None,
+    cache=None,
+    offline=False,
+):
     """
     Convert a document from https://api.osf.io/v2/preprints/?format=json&page=1
     to intermediate schema; see also kiwi:[191], also: 179; refs #20238.
+
+    Language detection can be restricted to a list of ISO 639-3 codes in
+    `languages`. Contributors are fetched via `cache` (a URLCache, created if
+    not given); with `offline`, only cached contributor pages are used.
     """
     if not osf:
         return None
@@ -392,34 +492,23 @@ def osf_to_intermediate(osf, force=False, best_effort=True, max_retries=5, token
     if not attrs or not rels:
         raise ValueError("osf record w/o attributes or relationships: {}".format(osf))
 
-    def find_osf_language(doc, with_default="eng", language_detector=language_detector):
+    def find_osf_language(doc, with_default="eng"):
         """
         If possible, detect language from abstract and return 3-letter ISO 639
-        code. Otherwise return a default.
+        code. Otherwise return a default. The detector is shared per process,
+        cf. siskin.language.
         """
-        if not attrs.get("description"):
-            return with_default
-        if language_detector is None:
-            try:
-                from lingua import LanguageDetectorBuilder
-
-                language_detector = (
-                    LanguageDetectorBuilder.from_all_languages()
-                    .with_preloaded_language_models()
-                    .build()
-                )
-            except ImportError:
-                logger.warning("skipping language detection, using default")
-                return with_default
-        lang = language_detector.detect_language_of(attrs["description"])
-        if lang is not None:
-            return lang.iso_code_639_3.name.lower()
-        return with_default
+        return detect_language(
+            doc["attributes"].get("description"),
+            default=with_default,
+            languages=languages,
+        )
 
     def fetch_authors(doc, force=False, best_effort=False, max_retries=3, token=None):
         """
         Fetch and cache author docs. We will need an extra request, which we'll
-        cache locally.
+        cache locally. Contributor lists may be paginated. If `offline` is set,
+        only use what is already cached, cf. OSFContributorsPrefetch.
 
         Example: https://api.osf.io/v2/preprints/egcsk/contributors/
 
@@ -429,49 +518,48 @@ def osf_to_intermediate(osf, force=False, best_effort=True, max_retries=5, token
         Regular 429s; may need a couple of runs until the cache fills up.
         """
         result = []
-        headers = {}
-        if token:
-            headers["Authorization"] = f"Bearer {token}"
-        cache = URLCache(
-            directory=os.path.join(tempfile.gettempdir(), ".urlcache"),
-            max_tries=max_retries,
-            headers=headers,
-        )
-        try:
-            url = doc["relationships"]["contributors"]["links"]["related"]["href"]
-        except KeyError:
+        url = osf_contributors_link(doc)
+        if url is None:
             if best_effort:
                 logger.debug("[best-effort] skipping: missing contributors key")
                 return result
-            raise
-        try:
-            content = cache.get(url, force=force)
-        except (RuntimeError, requests.exceptions.ConnectionError) as exc:
-            if best_effort:
-                logger.debug("[best-effort] skipping: {}".format(exc))
+            raise KeyError("contributors")
+        url_cache = cache or osf_url_cache(token=token, max_tries=max_retries)
+        while url:
+            if offline and not url_cache.is_cached(url):
+                logger.debug("[offline] skipping, not cached: {}".format(url))
                 return result
-            raise
-        doc = json.loads(content)
-        try:
-            for item in doc["data"]:
-                try:
-                    attrs = item["embeds"]["users"]["data"]["attributes"]
-                except KeyError:
-                    attrs = item["embeds"]["users"]["errors"][0]["meta"]
-                result.append(
-                    {
-                        "rft.aufirst": attrs["given_name"],
-                        "rft.aulast": attrs["family_name"],
-                    }
-                )
-        except KeyError as exc:
-            logger.debug(
-                "failed to find authors for {}: {}".format(
-                    exc, json.dumps(doc, indent=4)
+            try:
+                content = url_cache.get(url, force=force)
+            except (RuntimeError, requests.exceptions.ConnectionError) as exc:
+                if best_effort:
+                    logger.debug("[best-effort] skipping: {}".format(exc))
+                    return result
+                raise
+            page = json.loads(content)
+            try:
+                for item in page["data"]:
+                    try:
+                        attrs = item["embeds"]["users"]["data"]["attributes"]
+                    except KeyError:
+                        attrs = item["embeds"]["users"]["errors"][0]["meta"]
+                    result.append(
+                        {
+                            "rft.aufirst": attrs["given_name"],
+                            "rft.aulast": attrs["family_name"],
+                        }
+                    )
+            except KeyError as exc:
+                logger.debug(
+                    "failed to find authors for {}: {}".format(
+                        exc, json.dumps(page, indent=4)
+                    )
                 )
-            )
-        else:
-            logger.debug("fetched {}, found {} author(s)".format(url, len(result)))
+                break
+            else:
+                logger.debug("fetched {}, found {} author(s)".format(url, len(result)))
+            next_links = osf_next_links(content)
+            url = next_links[0] if next_links else None
         return result
 
     result = {
@@ -521,7 +609,7 @@ def eastview_solr_to_intermediate_schema(
     Given a string containing raw XML. Each document contains a list of
     documents (100s), refs #12586.
     """
-    parsed = xmltodict.parse(blob)
+    parsed = xmltodict.parse(blob, force_list={"doc", "field"})
     converted = []
     for doc in parsed["add"]["doc"]:
         dd = dict()
@@ -573,6 +661,43 @@ def eastview_solr_to_intermediate_schema(
     return converted
 
 
+def eastview_zip_to_intermediate_schema(zname, output, workers=None, **kwargs):
+    """
+    Convert all XML members of an Eastview zip file and write intermediate
+    schema lines to the binary file object `output`, e.g. an open Gzip target.
+    Members are converted and serialized by `workers` processes, and written
+    in zip order. Keyword arguments are passed on to
+    eastview_solr_to_intermediate_schema. Returns the number of documents
+    written.
+    """
+    written = 0
+    func = functools.partial(_eastview_convert_member, **kwargs)
+    for blob, count in ordered_pool_map(
+        func, _eastview_zip_members(zname), workers=workers
+    ):
+        output.write(blob)
+        written += count
+    return written
+
+
+def _eastview_zip_members(zname):
+    with zipfile.ZipFile(zname) as zf:
+        for info in zf.infolist():
+            if not info.filename.endswith(".xml"):
+                continue
+            with zf.open(info) as f:
+                yield f.read()
+
+
+def _eastview_convert_member(blob, **kwargs):
+    """
+    Convert one Eastview XML file, return newline delimited JSON and the
+    number of documents.
+    """
+    docs = eastview_solr_to_intermediate_schema(blob, **kwargs)
+    return "".join(json.dumps(doc) + "\n" for doc in docs).encode("utf-8"), len(docs)
+
+
 # Facet fields values from author2_role field across all sources.
 # TODO: fill out empty strings, maybe add https://git.io/fNLwY, too.
 # TODO: move this out of code into an asset folder or the like.
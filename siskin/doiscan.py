@@ -0,0 +1,168 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Extract DOI from newline delimited JSON without parsing records.
+
+A byte level regular expression finds the value of a field (like "doi" in
+intermediate schema or "DOI" in Crossref works), which is unescaped only if
+needed, cut to start at "10." and lowercased. The input is streamed in
+newline aligned chunks, scanned in a pool of processes, and the DOI are
+piped into a single sort -u, so nothing but the result is written to disk:
+
+    >>> extract_dois("crossref.ldj.zst", "dois.tsv", workers=4)
+    179481158
+
+The field is expected once per record; nested fields of the same name (e.g.
+in references) would be extracted as well.
+"""
+
+import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+
+from siskin.solrindex import open_export
+from siskin.utils import ordered_pool_map
+
+logger = logging.getLogger("siskin")
+
+
+def field_pattern(field="doi"):
+    """
+    Return a regular expression for the raw string value of a JSON field.
+    """
+    return re.compile(
+        rb'"'
+        + re.escape(field.encode("utf-8"))
+        + rb'"\s*:\s*"([^"\\]*(?:\\.[^"\\]*)*)"'
+    )
+
+
+def normalize(value):
+    """
+    Return a DOI as lowercase bytes starting with 10., from a raw JSON string
+    value like b"https://doi.org/10.1000/ABC" or None, if there is none.
+    """
+    if b"\\" in value:
+        try:
+            value = json.loads(b'"' + value + b'"').encode("utf-8")
+        except ValueError:
+            return None
+        if b"\n" in value or b"\r" in value:
+            return None
+    i = value.find(b"10.")
+    if i == -1:
+        return None
+    return value[i:].strip().lower() or None
+
+
+def iter_chunks(handle, size=1 << 24):
+    """
+    Read a binary file in chunks of about size bytes, ending at a newline.
+    """
+    rest = b""
+    while True:
+        block = handle.read(size)
+        if not block:
+            break
+        block = rest + block
+        cut = block.rfind(b"\n") + 1
+        rest = block[cut:]
+        if cut:
+            yield block[:cut]
+    if rest:
+        yield rest
+
+
+_worker_pattern = {}
+
+
+def _scan_worker_init(field):
+    _worker_pattern["re"] = field_pattern(field)
+
+
+def scan_chunk(data):
+    """
+    Return the number of DOI and the DOI (one per line) found in a chunk.
+    """
+    dois = []
+    for match in _worker_pattern["re"].finditer(data):
+        doi = normalize(match.group(1))
+        if doi is not None:
+            dois.append(doi)
+    if not dois:
+        return 0, b""
+    return len(dois), b"\n".join(dois) + b"\n"
+
+
+def extract_dois(
+    path,
+    output,
+    field="doi",
+    workers=None,
+    chunk_size=1 << 24,
+    sort_buffer="1G",
+    sort_threads=1,
+):
+    """
+    Write the sorted, unique DOI from the field of the records in a plain,
+    gzip or zstd compressed file to output. Chunks are scanned in `workers`
+    processes. Returns the number of DOI found, including duplicates.
+    """
+    command = [
+        "sort",
+        "-u",
+        "-S",
+        sort_buffer,
+        "--parallel={}".format(sort_threads),
+        "-T",
+        tempfile.gettempdir(),
+        "-o",
+        output,
+    ]
+    proc = subprocess.Popen(
+        command, stdin=subprocess.PIPE, env=dict(os.environ, LC_ALL="C")
+    )
+    n = 0
+    try:
+        with open_export(path) as handle:
+            for count, dois in ordered_pool_map(
+                scan_chunk,
+                iter_chunks(handle, size=chunk_size),
+                workers=workers,
+                initializer=_scan_worker_init,
+                initargs=(field,),
+            ):
+                n += count
+                proc.stdin.write(dois)
+        proc.stdin.close()
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    if proc.wait() != 0:
+        raise RuntimeError("sort failed with {} on {}".format(proc.returncode, path))
+    logger.debug("found %d DOI in %s", n, path)
+    return n
@@ -0,0 +1,297 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Declarative fix-up rules for line delimited JSON records.
+
+A rule file is a JSON (or YAML, if pyyaml is installed) list of rules, which
+are compiled once into a chain of closures. Example:
+
+    [
+        {"op": "replace", "old": "DE-15-FID", "new": "FID-MEDIEN-DE-15"},
+        {"op": "set", "field": "recordtype", "value": "default"},
+        {"op": "remove-chars", "field": "id", "chars": "="},
+        {"op": "truncate", "fields": ["title", "author"], "length": 4000},
+        {"op": "derive", "field": "publishDate", "pattern": "[1-9][0-9]{3}"},
+        {"op": "drop", "field": "title", "missing": true}
+    ]
+
+Supported operations:
+
+* replace: byte level replacement on the raw line, no parsing involved
+* set: set a field to a fixed value
+* remove-chars: remove all occurrences of the given characters from a field
+* truncate: truncate string values (or each string in a list) to a length
+* derive: search a regular expression in a field and store the match (or the
+  first group) in `target` (defaults to `field`); no match, no change
+* drop: drop the record, if the field matches `pattern` or if `missing` is
+  set and the field does not exist
+
+Each rule carries a cheap byte level guard. Only if at least one guard
+indicates that a rule may change a record, the record is parsed. Records that
+end up unchanged are passed through as raw bytes, w/o a JSON round trip. The
+guards look at the raw bytes only, so they assume flat records, e.g. SOLR
+documents.
+
+    fix = compile_rules(load_rules("rules.json"))
+    for line in handle:
+        result = fix(line)
+        if result is None:
+            continue  # dropped
+        output.write(result + b"\\n")
+
+"""
+
+import collections
+import json
+import re
+
+# Marker returned by a rule, if the record should be dropped.
+DROP = object()
+
+
+def load_rules(path):
+    """
+    Load a list of rules from a JSON or YAML file.
+    """
+    with open(path) as handle:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("yaml rules require pyyaml: %s" % path)
+            rules = yaml.safe_load(handle)
+        else:
+            rules = json.load(handle)
+    if not isinstance(rules, list):
+        raise ValueError("rules must be a list, got: %s" % type(rules))
+    return rules
+
+
+def _needle(field):
+    """
+    Return the bytes that must appear in a raw line, if field is present.
+    """
+    return json.dumps(field).encode("utf-8")
+
+
+def _compile_replace(rule):
+    old, new = rule["old"].encode("utf-8"), rule["new"].encode("utf-8")
+
+    def replace(line):
+        return line.replace(old, new)
+
+    return [replace], []
+
+
+def _compile_set(rule):
+    field, value = rule["field"], rule["value"]
+    patterns = (
+        _needle(field) + b":" + json.dumps(value).encode("utf-8"),
+        _needle(field) + b": " + json.dumps(value).encode("utf-8"),
+    )
+
+    def guard(line):
+        return not any(p in line for p in patterns)
+
+    def apply(doc):
+        if doc.get(field) == value:
+            return False
+        doc[field] = value
+        return True
+
+    return [], [(guard, apply)]
+
+
+def _compile_remove_chars(rule):
+    field, chars = rule["field"], rule["chars"]
+    needle = _needle(field)
+    table = str.maketrans("", "", chars)
+    char_needles = set()
+    for c in chars:
+        char_needles.add(c.encode("utf-8"))
+        char_needles.add(json.dumps(c)[1:-1].encode("utf-8"))
+
+    def guard(line):
+        return needle in line and any(c in line for c in char_needles)
+
+    def apply(doc):
+        value = doc.get(field)
+        if not isinstance(value, str):
+            return False
+        fixed = value.translate(table)
+        if fixed == value:
+            return False
+        doc[field] = fixed
+        return True
+
+    return [], [(guard, apply)]
+
+
+def _compile_truncate(rule):
+    fields = rule.get("fields") or [rule["field"]]
+    length = int(rule["length"])
+    needles = [_needle(f) for f in fields]
+
+    def guard(line):
+        # A value cannot be longer than the whole line.
+        return len(line) > length and any(n in line for n in needles)
+
+    def apply(doc):
+        changed = False
+        for field in fields:
+            value = doc.get(field)
+            if isinstance(value, str):
+                if len(value) > length:
+                    doc[field] = value[:length]
+                    changed = True
+            elif isinstance(value, list):
+                for i, v in enumerate(value):
+                    if isinstance(v, str) and len(v) > length:
+                        value[i] = v[:length]
+                        changed = True
+        return changed
+
+    return [], [(guard, apply)]
+
+
+def _compile_derive(rule):
+    field = rule["field"]
+    target = rule.get("target", field)
+    pattern = re.compile(rule["pattern"])
+    needle = _needle(field)
+
+    def guard(line):
+        return needle in line
+
+    def apply(doc):
+        value = doc.get(field)
+        if not isinstance(value, str):
+            return False
+        match = pattern.search(value)
+        if not match:
+            return False
+        derived = match.group(1) if pattern.groups else match.group()
+        if doc.get(target) == derived:
+            return False
+        doc[target] = derived
+        return True
+
+    return [], [(guard, apply)]
+
+
+def _compile_drop(rule):
+    field = rule["field"]
+    needle = _needle(field)
+    raw_ops, doc_ops = [], []
+
+    if rule.get("missing"):
+        # A quote inside a string is always escaped, so this only matches the
+        # key, which is enough for flat records; no need to parse them.
+        key = re.compile(rb"(?<!\\)" + re.escape(needle) + rb"\s*:")
+
+        def drop_missing(line):
+            return line if key.search(line) else None
+
+        raw_ops.append(drop_missing)
+
+    if "pattern" in rule:
+        pattern = re.compile(rule["pattern"])
+
+        def guard(line):
+            return needle in line
+
+        def drop_matching(doc):
+            value = doc.get(field)
+            values = value if isinstance(value, list) else [value]
+            for v in values:
+                if isinstance(v, str) and pattern.search(v):
+                    return DROP
+            return False
+
+        doc_ops.append((guard, drop_matching))
+
+    if not raw_ops and not doc_ops:
+        raise ValueError("drop rule requires missing or pattern: %s" % rule)
+    return raw_ops, doc_ops
+
+
+_compilers = {
+    "replace": _compile_replace,
+    "set": _compile_set,
+    "remove-chars": _compile_remove_chars,
+    "truncate": _compile_truncate,
+    "derive": _compile_derive,
+    "drop": _compile_drop,
+}
+
+
+def compile_rules(rules, stats=None):
+    """
+    Compile a list of rules into a single function, that takes a raw line
+    (bytes) and returns the fixed line (bytes, w/o trailing newline) or None,
+    if the record should be dropped. Counts are kept in `stats`, if given.
+
+    Raw byte operations are applied in order first, then all record
+    operations, in order.
+    """
+    raw_ops, doc_ops = [], []
+    for rule in rules:
+        try:
+            compiler = _compilers[rule["op"]]
+        except KeyError:
+            raise ValueError("unknown or missing rule op: %s" % rule)
+        r, d = compiler(rule)
+        raw_ops.extend(r)
+        doc_ops.extend(d)
+
+    if stats is None:
+        stats = collections.Counter()
+
+    def fix(line):
+        stats["total"] += 1
+        line = line.rstrip(b"\n")
+        for op in raw_ops:
+            line = op(line)
+            if line is None:
+                stats["dropped"] += 1
+                return None
+        active = [apply for guard, apply in doc_ops if guard(line)]
+        if not active:
+            stats["passthrough"] += 1
+            return line
+        doc = json.loads(line)
+        stats["parsed"] += 1
+        changed = False
+        for apply in active:
+            result = apply(doc)
+            if result is DROP:
+                stats["dropped"] += 1
+                return None
+            changed = changed or result
+        if not changed:
+            stats["passthrough"] += 1
+            return line
+        stats["changed"] += 1
+        return json.dumps(doc).encode("utf-8")
+
+    return fix
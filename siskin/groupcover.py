@@ -0,0 +1,159 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+DOI deduplication in the manner of https://github.com/miku/groupcover, but
+without sorting the input.
+
+Input is CSV with id, source, doi and the labels (ISIL) of a record. Among
+records sharing a DOI, a label is kept only at the records from the most
+preferred source, which has it, and removed from the others. Preferences
+are source ids, the last one is the most preferred, unlisted sources come
+before all listed ones. If more than one record of the most preferred source
+has a label, all keep it. Output are the changed rows in the input format.
+
+Instead of a global sort by DOI, rows are hash partitioned by DOI into
+buckets on disk; each bucket fits into memory and is grouped in a pool of
+processes.
+
+    >>> groupcover("local.csv", "changes.csv", prefs=["49", "28", "121"])
+
+The rules above have not been checked against groupcover output on
+production data yet, so AIInstitutionChanges uses this only with
+--partition.
+"""
+
+import collections
+import csv
+import io
+import logging
+import os
+import shutil
+import tempfile
+import zlib
+
+from siskin.utils import ordered_pool_map
+
+logger = logging.getLogger("siskin")
+
+
+def rewrite_group(rows, prefs):
+    """
+    Given the rows (lists of id, source, doi, labels...) sharing a DOI and a
+    list of preferred sources, return the rewritten rows, that changed.
+    """
+    if len(rows) < 2:
+        return []
+    rank = {source: i for i, source in enumerate(prefs)}
+    best = {}
+    for row in rows:
+        r = rank.get(row[1], -1)
+        for label in row[3:]:
+            best[label] = max(best.get(label, r), r)
+    changed = []
+    for row in rows:
+        r = rank.get(row[1], -1)
+        labels = [label for label in row[3:] if best[label] == r]
+        if len(labels) < len(row) - 3:
+            changed.append(row[:3] + labels)
+    return changed
+
+
+def _bucket(key, buckets):
+    return zlib.crc32(key.encode("utf-8")) % buckets
+
+
+def partition(path, directory, buckets=64, lower=True):
+    """
+    Write the rows of a CSV file into bucket files by hash of the third
+    column (lowercased, if lower is true) and return the bucket paths. Rows
+    without DOI or labels are dropped, since they cannot change.
+    """
+    paths = [os.path.join(directory, "bucket-%05d.csv" % i) for i in range(buckets)]
+    handles = [open(p, "w", newline="", encoding="utf-8") for p in paths]
+    try:
+        writers = [csv.writer(h, lineterminator="\n") for h in handles]
+        with open(path, newline="", encoding="utf-8") as handle:
+            for row in csv.reader(handle):
+                if len(row) < 4 or not row[2]:
+                    continue
+                key = row[2].lower() if lower else row[2]
+                writers[_bucket(key, buckets)].writerow(row)
+    finally:
+        for h in handles:
+            h.close()
+    return paths
+
+
+_worker_options = {}
+
+
+def _groupcover_worker_init(prefs, lower):
+    _worker_options.update(prefs=prefs, lower=lower)
+
+
+def _groupcover_bucket(path):
+    """
+    Group a bucket file by DOI and return the number of changed rows and
+    the rows as CSV text.
+    """
+    prefs, lower = _worker_options["prefs"], _worker_options["lower"]
+    groups = collections.defaultdict(list)
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.reader(handle):
+            groups[row[2].lower() if lower else row[2]].append(row)
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    n = 0
+    for rows in groups.values():
+        changed = rewrite_group(rows, prefs)
+        writer.writerows(changed)
+        n += len(changed)
+    return n, buf.getvalue()
+
+
+def groupcover(path, output, prefs, buckets=64, workers=None, lower=True):
+    """
+    Write the label changes for the CSV file at path to output. Returns the
+    number of changed rows. The buckets are kept in a temporary directory
+    next to the output.
+    """
+    directory = tempfile.mkdtemp(
+        prefix=".groupcover-", dir=os.path.dirname(os.path.abspath(output))
+    )
+    try:
+        paths = partition(path, directory, buckets=buckets, lower=lower)
+        n = 0
+        with open(output, "w", encoding="utf-8") as out:
+            for count, chunk in ordered_pool_map(
+                _groupcover_bucket,
+                paths,
+                workers=workers,
+                initializer=_groupcover_worker_init,
+                initargs=(list(prefs), lower),
+            ):
+                out.write(chunk)
+                n += count
+    finally:
+        shutil.rmtree(directory)
+    logger.debug("groupcover: %d changes in %s", n, path)
+    return n
@@ -0,0 +1,180 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Split intermediate schema by ISIL in a single pass.
+
+Every record is written to the output of each ISIL in its x.labels, either
+as DOI or as the full record. Output is kept in a buffer per ISIL, which is
+appended to the file through a compressor per ISIL, when it is full (or
+memory is short), so at most one file is open at any time, regardless of the
+number of ISIL. Each file is a single gzip member or zstd frame.
+
+    >>> split_labels("ai.ldj.zst", "outdir", kind="doi")
+    {'DE-15': ('outdir/DE-15.tsv', 123), ...}
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import re
+import zlib
+
+import zstandard
+
+from siskin.solrindex import open_export
+
+logger = logging.getLogger("siskin")
+
+
+def compressor(ext):
+    """
+    Return a streaming compressor according to a file extension (gz, zst or
+    anything else for None, no compression). It has compress(data), which
+    returns what is ready so far, and flush(), which ends the stream.
+    """
+    if ext == "gz":
+        return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if ext == "zst":
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    return None
+
+
+class BufferedSplitter(object):
+    """
+    Write data to many files by key, with a buffer of up to bufsize bytes per
+    key and max_buffered bytes in total; the largest buffer is flushed, if
+    the total is exceeded. Files are truncated on first flush. Raises
+    ValueError, if two keys map to the same path.
+    """
+
+    def __init__(self, path_func, ext=None, bufsize=1 << 22, max_buffered=1 << 28):
+        self.path_func = path_func
+        self.ext = ext
+        self.bufsize = bufsize
+        self.max_buffered = max_buffered
+        self.buffers = collections.defaultdict(bytearray)
+        self.buffered = 0
+        self.paths = {}
+        self.keys = {}
+        self.compressors = {}
+
+    def write(self, key, data):
+        buf = self.buffers[key]
+        buf += data
+        self.buffered += len(data)
+        if len(buf) >= self.bufsize:
+            self.flush(key)
+        elif self.buffered > self.max_buffered:
+            self.flush(max(self.buffers, key=lambda k: len(self.buffers[k])))
+
+    def flush(self, key):
+        buf = self.buffers[key]
+        if key not in self.paths:
+            path = self.path_func(key)
+            if path in self.keys:
+                raise ValueError(
+                    "{!r} and {!r} share a file: {}".format(self.keys[path], key, path)
+                )
+            self.keys[path] = key
+            self.paths[key] = path
+            self.compressors[key] = compressor(self.ext)
+            mode = "wb"
+        else:
+            mode = "ab"
+        c = self.compressors[key]
+        with open(self.paths[key], mode) as f:
+            f.write(c.compress(bytes(buf)) if c else buf)
+        self.buffered -= len(buf)
+        del buf[:]
+
+    def close(self):
+        """
+        Flush all buffers, end all compressed streams, return a dict from key
+        to path.
+        """
+        for key in list(self.buffers):
+            if self.buffers[key] or key not in self.paths:
+                self.flush(key)
+        for key, c in self.compressors.items():
+            if c is not None:
+                with open(self.paths[key], "ab") as f:
+                    f.write(c.flush())
+        self.compressors.clear()
+        return self.paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def safe_filename(isil):
+    """
+    Return a file name for an ISIL. Characters other than letters, digits,
+    dot, dash and underscore are replaced, and a short hash of the ISIL is
+    appended then, so distinct ISIL never share a file.
+    """
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", isil)
+    if name == isil:
+        return name
+    return "{}-{}".format(name, hashlib.sha1(isil.encode("utf-8")).hexdigest()[:8])
+
+
+def split_labels(path, directory, kind="doi", ext=None, **kwargs):
+    """
+    Write the DOI (kind="doi", one per line) or the full records
+    (kind="record") of an intermediate schema file to one file per ISIL in
+    directory, compressed according to ext. Returns a dict from ISIL to
+    (path, number of lines).
+    """
+    if kind not in ("doi", "record"):
+        raise ValueError("kind must be doi or record")
+    suffix = "tsv" if kind == "doi" else "ldj"
+    if ext:
+        suffix += "." + ext
+
+    def path_func(isil):
+        return os.path.join(directory, "%s.%s" % (safe_filename(isil), suffix))
+
+    counts = collections.Counter()
+    with open_export(path) as handle:
+        with BufferedSplitter(path_func, ext=ext, **kwargs) as splitter:
+            for line in handle:
+                if b'"x.labels"' not in line:
+                    continue
+                doc = json.loads(line)
+                if kind == "doi":
+                    if not doc.get("doi"):
+                        continue
+                    data = doc["doi"].encode("utf-8") + b"\n"
+                else:
+                    data = line if line.endswith(b"\n") else line + b"\n"
+                for isil in set(doc.get("x.labels") or []):
+                    splitter.write(isil, data)
+                    counts[isil] += 1
+    paths = splitter.paths
+    logger.debug("split %s into %d files", path, len(paths))
+    return {isil: (paths[isil], counts[isil]) for isil in sorted(paths)}
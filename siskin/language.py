@@ -0,0 +1,139 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Language detection with lingua, shared per process.
+
+Building a lingua detector with preloaded models for all languages takes
+seconds and a lot of memory, so we build a detector only once per process
+(and per language subset). Results are cached by the SHA1 of the text, and
+texts can be detected in batches, which lingua runs in parallel.
+
+    >>> detect_language("Das ist ein kurzer deutscher Satz.")
+    'deu'
+
+    >>> detect_languages(["This is English.", "", "Ceci est un texte."])
+    ['eng', 'eng', 'fra']
+
+Languages are ISO 639-3 codes. To restrict detection to a subset of
+languages (faster, less memory), pass e.g. languages=("eng", "deu", "fra").
+"""
+
+import collections
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger("siskin")
+
+# Maximum number of cached detection results.
+cache_size = 500000
+
+_detectors = {}
+_cache = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def _languages_key(languages):
+    if not languages:
+        return None
+    return tuple(sorted(set(code.strip().lower() for code in languages)))
+
+
+def get_language_detector(languages=None):
+    """
+    Return a lingua language detector for the given ISO 639-3 codes (or all
+    languages), built once per process. Returns None, if lingua is not
+    installed.
+    """
+    key = _languages_key(languages)
+    with _lock:
+        if key in _detectors:
+            return _detectors[key]
+        try:
+            from lingua import IsoCode639_3, LanguageDetectorBuilder
+        except ImportError:
+            logger.warning("lingua not installed, skipping language detection")
+            _detectors[key] = None
+            return None
+        if key is None:
+            builder = LanguageDetectorBuilder.from_all_languages()
+        else:
+            builder = LanguageDetectorBuilder.from_iso_codes_639_3(
+                *[IsoCode639_3.from_str(code) for code in key]
+            )
+        logger.debug("building language detector for: %s", key or "all languages")
+        _detectors[key] = builder.with_preloaded_language_models().build()
+        return _detectors[key]
+
+
+def clear_cache():
+    """
+    Forget all cached detection results, e.g. for benchmarks.
+    """
+    with _lock:
+        _cache.clear()
+
+
+def detect_languages(texts, default="eng", languages=None):
+    """
+    Detect the language of each text in a list of texts and return a list of
+    ISO 639-3 codes. Empty texts and texts without a detectable language get
+    the default. Texts not found in the cache are detected in a single
+    parallel batch.
+    """
+    lkey = _languages_key(languages)
+    results = [default] * len(texts)
+    pending = collections.OrderedDict()  # cache key -> list of indices
+    with _lock:
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            key = (lkey, hashlib.sha1(text.encode("utf-8")).digest())
+            if key in _cache:
+                _cache.move_to_end(key)
+                results[i] = _cache[key] or default
+            else:
+                pending.setdefault(key, []).append(i)
+    if not pending:
+        return results
+    detector = get_language_detector(languages)
+    if detector is None:
+        return results
+    batch = [texts[indices[0]] for indices in pending.values()]
+    detected = detector.detect_languages_in_parallel_of(batch)
+    with _lock:
+        for (key, indices), lang in zip(pending.items(), detected):
+            code = lang.iso_code_639_3.name.lower() if lang is not None else None
+            _cache[key] = code
+            for i in indices:
+                results[i] = code or default
+        while len(_cache) > cache_size:
+            _cache.popitem(last=False)
+    return results
+
+
+def detect_language(text, default="eng", languages=None):
+    """
+    Detect the language of a single text, return ISO 639-3 code or default.
+    """
+    return detect_languages([text], default=default, languages=languages)[0]
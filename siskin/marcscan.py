@@ -0,0 +1,190 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Filter binary MARC21 files on raw bytes, without building record objects.
+
+A condition is a (tag, subfield code, value) tuple, which matches if any
+field with that tag has a subfield with that code and value. A record
+without the value anywhere in its bytes is rejected right away, otherwise
+the record directory is used to find the fields.
+
+    >>> conditions = [("084", "2", "ssgn"), ("084", "a", "9,2")]
+    >>> stats = collections.Counter()
+    >>> for raw in filter_file("b3kat.mrc", conditions, stats=stats):
+    ...     record = pymarc.Record(data=raw)
+
+Files are split into byte ranges at record boundaries, which are scanned by
+a pool of processes. Matching records are returned in file order.
+"""
+
+import collections
+import os
+
+from siskin.utils import ordered_pool_map
+
+RECORD_TERMINATOR = b"\x1d"
+FIELD_TERMINATOR = b"\x1e"
+SUBFIELD_DELIMITER = b"\x1f"
+
+
+def _b(v):
+    return v.encode("utf-8") if isinstance(v, str) else v
+
+
+def iter_records(handle, start=0, end=None, blocksize=1 << 24):
+    """
+    Yield raw records (including the record terminator) from a binary file
+    object, starting at byte offset `start`, which must be a record boundary,
+    up to offset `end`.
+    """
+    handle.seek(start)
+    remaining = None if end is None else end - start
+    buf = b""
+    while remaining is None or remaining > 0:
+        size = blocksize if remaining is None else min(blocksize, remaining)
+        block = handle.read(size)
+        if not block:
+            break
+        if remaining is not None:
+            remaining -= len(block)
+        parts = (buf + block).split(RECORD_TERMINATOR)
+        buf = parts.pop()
+        for part in parts:
+            yield part + RECORD_TERMINATOR
+    if buf.strip():
+        yield buf
+
+
+def field_values(record, tag, code):
+    """
+    Return the values (bytes) of all subfields `code` of all fields `tag` of
+    a raw record, looked up via the record directory. Raises ValueError for
+    a broken leader or directory.
+    """
+    tag, code = _b(tag), _b(code)
+    base = int(record[12:17])
+    directory = record[24 : base - 1]
+    values = []
+    for i in range(0, len(directory) - 11, 12):
+        if directory[i : i + 3] != tag:
+            continue
+        length = int(directory[i + 3 : i + 7])
+        offset = base + int(directory[i + 7 : i + 12])
+        field = record[offset : offset + length].rstrip(FIELD_TERMINATOR)
+        for subfield in field.split(SUBFIELD_DELIMITER)[1:]:
+            if subfield[:1] == code:
+                values.append(subfield[1:])
+    return values
+
+
+def compile_conditions(conditions):
+    """
+    Turn a list of (tag, code, value) conditions into a function, that takes
+    a raw record and returns the index of the first condition not met, or
+    None, if all are met. Records with a broken directory count as matches,
+    so the caller can decide after a full parse.
+    """
+    conditions = [tuple(_b(v) for v in condition) for condition in conditions]
+
+    def check(record):
+        for i, (_, _, value) in enumerate(conditions):
+            if value not in record:
+                return i
+        try:
+            for i, (tag, code, value) in enumerate(conditions):
+                if value not in field_values(record, tag, code):
+                    return i
+        except ValueError:
+            return None
+        return None
+
+    return check
+
+
+def split_ranges(path, parts):
+    """
+    Split a binary MARC file into at most `parts` (start, end) byte ranges,
+    which start at record boundaries.
+    """
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, "rb") as handle:
+        for i in range(1, parts):
+            offset = max(size * i // parts, boundaries[-1])
+            handle.seek(offset)
+            while True:
+                block = handle.read(1 << 16)
+                if not block:
+                    offset = size
+                    break
+                pos = block.find(RECORD_TERMINATOR)
+                if pos >= 0:
+                    offset += pos + 1
+                    break
+                offset += len(block)
+            if offset > boundaries[-1]:
+                boundaries.append(offset)
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _scan_range(job):
+    path, start, end, conditions, labels = job
+    check = compile_conditions(conditions)
+    stats = collections.Counter()
+    matches = []
+    with open(path, "rb") as handle:
+        for record in iter_records(handle, start=start, end=end):
+            stats["total"] += 1
+            failed = check(record)
+            if failed is None:
+                matches.append(record)
+                stats["candidates"] += 1
+            else:
+                stats[labels[failed]] += 1
+    return matches, stats
+
+
+def filter_file(path, conditions, workers=None, parts=None, stats=None, labels=None):
+    """
+    Yield raw records of a binary MARC file, that meet all conditions, in file
+    order. The file is scanned by `workers` processes, in `parts` ranges
+    (default: four per worker). Counts of total, candidate and rejected
+    records (by labels, default "not-<value>" of the first failed condition)
+    are added to `stats`.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if parts is None:
+        parts = workers * 4
+    if labels is None:
+        labels = ["not-{}".format(value) for _, _, value in conditions]
+    jobs = (
+        (path, start, end, conditions, labels)
+        for start, end in split_ranges(path, parts)
+    )
+    for matches, counts in ordered_pool_map(_scan_range, jobs, workers=workers):
+        if stats is not None:
+            stats.update(counts)
+        yield from matches
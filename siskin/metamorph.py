@@ -0,0 +1,724 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Run metafacture flux files of the form
+
+    open-file | decode-xml | handle-generic-xml("record") | morph(...) |
+    encode-json | write("stdout")
+
+in Python, without starting a JVM. Only the subset of Metamorph used by the
+morph files in assets is supported: data, entity, choose, combine and the
+functions case, compose, constant, dateformat, lookup, regexp, script (only
+btoa.js), split, trim and unique, with filemaps and inline maps. Anything
+else raises a ValueError, when the morph is compiled.
+
+    >>> with open("out.ldj", "wb") as output:
+    ...     flux_to_json("assets/87/87.flux", "input.xml", output,
+    ...                  MAP_DIR="assets/maps/")
+
+Records are read and flattened in this process and transformed in batches by
+a pool of processes. Output is one JSON object per line, like encode-json
+writes it, so repeated literals lead to repeated keys.
+
+The output has not been compared with flux.sh on production data yet, so
+tasks use it only when asked to, e.g. IJOCIntermediateSchema --metamorph.
+"""
+
+import base64
+import datetime
+import gzip
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+
+from siskin.utils import ordered_pool_map
+
+# Java String.trim strips all characters up to and including space.
+JAVA_WHITESPACE = "".join(chr(i) for i in range(33))
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _java_split(pattern, value):
+    """
+    Like Java's String.split, which drops trailing empty strings.
+    """
+    parts = pattern.split(value)
+    while len(parts) > 1 and parts[-1] == "":
+        parts.pop()
+    return parts
+
+
+def read_flux(path, **variables):
+    """
+    Read a flux file, return the path to the morph, the record tag name and
+    the variables (defaults from the flux file, overridden by `variables`).
+    FLUX_DIR is set to the directory of the flux file.
+    """
+    with open(path) as handle:
+        content = "\n".join(line.split("//", 1)[0] for line in handle)
+    env = {"FLUX_DIR": os.path.join(os.path.dirname(os.path.abspath(path)), "")}
+    for name, value in re.findall(r'default\s+(\w+)\s*=\s*"([^"]*)"\s*;', content):
+        env[name] = value
+    env.update(variables)
+    match = re.search(r'handle-generic-xml\(\s*"([^"]*)"\s*\)', content)
+    if not match:
+        raise ValueError("{}: only handle-generic-xml is supported".format(path))
+    tag = match.group(1)
+    match = re.search(r"morph\(([^,)]*)", content)
+    if not match:
+        raise ValueError("{}: no morph found".format(path))
+    parts = []
+    for token in match.group(1).split("+"):
+        token = token.strip()
+        if token.startswith('"'):
+            parts.append(token.strip('"'))
+        elif token in env:
+            parts.append(env[token])
+        else:
+            raise ValueError("{}: undefined variable {}".format(path, token))
+    return "".join(parts), tag, env
+
+
+def _flatten(element, prefix, events, counter):
+    """
+    Append (path, value, entity) literals of an element, like
+    handle-generic-xml emits them: attributes, then text as "value", then
+    children as entities. The entity number is the one Metamorph would
+    assign, counted in document order.
+    """
+    entity = counter[0]
+    for name, value in element.attrib.items():
+        events.append((prefix + _local(name), value, entity))
+    text = (element.text or "").replace("\t", "")
+    if text.strip(JAVA_WHITESPACE):
+        events.append((prefix + "value", text.replace("\n", " "), entity))
+    for child in element:
+        counter[0] += 1
+        _flatten(child, prefix + _local(child.tag) + ".", events, counter)
+        tail = (child.tail or "").replace("\t", "")
+        if tail.strip(JAVA_WHITESPACE):
+            events.append((prefix + "value", tail.replace("\n", " "), entity))
+
+
+def generic_xml_records(handle, tag="record"):
+    """
+    Yield (record id, literals) for each element named `tag` (local name,
+    case sensitive) in an XML file object. Literals are (path, value, entity)
+    tuples, paths are dotted local names, e.g. "metadata.dc.title.value".
+    """
+    stack, depth = [], 0
+    for event, element in ET.iterparse(handle, events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            if _local(element.tag) == tag:
+                depth += 1
+            continue
+        stack.pop()
+        if _local(element.tag) != tag:
+            continue
+        depth -= 1
+        if depth > 0:
+            continue
+        events, counter = [], [0]
+        _flatten(element, "", events, counter)
+        yield element.get("id", ""), events
+        element.clear()
+        if stack:
+            stack[-1].remove(element)
+
+
+# Functions, each takes a value and returns a list of values.
+
+
+class _Function(object):
+    def clear(self):
+        pass
+
+
+class _Case(_Function):
+    def __init__(self, to="upper"):
+        if to not in ("upper", "lower"):
+            raise ValueError("case: unsupported value for to: {}".format(to))
+        self.lower = to == "lower"
+
+    def __call__(self, value):
+        return [value.lower() if self.lower else value.upper()]
+
+
+class _Compose(_Function):
+    def __init__(self, prefix="", postfix=""):
+        self.prefix, self.postfix = prefix, postfix
+
+    def __call__(self, value):
+        return [self.prefix + value + self.postfix]
+
+
+class _Constant(_Function):
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, value):
+        return [self.value]
+
+
+class _Trim(_Function):
+    def __call__(self, value):
+        return [value.strip(JAVA_WHITESPACE)]
+
+
+class _Split(_Function):
+    def __init__(self, delimiter):
+        self.pattern = re.compile(delimiter, re.ASCII)
+
+    def __call__(self, value):
+        return _java_split(self.pattern, value)
+
+
+class _Unique(_Function):
+    """
+    Pass each value only once per record.
+    """
+
+    def __init__(self):
+        self.seen = set()
+
+    def clear(self):
+        self.seen = set()
+
+    def __call__(self, value):
+        if value in self.seen:
+            return []
+        self.seen.add(value)
+        return [value]
+
+
+class _Regexp(_Function):
+    """
+    Emit every match, or the format filled with the groups of every match.
+    """
+
+    def __init__(self, match, format=None):
+        self.pattern = re.compile(match, re.ASCII)
+        self.format = format
+
+    def __call__(self, value):
+        if self.format is None:
+            return [m.group(0) for m in self.pattern.finditer(value)]
+        return [self._expand(m) for m in self.pattern.finditer(value)]
+
+    def _expand(self, match):
+        groups = [match.group(0)] + list(match.groups())
+
+        def group(g):
+            i = int(g.group(1))
+            return (groups[i] or "") if i < len(groups) else g.group(0)
+
+        return re.sub(r"\$\{(\d+)\}", group, self.format)
+
+
+class _Lookup(_Function):
+    def __init__(self, table, default=None):
+        self.table, self.default = table, default
+
+    def __call__(self, value):
+        result = self.table.get(value, self.default)
+        return [] if result is None else [result]
+
+
+# Java date patterns, that we know how to handle.
+DATE_PATTERNS = {"yyyy": "%(y)04d", "MM": "%(m)02d", "dd": "%(d)02d"}
+
+# Style patterns for DateFormat.getDateInstance(style, locale).
+DATE_STYLES = {("SHORT", "sv"): "yyyy-MM-dd", ("MEDIUM", "sv"): "yyyy-MM-dd"}
+
+
+def _date_pattern(pattern):
+    """
+    Turn a Java date pattern using yyyy, MM and dd into a regular expression
+    for parsing and a format string.
+    """
+    tokens = re.findall(r"yyyy|MM|dd|[^a-zA-Z]+|[a-zA-Z]+", pattern)
+    regex, fmt = "", ""
+    for token in tokens:
+        if token in DATE_PATTERNS:
+            regex += r"(?P<%s>\d+)" % token[0].lower()
+            fmt += DATE_PATTERNS[token]
+        elif token[0].isalpha():
+            raise ValueError("dateformat: unsupported pattern: {}".format(pattern))
+        else:
+            regex += re.escape(token)
+            fmt += token.replace("%", "%%")
+    return re.compile(regex, re.ASCII), fmt
+
+
+class _DateFormat(_Function):
+    """
+    Parse leniently like SimpleDateFormat (trailing text is ignored, day and
+    month overflow), values that do not parse are passed unchanged.
+    """
+
+    def __init__(self, inputformat, outputformat="MEDIUM", language="en"):
+        self.regex, _ = _date_pattern(inputformat)
+        pattern = DATE_STYLES.get((outputformat, language), outputformat)
+        if pattern in ("FULL", "LONG", "MEDIUM", "SHORT"):
+            raise ValueError(
+                "dateformat: unsupported style {} for {}".format(pattern, language)
+            )
+        _, self.format = _date_pattern(pattern)
+
+    def __call__(self, value):
+        match = self.regex.match(value)
+        if not match:
+            return [value]
+        y, m, d = (int(match.group(k)) for k in "ymd")
+        try:
+            year, month = divmod(y * 12 + m - 1, 12)
+            date = datetime.date(year, month + 1, 1) + datetime.timedelta(days=d - 1)
+        except (ValueError, OverflowError):
+            return [value]
+        return [self.format % {"y": date.year, "m": date.month, "d": date.day}]
+
+
+def b64_url_encode(value):
+    """
+    Same as b64URLEncode in assets/js/btoa.js: base64 of the UTF-8 encoded
+    UTF-16 code units, without padding.
+    """
+    units = value.replace("\r\n", "\n").encode("utf-16-le", "surrogatepass")
+    encoded = bytearray()
+    for i in range(0, len(units), 2):
+        c = units[i] | units[i + 1] << 8
+        if c < 128:
+            encoded.append(c)
+        elif c < 2048:
+            encoded.extend((c >> 6 | 192, c & 63 | 128))
+        else:
+            encoded.extend((c >> 12 | 224, c >> 6 & 63 | 128, c & 63 | 128))
+    return base64.b64encode(bytes(encoded)).decode("ascii").rstrip("=")
+
+
+# Script functions, by script file name and invoked function.
+SCRIPTS = {("btoa.js", "b64URLEncode"): b64_url_encode}
+
+
+class _Script(_Function):
+    def __init__(self, file, invoke):
+        key = (os.path.basename(file), invoke)
+        if key not in SCRIPTS:
+            raise ValueError("script: unsupported: {} {}".format(file, invoke))
+        self.func = SCRIPTS[key]
+
+    def __call__(self, value):
+        return [self.func(value)]
+
+
+FUNCTIONS = {
+    "case": _Case,
+    "compose": _Compose,
+    "constant": _Constant,
+    "dateformat": _DateFormat,
+    "regexp": _Regexp,
+    "script": _Script,
+    "split": _Split,
+    "trim": _Trim,
+    "unique": _Unique,
+}
+
+# Statements. Each receives (name, value, source, entity) and passes results
+# on to its receiver.
+
+
+class _Output(object):
+    def __init__(self):
+        self.items = []
+
+    def receive(self, name, value, source, entity):
+        self.items.append((name, value))
+
+
+class _Data(object):
+    def __init__(self, source, name, functions):
+        self.source, self.name, self.functions = source, name, functions
+        self.receiver = None
+
+    def process(self, value, entity):
+        values = [value]
+        for func in self.functions:
+            values = [result for v in values for result in func(v)]
+            if not values:
+                return
+        name = self.source if self.name is None else self.name
+        for v in values:
+            self.receiver.receive(name, v, self, entity)
+
+
+class _Collect(object):
+    """
+    Base for entity, choose and combine. Collectors with flushWith="record"
+    wait for the end of the record, the others emit, once every statement
+    in them has fired.
+    """
+
+    def __init__(self, name, flush_with=None, reset=False, same_entity=False):
+        if flush_with not in (None, "record"):
+            raise ValueError("unsupported flushWith: {}".format(flush_with))
+        self.name, self.wait = name, flush_with is not None
+        self.reset, self.same_entity = reset, same_entity
+        self.sources, self.receiver, self.entity = [], None, None
+        self.clear()
+
+    def clear(self):
+        self.left = set(self.sources)
+        self.entity = None
+
+    def receive(self, name, value, source, entity):
+        if self.same_entity and self.entity is not None and entity != self.entity:
+            self.clear()
+        self.entity = entity
+        self.collect(name, value, source)
+        self.left.discard(source)
+        if not self.wait and not self.left:
+            self.emit()
+            if self.reset:
+                self.clear()
+
+    def flush(self):
+        if self.entity is not None:
+            self.emit()
+        self.clear()
+
+
+class _Entity(_Collect):
+    def clear(self):
+        _Collect.clear(self)
+        self.buffer = []
+
+    def collect(self, name, value, source):
+        self.buffer.append((name, value))
+
+    def emit(self):
+        if self.buffer:
+            self.receiver.receive(self.name, self.buffer, self, self.entity)
+        # an entity is started fresh, after it has been emitted
+        self.clear()
+
+
+class _Choose(_Collect):
+    """
+    Emit the last value of the first statement (in morph order), that fired.
+    """
+
+    def clear(self):
+        _Collect.clear(self)
+        self.chosen = None
+
+    def collect(self, name, value, source):
+        priority = self.sources.index(source)
+        if self.chosen is None or priority <= self.chosen[0]:
+            self.chosen = (priority, name, value)
+
+    def emit(self):
+        if self.chosen is not None:
+            _, name, value = self.chosen
+            self.receiver.receive(self.name or name, value, self, self.entity)
+
+
+class _Combine(_Collect):
+    def __init__(self, name, value, **kwargs):
+        self.template = value
+        _Collect.__init__(self, name, **kwargs)
+
+    def clear(self):
+        _Collect.clear(self)
+        self.variables = {}
+
+    def collect(self, name, value, source):
+        self.variables[name] = value
+
+    def emit(self):
+        value = re.sub(
+            r"\$\{([^}]*)\}",
+            lambda m: self.variables.get(m.group(1), ""),
+            self.template,
+        )
+        self.receiver.receive(self.name, value, self, self.entity)
+
+
+def _bool(value):
+    return value == "true"
+
+
+COLLECTORS = {
+    "entity": (_Entity, {"name", "flushWith"}),
+    "choose": (_Choose, {"name", "flushWith"}),
+    "combine": (_Combine, {"name", "value", "flushWith", "reset", "sameEntity"}),
+}
+
+
+class Metamorph(object):
+    """
+    A compiled morph file. Transform records, as yielded by
+    generic_xml_records, with `transform` or `to_json`.
+    """
+
+    def __init__(self, path, variables=None):
+        self.path = path
+        self.variables = dict(variables or {})
+        self.sources = {}
+        self.stateful = []
+        self.flushers = []
+        self.output = _Output()
+        root = ET.parse(path).getroot()
+        self.maps = {}
+        for element in root:
+            if _local(element.tag) == "maps":
+                for m in element:
+                    self.maps[m.get("name")] = self._compile_map(m)
+        for element in root:
+            tag = _local(element.tag)
+            if tag == "rules":
+                for child in element:
+                    self._compile(child, self.output)
+            elif tag in ("meta", "maps"):
+                continue
+            elif tag == "macros" and len(element) == 0:
+                continue
+            else:
+                raise ValueError("{}: unsupported element: {}".format(path, tag))
+
+    def _expand(self, value):
+        """
+        Replace $[name] with the value of variable name.
+        """
+
+        def lookup(match):
+            if match.group(1) not in self.variables:
+                raise ValueError(
+                    "{}: undefined variable: {}".format(self.path, match.group(1))
+                )
+            return self.variables[match.group(1)]
+
+        return re.sub(r"\$\[([^\]]*)\]", lookup, value)
+
+    def _attrs(self, element, allowed):
+        attrs = {k: self._expand(v) for k, v in element.attrib.items()}
+        unknown = set(attrs) - set(allowed)
+        if unknown:
+            raise ValueError(
+                "{}: unsupported attributes on {}: {}".format(
+                    self.path, _local(element.tag), ", ".join(sorted(unknown))
+                )
+            )
+        return attrs
+
+    def _compile_map(self, element):
+        tag = _local(element.tag)
+        if tag == "map":
+            return {
+                e.get("name"): self._expand(e.get("value", ""))
+                for e in element
+                if _local(e.tag) == "entry"
+            }
+        if tag != "filemap":
+            raise ValueError("{}: unsupported map: {}".format(self.path, tag))
+        attrs = self._attrs(element, {"name", "files", "separator"})
+        separator = re.compile(attrs.get("separator", "\\t"))
+        table = {}
+        for filename in attrs["files"].split(","):
+            filename = re.sub("^file://", "", filename.strip())
+            with open(filename, encoding="utf-8") as handle:
+                for line in handle:
+                    parts = _java_split(separator, line.rstrip("\r\n"))
+                    if len(parts) == 2:
+                        table[parts[0]] = parts[1]
+        return table
+
+    def _compile_function(self, element):
+        tag = _local(element.tag)
+        if tag == "lookup":
+            attrs = self._attrs(element, {"in", "default"})
+            if "in" in attrs:
+                if attrs["in"] not in self.maps:
+                    raise ValueError(
+                        "{}: unknown map: {}".format(self.path, attrs["in"])
+                    )
+                table = self.maps[attrs["in"]]
+            else:
+                table = {}
+                for entry in element:
+                    entry = self._attrs(entry, {"name", "value"})
+                    table[entry["name"]] = entry.get("value", "")
+            return _Lookup(table, default=attrs.get("default"))
+        if tag not in FUNCTIONS:
+            raise ValueError("{}: unsupported function: {}".format(self.path, tag))
+        cls = FUNCTIONS[tag]
+        try:
+            func = cls(**{k: self._expand(v) for k, v in element.attrib.items()})
+        except TypeError:
+            raise ValueError(
+                "{}: unsupported attributes on {}: {}".format(
+                    self.path, tag, ", ".join(sorted(element.attrib))
+                )
+            )
+        self.stateful.append(func)
+        return func
+
+    def _compile(self, element, receiver):
+        """
+        Compile a statement, connect its output to receiver and return it.
+        """
+        tag = _local(element.tag)
+        if tag == "data":
+            attrs = self._attrs(element, {"source", "name"})
+            source = attrs["source"]
+            if any(c in source for c in "*|?"):
+                raise ValueError("{}: unsupported source: {}".format(self.path, source))
+            functions = [self._compile_function(child) for child in element]
+            data = _Data(source, attrs.get("name"), functions)
+            data.receiver = receiver
+            self.sources.setdefault(source, []).append(data)
+            return data
+        if tag not in COLLECTORS:
+            raise ValueError("{}: unsupported statement: {}".format(self.path, tag))
+        cls, allowed = COLLECTORS[tag]
+        attrs = self._attrs(element, allowed)
+        kwargs = {
+            "flush_with": attrs.pop("flushWith", "record" if tag == "choose" else None),
+            "reset": _bool(attrs.pop("reset", "false")),
+            "same_entity": _bool(attrs.pop("sameEntity", "false")),
+        }
+        collect = cls(attrs.pop("name", ""), **dict(attrs, **kwargs))
+        collect.receiver = receiver
+        collect.sources = [self._compile(child, collect) for child in element]
+        collect.clear()
+        self.stateful.append(collect)
+        # inner collectors are flushed first
+        if collect.wait:
+            self.flushers.append(collect)
+        return collect
+
+    def transform(self, identifier, literals):
+        """
+        Transform a single record, return a list of (name, value) tuples,
+        where value is a string or, for entities, again such a list.
+        """
+        for node in self.stateful:
+            node.clear()
+        self.output.items = []
+        for data in self.sources.get("_id", ()):
+            data.process(identifier, 0)
+        sources = self.sources
+        for path, value, entity in literals:
+            for data in sources.get(path, ()):
+                data.process(value, entity)
+        for node in self.flushers:
+            node.flush()
+        return self.output.items
+
+    def to_json(self, identifier, literals):
+        return encode_json(self.transform(identifier, literals))
+
+
+def _json_members(items):
+    return ",".join(
+        "{}:{}".format(
+            json.dumps(
+                name[:-2] if isinstance(value, list) and name.endswith("[]") else name,
+                ensure_ascii=False,
+            ),
+            _json_value(name, value),
+        )
+        for name, value in items
+    )
+
+
+def _json_value(name, value):
+    if not isinstance(value, list):
+        return json.dumps(value, ensure_ascii=False)
+    if name.endswith("[]"):
+        return "[{}]".format(",".join(_json_value(n, v) for n, v in value))
+    return "{{{}}}".format(_json_members(value))
+
+
+def encode_json(items):
+    """
+    Serialize the result of Metamorph.transform like encode-json: entities
+    whose name ends with [] become arrays, other entities objects.
+    """
+    return "{{{}}}".format(_json_members(items))
+
+
+_metamorph = None
+
+
+def _metamorph_worker_init(path, variables):
+    global _metamorph
+    _metamorph = Metamorph(path, variables)
+
+
+def _metamorph_batch(batch):
+    """
+    Transform a list of records, return newline delimited JSON as bytes.
+    """
+    lines = [_metamorph.to_json(identifier, literals) for identifier, literals in batch]
+    return "".join(line + "\n" for line in lines).encode("utf-8"), len(lines)
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def flux_to_json(flux, filename, output, workers=None, batch_size=500, **variables):
+    """
+    Run a flux file on an XML file (plain or gzip compressed) and write
+    newline delimited JSON to a binary file object. Keyword arguments
+    override defaults of the flux file, e.g. MAP_DIR. Returns the number of
+    records written.
+    """
+    path, tag, env = read_flux(flux, **variables)
+    with open(filename, "rb") as handle:
+        gzipped = handle.read(2) == b"\x1f\x8b"
+    opener = gzip.open if gzipped else open
+    n = 0
+    with opener(filename, "rb") as handle:
+        for blob, count in ordered_pool_map(
+            _metamorph_batch,
+            _batches(generic_xml_records(handle, tag=tag), batch_size),
+            workers=workers,
+            initializer=_metamorph_worker_init,
+            initargs=(path, env),
+        ):
+            output.write(blob)
+            n += count
+    return n
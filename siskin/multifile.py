@@ -0,0 +1,285 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Aggregate files without copying them.
+
+A manifest lists member files (with their sizes), a MultiFileTarget points
+to a manifest and reads the members as a single stream:
+
+    >>> write_manifest(["a.ldj.zst", "b.ldj.zst"], "all.ldj.zst.manifest")
+    >>> with MultiFileTarget("all.ldj.zst.manifest").open() as f:
+    ...     f.read()
+
+If a single file is needed, concat_files uses reflinks (FICLONE,
+FICLONERANGE) where the filesystem supports it (btrfs, XFS), otherwise
+copy_file_range, which at least keeps data in the kernel, and a plain copy
+as a last resort. A reflink can only be placed at a block aligned offset, so
+for zstd files the gaps can be filled with skippable frames, which every
+decoder ignores, and all members are cloned. A file needed under two names
+is hard linked with link_file.
+"""
+
+import collections
+import errno
+import fcntl
+import io
+import json
+import logging
+import os
+import shutil
+import struct
+import tempfile
+
+import luigi
+
+logger = logging.getLogger("siskin")
+
+# linux/fs.h
+FICLONE = 0x40049409
+FICLONERANGE = 0x4020940D
+
+# Errors, that mean: not supported here.
+UNSUPPORTED = (
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EBADF,
+    errno.EPERM,
+)
+
+ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+
+
+def zstd_skippable_frame(size):
+    """
+    Return a zstd skippable frame of exactly `size` bytes (at least 8),
+    cf. RFC 8478, section 3.1.2.
+    """
+    if size < 8:
+        raise ValueError("a skippable frame needs at least 8 bytes")
+    return struct.pack("<II", ZSTD_SKIPPABLE_MAGIC, size - 8) + b"\x00" * (size - 8)
+
+
+def zstd_padding(offset, blocksize):
+    """
+    Return a skippable frame, that pads `offset` to the next multiple of
+    blocksize, or empty bytes, if offset is aligned.
+    """
+    gap = -offset % blocksize
+    if gap == 0:
+        return b""
+    if gap < 8:
+        gap += blocksize
+    return zstd_skippable_frame(gap)
+
+
+def _reflink(src, dst, offset):
+    """
+    Clone all of src to dst at offset. Raises OSError, if not supported.
+    """
+    if offset == 0:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    else:
+        args = struct.pack("qQQQ", src.fileno(), 0, 0, offset)
+        fcntl.ioctl(dst.fileno(), FICLONERANGE, args)
+
+
+def _copy_file_range(src, dst, offset, size):
+    copied = 0
+    while copied < size:
+        n = os.copy_file_range(
+            src.fileno(), dst.fileno(), size - copied, copied, offset + copied
+        )
+        if n == 0:
+            break
+        copied += n
+    return copied
+
+
+def concat_files(paths, output, pad=None, reflink=True):
+    """
+    Concatenate files into output (a path, which is truncated). If given,
+    pad(offset, blocksize) returns bytes to append before the next member, so
+    it can be cloned; use zstd_padding for zstd files. Returns a Counter with
+    the number of members per method and the bytes written.
+    """
+    stats = collections.Counter()
+    use_reflink = reflink and hasattr(fcntl, "ioctl")
+    use_copy_file_range = hasattr(os, "copy_file_range")
+    with open(output, "wb") as dst:
+        blocksize = os.fstat(dst.fileno()).st_blksize or 4096
+        offset = 0
+        for path in paths:
+            with open(path, "rb") as src:
+                size = os.fstat(src.fileno()).st_size
+                if use_reflink and pad is not None and offset % blocksize:
+                    padding = pad(offset, blocksize)
+                    dst.write(padding)
+                    dst.flush()
+                    offset += len(padding)
+                    stats["padding"] += len(padding)
+                if use_reflink and offset % blocksize == 0:
+                    try:
+                        _reflink(src, dst, offset)
+                        offset += size
+                        dst.seek(offset)
+                        stats["reflink"] += 1
+                        stats["bytes"] += size
+                        continue
+                    except OSError as exc:
+                        if exc.errno not in UNSUPPORTED:
+                            raise
+                        if offset == 0:
+                            # whole file clone failed, no need to try again
+                            use_reflink = False
+                if use_copy_file_range:
+                    try:
+                        copied = _copy_file_range(src, dst, offset, size)
+                        offset += copied
+                        dst.seek(offset)
+                        stats["copy_file_range"] += 1
+                        stats["bytes"] += copied
+                        continue
+                    except OSError as exc:
+                        if exc.errno not in UNSUPPORTED:
+                            raise
+                        use_copy_file_range = False
+                src.seek(0)
+                dst.seek(offset)
+                shutil.copyfileobj(src, dst, 1 << 20)
+                dst.flush()
+                offset += size
+                stats["copy"] += 1
+                stats["bytes"] += size
+        dst.truncate(offset)
+    logger.debug("concatenated %d files into %s: %s", len(paths), output, dict(stats))
+    return stats
+
+
+def link_file(src, dst):
+    """
+    Make dst (replaced, if it exists) a hard link to src, or a copy made with
+    concat_files, if they are on different filesystems. Returns "link" or
+    "copy".
+    """
+    tmp = "{}.link-{}".format(dst, os.getpid())
+    try:
+        os.link(src, tmp)
+    except OSError as exc:
+        if exc.errno not in UNSUPPORTED:
+            raise
+        concat_files([src], dst)
+        return "copy"
+    os.replace(tmp, dst)
+    return "link"
+
+
+def write_manifest(paths, output):
+    """
+    Write a manifest listing paths (made absolute) with their sizes.
+    """
+    members = []
+    for path in paths:
+        members.append({"path": os.path.abspath(path), "size": os.path.getsize(path)})
+    directory = os.path.dirname(os.path.abspath(output))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".manifest-")
+    with os.fdopen(fd, "w") as handle:
+        json.dump({"members": members}, handle, indent=4)
+        handle.write("\n")
+    os.rename(tmp, output)
+
+
+def read_manifest(path):
+    """
+    Return the member paths of a manifest. Raises ValueError, if a member is
+    missing or has changed in size.
+    """
+    with open(path) as handle:
+        members = json.load(handle)["members"]
+    for member in members:
+        if not os.path.exists(member["path"]):
+            raise ValueError("{}: missing member: {}".format(path, member["path"]))
+        if os.path.getsize(member["path"]) != member["size"]:
+            raise ValueError("{}: member changed: {}".format(path, member["path"]))
+    return [member["path"] for member in members]
+
+
+class ConcatReader(io.RawIOBase):
+    """
+    Read a list of files as one.
+    """
+
+    def __init__(self, paths):
+        self.paths = collections.deque(paths)
+        self.fd = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while True:
+            if self.fd is None:
+                if not self.paths:
+                    return 0
+                self.fd = os.open(self.paths.popleft(), os.O_RDONLY)
+            n = os.readv(self.fd, [b])
+            if n:
+                return n
+            os.close(self.fd)
+            self.fd = None
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        io.RawIOBase.close(self)
+
+
+def open_manifest(path):
+    """
+    Return a binary file object over all members of a manifest.
+    """
+    return io.BufferedReader(ConcatReader(read_manifest(path)), 1 << 20)
+
+
+class MultiFileTarget(luigi.LocalTarget):
+    """
+    A target, whose path is a manifest. Opening it for reading yields the
+    concatenated (raw) bytes of all members, or their text, decoded as UTF-8,
+    like a LocalTarget opened with "r".
+    """
+
+    def members(self):
+        return read_manifest(self.path)
+
+    def open(self, mode="r"):
+        if mode not in ("r", "rb"):
+            raise ValueError("a MultiFileTarget is written with write_manifest")
+        if mode == "r":
+            return io.TextIOWrapper(open_manifest(self.path), encoding="utf-8")
+        return open_manifest(self.path)
+
+    def write(self, paths):
+        write_manifest(paths, self.path)
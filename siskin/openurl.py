@@ -23,9 +23,20 @@
 # @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
 """
 Helper functions for dealing with OpenURL, refs #5163.
+
+For many documents, use compile_openurl_plan or openurl_links, which do the
+field to parameter mapping with a plan built once, and encode parameters
+without urlencode.
 """
 
-from six.moves.urllib.parse import urlencode
+import json
+import logging
+
+from six.moves.urllib.parse import quote_plus, urlencode
+
+from siskin.utils import ordered_pool_map
+
+logger = logging.getLogger("siskin")
 
 
 def update_on_value(tdict, tkey, value, first=True):
@@ -170,3 +181,250 @@ def openurl_link_from_intermediateschema(
 ):
     params = openurl_parameters_from_intermediateschema(doc, rfr_id=rfr_id)
     return "{}{}".format(base, urlencode(params))
+
+
+# Parameters copied from the first author.
+AUTHOR_PARAMETERS = (
+    "rft.au",
+    "rft.aucorp",
+    "rft.aufirst",
+    "rft.auinit",
+    "rft.auinit1",
+    "rft.aulast",
+    "rft.ausuffix",
+)
+
+# Field to parameter plan, per genre, as (operation, parameter, argument)
+# steps, mirroring openurl_parameters_from_intermediateschema.
+OPENURL_PLAN = {
+    "common": (
+        ("first", "rft.title", "rft.atitle"),
+        ("first", "rft.date", "rft.date"),
+        ("first", "rft.language", "languages"),
+        ("join", "rft.place", "rft.place"),
+    ),
+    "book": (
+        ("set", "rft_val_fmt", "info:ofi/fmt:kev:mtx:book"),
+        ("set", "rft.genre", "book"),
+        ("move", "rft.btitle", "rft.title"),
+        ("first", "rft_id", "finc.record_id"),
+        ("first", "rft.btitle", "rft.btitle"),
+        ("first", "rft.atitle", "rft.atitle"),
+        ("first", "rft.edition", "rft.edition"),
+        ("first", "rft.isbn", "rft.isbn"),
+        ("first", "rft.issn", "rft.issn"),
+        ("first", "rft.eissn", "rft.eissn"),
+        ("first", "rft.volume", "rft.volume"),
+        ("first", "rft.spage", "rft.spage"),
+        ("first", "rft.epage", "rft.epage"),
+        ("first", "rft.pages", "rft.pages"),
+        ("first", "rft.tpages", "rft.tpages"),
+        ("first", "rft.issue", "rft.issue"),
+        ("first", "bici", "bici"),
+        ("first", "rft.series", "rft.series"),
+        ("author", None, AUTHOR_PARAMETERS),
+        ("first", "rft.genre", "rft.genre"),
+        ("doi", "rft_id", "doi"),
+        ("first", "rft.pub", "rft.pub"),
+    ),
+    "article": (
+        ("delete", "rft.title", None),
+        ("first", "rft_id", "finc.record_id"),
+        ("first", "rft.atitle", "rft.atitle"),
+        ("first", "rft.jtitle", "rft.jtitle"),
+        ("first", "rft.stitle", "rft.stitle"),
+        ("first", "rft.date", "rft.date"),
+        ("first", "rft.issn", "rft.issn"),
+        ("first", "rft.eissn", "rft.eissn"),
+        ("first", "rft.ssn", "rft.ssn"),
+        ("first", "rft.volume", "rft.volume"),
+        ("first", "rft.spage", "rft.spage"),
+        ("first", "rft.epage", "rft.epage"),
+        ("first", "rft.pages", "rft.pages"),
+        ("first", "rft.issue", "rft.issue"),
+        ("first", "rft.coden", "rft.coden"),
+        ("first", "rft.artnum", "rft.artnum"),
+        ("first", "sici", "sici"),
+        ("first", "rft.chron", "rft.chron"),
+        ("first", "rft.quarter", "rft.quarter"),
+        ("first", "rft.part", "rft.part"),
+        ("author", None, AUTHOR_PARAMETERS),
+        ("first", "rft.genre", "rft.genre"),
+        ("doi", "rft_id", "doi"),
+    ),
+    "journal": (("first", "rft.issn", "rft.issn"),),
+    "other": (
+        ("set", "rft_val_fmt", "info:ofi/fmt:kev:mtx:book"),
+        ("creator", "rft.creator", "rft.au"),
+        ("first", "rft.pub", "rft.pub"),
+        ("first", "rft.format", "finc.format"),
+        ("first", "rft.language", "languages"),
+    ),
+}
+
+_SAFE = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.-~"
+_QUOTED = [chr(i) if i in _SAFE else "%{:02X}".format(i) for i in range(256)]
+_QUOTED[ord(" ")] = "+"
+
+
+def fast_quote_plus(value):
+    """
+    Same as quote_plus for a str, with a lookup table per byte.
+    """
+    b = value.encode("utf-8")
+    if not b.rstrip(_SAFE):
+        return value
+    return "".join(map(_QUOTED.__getitem__, b))
+
+
+def compile_openurl_plan(
+    base="http://www.redi-bw.de/links/ubl?rl_site=ubl&",
+    rfr_id="www.ub.uni-leipzig.de",
+    plan=None,
+):
+    """
+    Return a function, that takes an intermediate schema document and returns
+    the same link as openurl_link_from_intermediateschema, or None for an
+    empty document. Fixed parameters are encoded once, parameter names are
+    encoded once per plan.
+    """
+    if not rfr_id:
+        raise ValueError("rfr_id must be set")
+    plan = plan or OPENURL_PLAN
+    head = {
+        "url_ver": "Z39.88-2004",
+        "ctx_ver": "Z39.88-2004",
+        "ctx_enc": "info:ofi/enc:UTF-8",
+        "rfr_id": "info:sid/{}:generator".format(rfr_id),
+    }
+    prefix = "{}{}".format(base, urlencode(head))
+    names = {}
+    compiled = {}
+    for genre, steps in plan.items():
+        compiled[genre] = []
+        for op, name, arg in steps:
+            if op == "author":
+                arg = tuple(("first", key, key) for key in arg)
+            elif op == "creator":
+                arg = (("first", name, arg),)
+            for _, key, _ in arg if op in ("author", "creator") else [(op, name, arg)]:
+                names[key] = quote_plus(key) + "="
+            compiled[genre].append((op, name, arg))
+
+    def apply(steps, doc, params):
+        for op, name, arg in steps:
+            if op == "first":
+                value = doc.get(arg)
+                if value is None:
+                    continue
+                if isinstance(value, (list, tuple)):
+                    if value:
+                        params[name] = value[0]
+                else:
+                    params[name] = value
+            elif op == "author":
+                authors = doc.get("authors", [])
+                if authors:
+                    apply(arg, authors[0], params)
+            elif op == "doi":
+                if doc.get(arg):
+                    params[name] = "info:doi/{}".format(doc.get(arg))
+            elif op == "join":
+                if doc.get(arg) is not None:
+                    params[name] = ", ".join(doc.get(arg, []))
+            elif op == "set":
+                params[name] = arg
+            elif op == "move":
+                params[name] = params[arg]
+                del params[arg]
+            elif op == "delete":
+                del params[name]
+            elif op == "creator":
+                if doc.get("authors", []):
+                    apply(arg, doc, params)
+            else:
+                raise ValueError("unknown operation: {}".format(op))
+
+    def link(doc):
+        if not doc:
+            return None
+        params = {}
+        apply(compiled["common"], doc, params)
+        genre = doc.get("rft.genre", "article")
+        if genre == "proceeding":
+            genre = "article"
+        if genre not in compiled or genre in ("common", "other"):
+            genre = "other"
+        apply(compiled[genre], doc, params)
+        encoded = [prefix]
+        for name, value in params.items():
+            encoded.append(
+                names[name]
+                + fast_quote_plus(value if isinstance(value, str) else str(value))
+            )
+        return "&".join(encoded)
+
+    return link
+
+
+_plans = {}
+
+
+def _openurl_batch(job):
+    """
+    Turn a list of ldj lines into "id<TAB>link" lines. Returns the lines as
+    bytes and a list of (id, error) tuples for failed documents.
+    """
+    lines, base, rfr_id = job
+    if (base, rfr_id) not in _plans:
+        _plans[(base, rfr_id)] = compile_openurl_plan(base=base, rfr_id=rfr_id)
+    link = _plans[(base, rfr_id)]
+    result, errors = [], []
+    for line in lines:
+        if not line.strip():
+            continue
+        doc = json.loads(line)
+        id = doc.get("finc.id") or doc.get("finc.record_id") or ""
+        try:
+            url = link(doc)
+        except (KeyError, TypeError, AttributeError) as exc:
+            errors.append((id, repr(exc)))
+            continue
+        if url is not None:
+            result.append("{}\t{}\n".format(id, url))
+    return "".join(result).encode("utf-8"), errors
+
+
+def openurl_links(
+    lines,
+    base="http://www.redi-bw.de/links/ubl?rl_site=ubl&",
+    rfr_id="www.ub.uni-leipzig.de",
+    workers=None,
+    batch_size=2000,
+    stats=None,
+):
+    """
+    Given an iterable of intermediate schema lines (bytes, e.g. a file),
+    yield blobs of "id<TAB>openurl" lines, in input order. The id is finc.id.
+    Batches of lines are processed by `workers` processes. Documents, that
+    cannot be turned into a link (e.g. missing title) are logged and counted
+    as "failed" in `stats`.
+    """
+
+    def jobs():
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield batch, base, rfr_id
+                batch = []
+        if batch:
+            yield batch, base, rfr_id
+
+    for blob, errors in ordered_pool_map(_openurl_batch, jobs(), workers=workers):
+        for id, error in errors:
+            logger.warning("openurl failed for %s: %s", id, error)
+        if stats is not None:
+            stats["failed"] += len(errors)
+            stats["written"] += blob.count(b"\n")
+        yield blob
@@ -0,0 +1,148 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Frame index for seekable zstd intermediate schema files.
+
+For each source id (finc.source_id) and ISIL (x.labels), the index lists the
+frames containing at least one matching record. A query decompresses only
+the frames in the intersection and filters their records:
+
+    >>> build_index("ai.ldj.zst", "ai.ldj.zst.idx")
+    >>> index = RecordIndex("ai.ldj.zst.idx")
+    >>> for line in index.records(source="49", isil="DE-15"):
+    ...     ...
+"""
+
+import collections
+import json
+import logging
+import os
+import re
+
+from siskin.utils import ordered_pool_map
+from siskin.zstdseek import SeekableZstdReader
+
+logger = logging.getLogger("siskin")
+
+SOURCE_RE = re.compile(rb'"finc\.source_id":\s*"([^"]*)"')
+LABELS_RE = re.compile(rb'"x\.labels":\s*(\[[^\]]*\])')
+
+
+def frame_keys(data):
+    """
+    Return the set of index keys (source:ID, isil:ISIL) of the records in a
+    chunk of newline delimited intermediate schema, without parsing records.
+    """
+    keys = {"source:" + v.decode("utf-8") for v in SOURCE_RE.findall(data)}
+    for labels in set(LABELS_RE.findall(data)):
+        keys.update("isil:" + isil for isil in json.loads(labels))
+    return keys
+
+
+_worker_reader = {}
+
+
+def _index_worker_init(path):
+    _worker_reader["reader"] = SeekableZstdReader(path)
+
+
+def _index_frame(i):
+    return sorted(frame_keys(_worker_reader["reader"].frame(i)))
+
+
+def build_index(path, output, workers=None):
+    """
+    Index the frames of a seekable zstd file, frames are scanned in a pool
+    of processes. Returns the number of keys.
+    """
+    with SeekableZstdReader(path) as reader:
+        n = len(reader)
+    keys = collections.defaultdict(list)
+    results = ordered_pool_map(
+        _index_frame,
+        range(n),
+        workers=workers,
+        initializer=_index_worker_init,
+        initargs=(path,),
+    )
+    for i, frame in enumerate(results):
+        for key in frame:
+            keys[key].append(i)
+    index = {
+        "path": os.path.abspath(path),
+        "size": os.path.getsize(path),
+        "frames": n,
+        "keys": dict(sorted(keys.items())),
+    }
+    tmp = output + ".tmp"
+    with open(tmp, "w") as handle:
+        json.dump(index, handle)
+    os.replace(tmp, output)
+    logger.debug("indexed %d frames of %s, %d keys", n, path, len(keys))
+    return len(keys)
+
+
+class RecordIndex(object):
+    """
+    Query a frame index. Raises ValueError, if the indexed file has changed.
+    """
+
+    def __init__(self, path):
+        with open(path) as handle:
+            self.index = json.load(handle)
+        if os.path.getsize(self.index["path"]) != self.index["size"]:
+            raise ValueError("{}: indexed file changed".format(path))
+
+    def keys(self, prefix=""):
+        return [key for key in self.index["keys"] if key.startswith(prefix)]
+
+    def frames(self, source=None, isil=None):
+        """
+        Return the sorted frame numbers, that may contain records from source
+        with isil.
+        """
+        frames = set(range(self.index["frames"]))
+        if source is not None:
+            frames &= set(self.index["keys"].get("source:" + source, []))
+        if isil is not None:
+            frames &= set(self.index["keys"].get("isil:" + isil, []))
+        return sorted(frames)
+
+    def records(self, source=None, isil=None, workers=4):
+        """
+        Yield the records (bytes, with newline) from source with isil,
+        reading only the indexed frames.
+        """
+        frames = self.frames(source=source, isil=isil)
+        logger.debug("reading %d of %d frames", len(frames), self.index["frames"])
+        with SeekableZstdReader(self.index["path"]) as reader:
+            for data in reader.iter_frames(indices=frames, workers=workers):
+                for line in data.splitlines(keepends=True):
+                    if not line.strip():
+                        continue
+                    doc = json.loads(line)
+                    if source is not None and doc.get("finc.source_id") != source:
+                        continue
+                    if isil is not None and isil not in (doc.get("x.labels") or []):
+                        continue
+                    yield line
@@ -0,0 +1,242 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Machine capacity and task resources.
+
+Tasks declare the approximate memory (e.g. "4G" or "35%" of the machine) and
+number of cores they use. These become luigi resources ("memory" in MiB and
+"cpu"), so the scheduler runs tasks concurrently only as long as their sum
+fits the machine. Capacity is read from siskin.ini, defaults are physical
+memory and the number of CPUs:
+
+    [resources]
+
+    memory = 80%
+    cpu = 16
+
+The same declaration sizes the commands of a task, so a sort buffer never
+exceeds what was reserved for it:
+
+    >>> sort_buffer("25%", machine={"memory": 4096, "cpu": 4})
+    '1024M'
+
+Only the local scheduler is configured automatically (siskin run
+--local-scheduler), a central scheduler (luigid) needs the same values in the
+[resources] section of its luigi.cfg. Luigi grants a single unit of any
+resource missing there, so tasks request only resources with a configured
+capacity; without a [resources] section, they run unconstrained.
+
+Disk space is checked before a task runs: an output is expected to be about
+as large as earlier outputs of the same task, and the filesystem must have
+room for it plus a reserve (default 0):
+
+    [resources]
+
+    disk-reserve = 50G
+"""
+
+import collections
+import logging
+import os
+import re
+import shutil
+
+import luigi
+
+from siskin.configuration import Config
+
+logger = logging.getLogger("siskin")
+
+UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(value, total=None):
+    """
+    Parse a size like 512M, 4G, 1024 (bytes) or 35% (of total) into bytes.
+    """
+    value = str(value).strip().upper()
+    if value.endswith("%"):
+        if total is None:
+            raise ValueError("percentage without total: {}".format(value))
+        return int(total * float(value[:-1]) / 100)
+    match = re.match(r"^([0-9.]+)\s*([KMGT]?)I?B?$", value)
+    if not match:
+        raise ValueError("cannot parse size: {}".format(value))
+    number, unit = match.groups()
+    return int(float(number) * UNITS[unit])
+
+
+def physical_memory():
+    """
+    Return the physical memory in bytes.
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return 4 << 30
+
+
+def capacity(config=None):
+    """
+    Return the capacity of the machine as luigi resources, memory in MiB.
+    """
+    if config is None:
+        config = Config.instance()
+    memory = config.get("resources", "memory", fallback="100%")
+    cpu = config.get("resources", "cpu", fallback=str(os.cpu_count() or 1))
+    return {
+        "memory": max(1, parse_size(memory, total=physical_memory()) >> 20),
+        "cpu": max(1, int(cpu)),
+    }
+
+
+def configure_scheduler(config=None, local=True):
+    """
+    Make machine capacity known to the local luigi scheduler, unless luigi
+    is configured already. Without it, luigi allows a single unit of each
+    resource. A central scheduler runs in a process of its own and reads
+    its own luigi.cfg, so nothing is set, if local is False.
+    """
+    if not local:
+        return
+    luigi_config = luigi.configuration.get_config()
+    if not luigi_config.has_section("resources"):
+        luigi_config.add_section("resources")
+    for name, amount in capacity(config).items():
+        if not luigi_config.has_option("resources", name):
+            luigi_config.set("resources", name, str(amount))
+    logger.debug("scheduler resources: %s", luigi_config.getintdict("resources"))
+
+
+def task_resources(memory=None, cpu=None, machine=None):
+    """
+    Return luigi resources for a task using memory (size or percentage) and
+    cpu cores. Requests are capped at the capacity of the machine, so a task
+    can always run.
+    """
+    machine = machine or capacity()
+    resources = {}
+    if memory:
+        mib = parse_size(memory, total=machine["memory"] << 20) >> 20
+        resources["memory"] = max(1, min(mib, machine["memory"]))
+    if cpu:
+        resources["cpu"] = max(1, min(int(cpu), machine["cpu"]))
+    return resources
+
+
+def scheduler_resources(memory=None, cpu=None, scheduler=None):
+    """
+    Return task_resources for memory and cpu, limited to the resources the
+    scheduler has a capacity for (default: the [resources] section of the
+    luigi configuration) and capped at that capacity, so a task is never
+    waiting for more than the scheduler can grant.
+    """
+    if scheduler is None:
+        scheduler = luigi.configuration.get_config().getintdict("resources")
+    return {
+        name: min(amount, scheduler[name])
+        for name, amount in task_resources(memory=memory, cpu=cpu).items()
+        if name in scheduler
+    }
+
+
+def sort_buffer(memory, share=1, machine=None):
+    """
+    Return a value for sort -S, for a task using memory, with the buffer
+    split evenly across share concurrent sort processes.
+    """
+    mib = task_resources(memory=memory, machine=machine).get("memory", 1024)
+    return "{}M".format(max(1, mib // share))
+
+
+def threads(cpu, machine=None):
+    """
+    Return a thread count for commands like zstd -T, for a task using cpu
+    cores.
+    """
+    return task_resources(cpu=cpu or 1, machine=machine)["cpu"]
+
+
+def existing_parent(path):
+    """
+    Return path or its nearest existing ancestor.
+    """
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    return path
+
+
+def same_filesystem(a, b):
+    """
+    Return True, if paths a and b (or their nearest existing ancestors) are
+    on the same device, so a file can be renamed from one to the other.
+    """
+    return os.stat(existing_parent(a)).st_dev == os.stat(existing_parent(b)).st_dev
+
+
+def estimate_size(path, history=5, margin=1.1):
+    """
+    Estimate the size of an output at path from earlier outputs of the same
+    task, i.e. the largest of the `history` most recent files in the same
+    directory with the same extension, plus a margin for growth. Returns 0,
+    if there are no earlier outputs.
+    """
+    directory, name = os.path.split(path)
+    if "." not in name or not os.path.isdir(directory):
+        return 0
+    suffix = "." + name.split(".", 1)[1]
+    earlier = []
+    for entry in os.scandir(directory):
+        if entry.name.startswith(".") or entry.name == name:
+            continue
+        if entry.name.endswith(suffix) and entry.is_file():
+            stat = entry.stat()
+            earlier.append((stat.st_mtime, stat.st_size))
+    sizes = [size for _, size in sorted(earlier)[-history:]]
+    return int(max(sizes, default=0) * margin)
+
+
+def check_disk_space(paths, reserve=0):
+    """
+    Raise RuntimeError, if the filesystem of any of the output paths has not
+    enough free space for the estimated size of the outputs, plus reserve
+    bytes. Returns a dict from device to bytes needed.
+    """
+    needed, free = collections.Counter(), {}
+    for path in paths:
+        parent = existing_parent(os.path.dirname(path))
+        device = os.stat(parent).st_dev
+        needed[device] += estimate_size(path)
+        if device not in free:
+            free[device] = (parent, shutil.disk_usage(parent).free)
+    for device, size in needed.items():
+        parent, available = free[device]
+        if size + reserve > available:
+            raise RuntimeError(
+                "not enough disk space on {}: {} MiB free, {} MiB needed, "
+                "{} MiB reserved".format(
+                    parent, available >> 20, size >> 20, reserve >> 20
+                )
+            )
+    return dict(needed)
@@ -0,0 +1,226 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Runtime history, prediction and task priorities.
+
+Every successful run of a siskin task appends its duration and input size to
+a history file below core.home. From it, the duration of each pending task
+is predicted, and its priority set to the length of the longest chain of
+pending work it starts (critical path), so long poles like CrossrefUniqItems
+start early:
+
+    >>> schedule = plan([AIUpdate()], workers=4)
+    >>> schedule.makespan
+    34012.5
+
+luigi prefers runnable tasks with higher priority.
+"""
+
+import collections
+import datetime
+import heapq
+import logging
+import os
+import statistics
+
+import luigi
+
+logger = logging.getLogger("siskin")
+
+RUNTIMES = "runtimes.tsv"
+
+Plan = collections.namedtuple("Plan", "graph durations priorities makespan")
+
+
+def input_size(task):
+    """
+    Return the total size in bytes of the existing local inputs of a task.
+    """
+    size = 0
+    for target in luigi.task.flatten(task.input()):
+        path = getattr(target, "path", None)
+        if path and os.path.isfile(path):
+            size += os.path.getsize(path)
+    return size
+
+
+def record(path, family, seconds, size=0):
+    """
+    Append a run of task family, which took seconds with size bytes of input,
+    to the history at path.
+    """
+    line = "{}\t{}\t{:.3f}\t{}\n".format(
+        family, datetime.datetime.now().isoformat(timespec="seconds"), seconds, size
+    )
+    # a single short append, so concurrent workers do not interleave
+    with open(path, "a") as handle:
+        handle.write(line)
+
+
+def load_history(path):
+    """
+    Return a dict from task family to a list of (seconds, input size) tuples,
+    oldest first.
+    """
+    history = collections.defaultdict(list)
+    if not os.path.exists(path):
+        return history
+    with open(path) as handle:
+        for line in handle:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) != 4:
+                continue
+            try:
+                history[fields[0]].append((float(fields[2]), int(fields[3])))
+            except ValueError:
+                continue
+    return history
+
+
+class RuntimePredictor(object):
+    """
+    Predict task durations from the `window` most recent runs of a task
+    family: the median rate in seconds per input byte times the current input
+    size, if sizes are known, else the median duration. Families without
+    history take `default` seconds.
+    """
+
+    def __init__(self, history, window=5, default=60):
+        self.history = history
+        self.window = window
+        self.default = default
+
+    def predict(self, family, size=0):
+        runs = self.history.get(family, [])[-self.window :]
+        if not runs:
+            return self.default
+        if size and all(s > 0 for _, s in runs):
+            return statistics.median(t / s for t, s in runs) * size
+        return statistics.median(t for t, _ in runs)
+
+
+def task_graph(roots):
+    """
+    Return a dict from each pending task reachable from roots to its pending
+    dependencies. Dependencies of complete tasks are not visited, like luigi.
+    """
+    graph, stack = {}, [task for task in roots if not task.complete()]
+    while stack:
+        task = stack.pop()
+        if task in graph:
+            continue
+        deps = [
+            dep for dep in luigi.task.flatten(task.requires()) if not dep.complete()
+        ]
+        graph[task] = deps
+        stack.extend(deps)
+    return graph
+
+
+def dependents(graph):
+    """
+    Invert a task graph: map each task to the tasks requiring it.
+    """
+    result = {task: [] for task in graph}
+    for task, deps in graph.items():
+        for dep in deps:
+            result[dep].append(task)
+    return result
+
+
+def critical_paths(graph, durations):
+    """
+    Return a dict from task to the duration of the longest chain from the
+    task up to a root, including the task itself.
+    """
+    up = dependents(graph)
+    lengths = {}
+
+    def length(task):
+        # iterative, DAG may be deep
+        stack = [task]
+        while stack:
+            current = stack[-1]
+            missing = [t for t in up[current] if t not in lengths]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            lengths[current] = durations[current] + max(
+                (lengths[t] for t in up[current]), default=0
+            )
+        return lengths[task]
+
+    for task in graph:
+        length(task)
+    return lengths
+
+
+def simulate(graph, durations, priorities, workers=1):
+    """
+    Return the makespan of running the task graph with a number of workers,
+    each starting the runnable task with the highest priority when idle.
+    """
+    waiting = {task: set(deps) for task, deps in graph.items()}
+    up = dependents(graph)
+    runnable = [task for task, deps in waiting.items() if not deps]
+    running, now, seq = [], 0, 0
+    while runnable or running:
+        runnable.sort(key=lambda task: priorities[task])
+        while runnable and len(running) < workers:
+            task = runnable.pop()
+            heapq.heappush(running, (now + durations[task], seq, task))
+            seq += 1
+        now, _, task = heapq.heappop(running)
+        for parent in up[task]:
+            waiting[parent].discard(task)
+            if not waiting[parent]:
+                runnable.append(parent)
+    return now
+
+
+def plan(roots, path=None, workers=1, predictor=None):
+    """
+    Predict durations of the pending tasks below roots, set their priority
+    to their critical path length in seconds and return a Plan with the
+    predicted makespan. History is read from path, by default from the
+    runtimes file below the home directory of the first root task.
+    """
+    if predictor is None:
+        path = path or os.path.join(roots[0].BASE, RUNTIMES)
+        predictor = RuntimePredictor(load_history(path))
+    graph = task_graph(roots)
+    durations = {
+        task: predictor.predict(task.task_family, input_size(task)) for task in graph
+    }
+    priorities = critical_paths(graph, durations)
+    for task, priority in priorities.items():
+        task.priority = int(priority)
+    makespan = simulate(graph, durations, priorities, workers=workers)
+    logger.debug(
+        "%d pending tasks, predicted makespan %0.1fs with %d workers",
+        len(graph),
+        makespan,
+        workers,
+    )
+    return Plan(graph, durations, priorities, makespan)
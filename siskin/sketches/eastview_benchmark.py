@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Scaling of eastview_zip_to_intermediate_schema across cores.
+
+    $ python siskin/sketches/eastview_benchmark.py [-m 200] [-d 100] [-w 1,2,4]
+
+Builds a zip from fixtures/eastview/udbedu.xml with m members of about d
+documents each, then converts it to gzip compressed intermediate schema with
+each number of workers and reports docs/s.
+"""
+
+import argparse
+import gzip
+import os
+import re
+import tempfile
+import zipfile
+
+from siskin.benchmark import Timer
+from siskin.conversions import eastview_zip_to_intermediate_schema
+
+FIXTURE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "fixtures", "eastview", "udbedu.xml"
+)
+
+
+def make_zip(path, members, docs):
+    with open(FIXTURE) as f:
+        content = f.read()
+    head, rest = content.split("<add>", 1)
+    body = rest.rsplit("</add>", 1)[0]
+    copies = max(1, docs // body.count("<doc>"))
+    with zipfile.ZipFile(path, "w") as zf:
+        for i in range(members):
+            parts = [
+                re.sub(r"UDB-EDU-(\d+)", r"UDB-EDU-%d-%d-\1" % (i, j), body)
+                for j in range(copies)
+            ]
+            zf.writestr(
+                "xml/%05d.xml" % i, "{}<add>{}</add>".format(head, "".join(parts))
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", type=int, default=200, help="zip members")
+    parser.add_argument("-d", type=int, default=100, help="docs per member")
+    parser.add_argument(
+        "-w", default="1,%d" % (os.cpu_count() or 1), help="comma separated workers"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="siskin-") as tmp:
+        zname = os.path.join(tmp, "xml.zip")
+        make_zip(zname, args.m, args.d)
+        for workers in [int(v) for v in args.w.split(",")]:
+            with Timer() as t:
+                with gzip.open(os.path.join(tmp, "out.json.gz"), "wb") as output:
+                    n = eastview_zip_to_intermediate_schema(
+                        zname, output, workers=workers
+                    )
+            print("workers={:3d}: {:10.0f} docs/s".format(workers, n / t.elapsed_s))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Throughput of imslp_tarball_to_marc, serial and with a process pool.
+
+    $ python siskin/sketches/imslp_benchmark.py [-n 5000] [-w 1,4]
+
+Builds a tarball from fixtures/imslp (n copies with distinct identifiers) and
+reports records/s and peak RSS for each number of workers.
+"""
+
+import argparse
+import io
+import os
+import resource
+import tarfile
+import tempfile
+
+from siskin.benchmark import Timer
+from siskin.conversions import imslp_tarball_to_marc
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "..", "fixtures", "imslp")
+
+
+def make_tarball(path, n):
+    names = sorted(name for name in os.listdir(FIXTURES) if name != "notitle.xml")
+    blobs = {}
+    for name in names:
+        with open(os.path.join(FIXTURES, name), "rb") as f:
+            blobs[name[:-4]] = f.read()
+    with tarfile.open(path, "w:gz") as tar:
+        for i in range(n):
+            key = names[i % len(names)][:-4]
+            identifier = "%s%07d" % (key, i)
+            data = blobs[key].replace(key.encode("utf-8"), identifier.encode("utf-8"))
+            info = tarfile.TarInfo("imslp/%s.xml" % identifier)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=5000, help="number of records")
+    parser.add_argument(
+        "-w", default="1,%d" % (os.cpu_count() or 1), help="comma separated workers"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="siskin-") as tmp:
+        tarball = os.path.join(tmp, "imslp.tar.gz")
+        make_tarball(tarball, args.n)
+        for workers in [int(v) for v in args.w.split(",")]:
+            with Timer() as t:
+                imslp_tarball_to_marc(
+                    tarball, os.path.join(tmp, "out.mrc"), workers=workers
+                )
+            print(
+                "workers={:3d}: {:10.0f} records/s, max rss {} MB".format(
+                    workers,
+                    args.n / t.elapsed_s,
+                    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024,
+                )
+            )
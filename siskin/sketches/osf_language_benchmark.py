@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Per-record cost of OSF language detection, before and after sharing the
+detector per process (siskin.language).
+
+    $ python siskin/sketches/osf_language_benchmark.py [-n 3] [-l eng,deu,fra]
+
+Before: a lingua detector for all languages was built for every preprint
+in osf_to_intermediate. After: one detector per process, batch detection
+per API page, results cached by text digest.
+
+Uses fixtures/osf/preprints.ldj (OSFDownload format, one API page per line);
+contributor lookups are not part of this benchmark and are stubbed out.
+"""
+
+import argparse
+import json
+import os
+from unittest.mock import patch
+
+from siskin import language
+from siskin.benchmark import Timer
+from siskin.conversions import osf_to_intermediate
+
+FIXTURE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "fixtures", "osf", "preprints.ldj"
+)
+
+
+def load_pages(path=FIXTURE):
+    with open(path) as handle:
+        return [json.loads(line) for line in handle]
+
+
+def before(docs):
+    """
+    Build a fresh detector for each record, as osf_to_intermediate used to.
+    """
+    from lingua import LanguageDetectorBuilder
+
+    for doc in docs:
+        detector = (
+            LanguageDetectorBuilder.from_all_languages()
+            .with_preloaded_language_models()
+            .build()
+        )
+        if doc["attributes"].get("description"):
+            detector.detect_language_of(doc["attributes"]["description"])
+
+
+def after(pages, languages=None):
+    """
+    Shared detector, one batch per page, then convert.
+    """
+    with patch("siskin.conversions.URLCache.get", return_value='{"data": []}'):
+        for page in pages:
+            language.detect_languages(
+                [doc["attributes"].get("description") for doc in page["data"]],
+                languages=languages,
+            )
+            for doc in page["data"]:
+                osf_to_intermediate(doc, languages=languages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-n", type=int, default=3, help="records to measure for the old way"
+    )
+    parser.add_argument("-l", default="", help="comma separated ISO 639-3 codes")
+    args = parser.parse_args()
+    languages = [v for v in args.l.split(",") if v] or None
+
+    pages = load_pages()
+    docs = [doc for page in pages for doc in page["data"]]
+
+    with Timer() as t:
+        before(docs[: args.n])
+    print(
+        "before: {:10.0f} µs/record ({} records)".format(
+            t.elapsed_s / args.n * 1e6, args.n
+        )
+    )
+
+    with Timer() as t:
+        after(pages, languages=languages)
+    print(
+        "after (cold): {:10.0f} µs/record ({} records, incl. detector build)".format(
+            t.elapsed_s / len(docs) * 1e6, len(docs)
+        )
+    )
+
+    language._cache.clear()
+    with Timer() as t:
+        after(pages, languages=languages)
+    print(
+        "after (detector built, empty cache): {:10.0f} µs/record ({} records)".format(
+            t.elapsed_s / len(docs) * 1e6, len(docs)
+        )
+    )
+
+    with Timer() as t:
+        after(pages, languages=languages)
+    print(
+        "after (cached): {:10.0f} µs/record ({} records)".format(
+            t.elapsed_s / len(docs) * 1e6, len(docs)
+        )
+    )
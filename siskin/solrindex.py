@@ -0,0 +1,401 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Index newline delimited JSON documents into Solr.
+
+* https://solr.apache.org/guide/solr/latest/indexing-guide/indexing-with-update-handlers.html
+
+The input is cut into batches, bounded by number of documents and bytes,
+which are posted to the update handler by a pool of threads. Only a few
+batches per thread are in flight, so reading waits for Solr. Batches are
+acknowledged in input order; after each, the byte offset (in the
+uncompressed input) is written to a checkpoint file, so an interrupted run
+continues after the last acknowledged batch.
+
+    >>> index_file("export.ndj.zst", "http://localhost:8983/solr/biblio",
+    ...            workers=8, checkpoint="export.checkpoint")
+
+To index only what changed between two exports, keep a fingerprint file
+(id, content hash and offset per document, sorted by id) of the last indexed
+export. A merge with the fingerprints of a new export yields the documents
+to post and the ids to delete, without holding either export in memory:
+
+    >>> write_fingerprints("new.ndj.zst", "new.fp")
+    >>> export_delta("new.ndj.zst", "old.fp", "new.fp", "delta.ndj", "deletes.txt")
+"""
+
+import collections
+import concurrent.futures
+import contextlib
+import gzip
+import hashlib
+import itertools
+import json
+import logging
+import operator
+import os
+import subprocess
+import time
+
+import requests
+
+from siskin.utils import nwise, read_checkpoint, write_checkpoint
+
+logger = logging.getLogger("siskin")
+
+
+@contextlib.contextmanager
+def open_export(path):
+    """
+    Open a plain, gzip or zstd (requires the zstd executable) compressed file
+    for reading bytes.
+    """
+    if path.endswith(".zst"):
+        proc = subprocess.Popen(
+            ["zstd", "-q", "-d", "-c", "-T0", path], stdout=subprocess.PIPE
+        )
+        try:
+            yield proc.stdout
+        finally:
+            proc.stdout.close()
+            if proc.wait() not in (0, -13):
+                raise RuntimeError("zstd failed on {}".format(path))
+    elif path.endswith(".gz"):
+        with gzip.open(path, "rb") as handle:
+            yield handle
+    else:
+        with open(path, "rb") as handle:
+            yield handle
+
+
+def skip_bytes(handle, n, blocksize=1 << 20):
+    """
+    Advance a file object by n bytes, by reading, if it cannot seek.
+    """
+    if handle.seekable():
+        handle.seek(n)
+        return
+    while n > 0:
+        block = handle.read(min(n, blocksize))
+        if not block:
+            raise ValueError("input shorter than checkpoint offset")
+        n -= len(block)
+
+
+def iter_batches(handle, max_docs=1000, max_bytes=1 << 23):
+    """
+    Yield (bytes consumed, list of lines) from a file object with one
+    document per line. A batch has at most max_docs documents and, unless a
+    single document is larger, at most max_bytes bytes.
+    """
+    batch, size, consumed = [], 0, 0
+    for line in handle:
+        if not line.strip():
+            consumed += len(line)
+            continue
+        if batch and (len(batch) >= max_docs or size + len(line) > max_bytes):
+            yield consumed, batch
+            batch, size, consumed = [], 0, 0
+        batch.append(line.rstrip(b"\r\n"))
+        size += len(line)
+        consumed += len(line)
+    if batch or consumed:
+        yield consumed, batch
+
+
+def post_update(
+    sess, solr, body, commit_within=None, timeout=600, max_retries=5, retry_sleep=10
+):
+    """
+    Post a JSON update request (bytes) to the update handler. Server and
+    connection errors are retried, with increasing sleep; a 400 (bad
+    documents) is not. Raises RuntimeError.
+    """
+    params = {"wt": "json"}
+    if commit_within:
+        params["commitWithin"] = commit_within
+    for attempt in range(max_retries + 1):
+        try:
+            resp = sess.post(
+                "{}/update".format(solr),
+                data=body,
+                params=params,
+                headers={"Content-Type": "application/json"},
+                timeout=timeout,
+            )
+            if resp.status_code == 200:
+                return
+            if resp.status_code == 400:
+                raise ValueError(resp.text[:1000])
+            error = "{} {}".format(resp.status_code, resp.text[:200])
+        except requests.exceptions.RequestException as exc:
+            error = str(exc)
+        except ValueError as exc:
+            raise RuntimeError("solr rejected batch: {}".format(exc))
+        if attempt < max_retries:
+            logger.warning("update failed: %s, retry %d", error, attempt + 1)
+            time.sleep(retry_sleep * (attempt + 1))
+    raise RuntimeError("update failed: {}".format(error))
+
+
+def post_batch(sess, solr, docs, **kwargs):
+    """
+    Post a list of JSON documents (bytes). Keyword arguments are passed to
+    post_update.
+    """
+    if not docs:
+        return
+    post_update(sess, solr, b"[" + b",".join(docs) + b"]", **kwargs)
+
+
+def delete_ids(sess, solr, ids, batch_size=1000, **kwargs):
+    """
+    Delete documents by id, batch_size ids per request. Returns the number of
+    ids.
+    """
+    n = 0
+    for batch in nwise(ids, n=batch_size):
+        body = json.dumps({"delete": list(batch)}).encode("utf-8")
+        post_update(sess, solr, body, **kwargs)
+        n += len(batch)
+    return n
+
+
+def commit(sess, solr, timeout=3600):
+    resp = sess.get(
+        "{}/update".format(solr), params={"commit": "true"}, timeout=timeout
+    )
+    if resp.status_code != 200:
+        raise RuntimeError("commit failed: {} {}".format(resp.status_code, resp.text))
+
+
+def index_file(
+    path,
+    solr,
+    workers=4,
+    max_docs=1000,
+    max_bytes=1 << 23,
+    checkpoint=None,
+    inflight=2,
+    commit_within=None,
+    final_commit=True,
+    report_interval=60,
+    **kwargs,
+):
+    """
+    Index a file with one Solr JSON document per line into the core at URL
+    `solr`. With a checkpoint file, progress is recorded after each
+    acknowledged batch and a rerun resumes from there; a completed run is not
+    repeated. Returns a dict with docs, batches, elapsed seconds and docs/s
+    of this run. Extra keyword arguments are passed to post_batch.
+    """
+    state = {"offset": 0, "docs": 0, "batches": 0, "done": False}
+    if checkpoint:
+        state = read_checkpoint(checkpoint) or state
+    stats = collections.Counter()
+    if state["done"]:
+        logger.debug("%s already indexed", path)
+        return {"docs": 0, "batches": 0, "elapsed_s": 0, "docs_per_s": 0}
+    if state["offset"]:
+        logger.info("resuming %s at offset %d", path, state["offset"])
+
+    sess = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=workers)
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+
+    started = last_report = time.time()
+
+    def acknowledge(future, consumed, ndocs):
+        nonlocal last_report
+        future.result()
+        state["offset"] += consumed
+        state["docs"] += ndocs
+        state["batches"] += 1
+        stats["docs"] += ndocs
+        stats["batches"] += 1
+        if checkpoint:
+            write_checkpoint(checkpoint, state)
+        now = time.time()
+        if now - last_report >= report_interval:
+            logger.info(
+                "%d docs (%0.1f docs/s), offset %d",
+                state["docs"],
+                stats["docs"] / (now - started),
+                state["offset"],
+            )
+            last_report = now
+
+    with open_export(path) as handle:
+        skip_bytes(handle, state["offset"])
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = collections.deque()
+            try:
+                for consumed, docs in iter_batches(
+                    handle, max_docs=max_docs, max_bytes=max_bytes
+                ):
+                    future = executor.submit(
+                        post_batch,
+                        sess,
+                        solr,
+                        docs,
+                        commit_within=commit_within,
+                        **kwargs,
+                    )
+                    pending.append((future, consumed, len(docs)))
+                    if len(pending) >= workers * inflight:
+                        acknowledge(*pending.popleft())
+                while pending:
+                    acknowledge(*pending.popleft())
+            finally:
+                for future, _, _ in pending:
+                    future.cancel()
+    if final_commit:
+        commit(sess, solr)
+    state["done"] = True
+    if checkpoint:
+        write_checkpoint(checkpoint, state)
+    elapsed = time.time() - started
+    return {
+        "docs": stats["docs"],
+        "batches": stats["batches"],
+        "elapsed_s": round(elapsed, 2),
+        "docs_per_s": round(stats["docs"] / elapsed, 1) if elapsed else 0,
+    }
+
+
+def fingerprint(line):
+    """
+    Return a short content hash of a document line, as hex string.
+    """
+    return hashlib.blake2b(line.rstrip(b"\r\n"), digest_size=8).hexdigest()
+
+
+def sort_file(path, output, numeric=False, buffer_size="25%"):
+    """
+    Sort a file bytewise (or numerically) with sort(1), which spills to disk
+    next to the output; path and output may be the same.
+    """
+    tmpdir = os.path.dirname(os.path.abspath(output))
+    cmd = ["sort", "-S", buffer_size, "-T", tmpdir, "-o", output]
+    if numeric:
+        cmd.append("-n")
+    subprocess.run(cmd + [path], check=True, env=dict(os.environ, LC_ALL="C"))
+
+
+def write_fingerprints(path, output, buffer_size="25%"):
+    """
+    Write id, fingerprint and byte offset of each document of an export as
+    TSV, sorted by id, with a sort buffer of buffer_size. Returns the number
+    of documents.
+    """
+    unsorted = output + ".unsorted"
+    n, offset = 0, 0
+    with open_export(path) as handle, open(unsorted, "wb") as f:
+        for line in handle:
+            if line.strip():
+                doc_id = json.loads(line)["id"]
+                if "\t" in doc_id or "\n" in doc_id:
+                    raise ValueError("cannot fingerprint id: {!r}".format(doc_id))
+                row = "%s\t%s\t%d\n" % (doc_id, fingerprint(line), offset)
+                f.write(row.encode("utf-8"))
+                n += 1
+            offset += len(line)
+    sort_file(unsorted, output, buffer_size=buffer_size)
+    os.remove(unsorted)
+    return n
+
+
+def _fingerprint_groups(path):
+    """
+    Yield (id, set of fingerprints, list of offsets) from a sorted
+    fingerprint file; an id may occur more than once in an export.
+    """
+    if path is None:
+        return
+    last = None
+    with open(path, "rb") as handle:
+        rows = (line.rstrip(b"\n").split(b"\t") for line in handle)
+        for key, group in itertools.groupby(rows, key=operator.itemgetter(0)):
+            if last is not None and key < last:
+                raise ValueError("{}: not sorted at {!r}".format(path, key))
+            last = key
+            group = list(group)
+            yield key, {row[1] for row in group}, [int(row[2]) for row in group]
+
+
+def diff_fingerprints(old, new):
+    """
+    Merge two sorted fingerprint files. Yield ("update", id, offsets) for
+    new or changed documents, with their offsets in the new export, and
+    ("delete", id, []) for ids missing from new. If old is None, all
+    documents are updates.
+    """
+    olds, news = _fingerprint_groups(old), _fingerprint_groups(new)
+    o, n = next(olds, None), next(news, None)
+    while o is not None or n is not None:
+        if n is None or (o is not None and o[0] < n[0]):
+            yield "delete", o[0].decode("utf-8"), []
+            o = next(olds, None)
+        elif o is None or n[0] < o[0]:
+            yield "update", n[0].decode("utf-8"), n[2]
+            n = next(news, None)
+        else:
+            if o[1] != n[1]:
+                yield "update", n[0].decode("utf-8"), n[2]
+            o, n = next(olds, None), next(news, None)
+
+
+def export_delta(path, old, new, output, deletes, buffer_size="25%"):
+    """
+    Write the new or changed documents of the export at path (with
+    fingerprints new) compared to fingerprints old to output, one Solr
+    document per line and in export order, and the ids to delete to
+    deletes, one per line. Offsets are sorted with a buffer of buffer_size.
+    Returns a Counter with updates and deletes.
+    """
+    stats = collections.Counter()
+    offsets = output + ".offsets"
+    with open(offsets, "w") as f, open(deletes, "w") as g:
+        for op, doc_id, positions in diff_fingerprints(old, new):
+            if op == "delete":
+                g.write(doc_id + "\n")
+            for position in positions:
+                f.write("%d\n" % position)
+            stats[op + "s"] += 1
+    sort_file(offsets, offsets, numeric=True, buffer_size=buffer_size)
+    with open(offsets) as f, open_export(path) as handle, open(output, "wb") as out:
+        wanted = (int(line) for line in f)
+        target, offset = next(wanted, None), 0
+        for line in handle:
+            if target is None:
+                break
+            if offset == target:
+                out.write(line if line.endswith(b"\n") else line + b"\n")
+                target = next(wanted, None)
+            offset += len(line)
+    if target is not None:
+        raise ValueError("{}: export shorter than fingerprints".format(path))
+    os.remove(offsets)
+    logger.debug("delta of %s: %s", path, dict(stats))
+    return stats
@@ -0,0 +1,143 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Batched Solr lookups.
+
+Instead of one query per value, count_terms asks for many values at once:
+a filter restricts the result to documents with any of the values, and a
+facet query per value returns the number of documents for each. No
+documents are fetched. Batches run in a few threads, optionally rate
+limited.
+
+Values are analyzed like in a plain field query, e.g. issn:0171-488x, so
+they match however the field normalizes hyphens or case.
+
+    >>> count_terms("http://localhost:8983/solr/biblio", "issn",
+    ...             ["0171-4880", "0171-5801"], fq=["institution:DE-15"])
+    {'0171-4880': 1, '0171-5801': 0}
+"""
+
+import concurrent.futures
+import logging
+import threading
+import time
+
+import backoff
+import requests
+
+from siskin.utils import nwise
+
+logger = logging.getLogger("siskin")
+
+
+class RateLimiter(object):
+    """
+    Allow at most `rate` calls to wait per second, across threads. A rate of
+    None or 0 means no limit.
+    """
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next = 0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next - now
+            self.next = max(now, self.next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def field_query(field, value):
+    """
+    Return a query for a single value, analyzed by the field, no escaping
+    needed.
+    """
+    return "{!field f=%s}%s" % (field, value)
+
+
+def any_query(field, values):
+    """
+    Return a query for documents with any of the values in field, as
+    phrases, so each value is analyzed by the field.
+    """
+    phrases = ('"%s"' % v.replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return "%s:(%s)" % (field, " OR ".join(phrases))
+
+
+def count_terms(
+    solr,
+    field,
+    values,
+    fq=(),
+    batch_size=100,
+    workers=4,
+    rate=None,
+    sess=None,
+    timeout=600,
+    max_tries=5,
+):
+    """
+    Return a dict with the number of documents in the core at URL `solr`
+    having each value in `field`, restricted by filter queries fq. Values
+    are queried in batches of batch_size, with `workers` requests in flight
+    and at most `rate` requests per second.
+    """
+    sess = sess or requests.Session()
+    limiter = RateLimiter(rate)
+    values = list(dict.fromkeys(values))
+
+    @backoff.on_exception(
+        backoff.expo,
+        (RuntimeError, requests.exceptions.RequestException),
+        max_tries=max_tries,
+    )
+    def count(batch):
+        queries = {field_query(field, value): value for value in batch}
+        params = [
+            ("q", "*:*"),
+            ("rows", "0"),
+            ("wt", "json"),
+            ("facet", "true"),
+            ("fq", any_query(field, batch)),
+        ]
+        params += [("fq", q) for q in fq]
+        params += [("facet.query", q) for q in queries]
+        limiter.wait()
+        # POST, since a batch can be longer than a URL may be
+        resp = sess.post("{}/select".format(solr), data=params, timeout=timeout)
+        if resp.status_code != 200:
+            raise RuntimeError("%s on %s" % (resp.status_code, solr))
+        counts = resp.json()["facet_counts"]["facet_queries"]
+        return {value: counts.get(q, 0) for q, value in queries.items()}
+
+    result = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for counts in executor.map(count, nwise(values, n=batch_size)):
+            result.update(counts)
+            logger.debug("counted %d/%d values", len(result), len(values))
+    return result
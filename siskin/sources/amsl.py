@@ -65,6 +65,7 @@ import datetime
 import gzip
 import json
 import operator
+import os
 import tempfile
 import zipfile
 
@@ -72,6 +73,7 @@ import luigi
 from gluish.format import TSV, Gzip
 from gluish.utils import shellout
 
+from siskin.fixrules import compile_rules
 from siskin.task import DefaultTask
 from siskin.utils import SetEncoder, dictcheck
 
@@ -1368,23 +1370,30 @@ class AMSLFilterConfigPatched(AMSLTask):
 
     date = luigi.DateParameter(default=datetime.date.today())
 
+    # temporary patch until links for BBI are fixed in AMSL
+    rules = [
+        {
+            "op": "replace",
+            "old": """{"and":[{"source":["49"]},{"holdings":{"urls":["https://live.amsl.technology/OntoWiki/files/get?setResource=http://amsl.technology/discovery/metadata-usage/Dokument/BASE_23FIDBBI"]}}]}""",
+            "new": """{"and":[{"source":["49"]},{"issn":{"url":"https://live.amsl.technology/OntoWiki/files/get?setResource=http://amsl.technology/discovery/metadata-usage/Dokument/KBART_23FIDBBI_2022_04_07"}}]}""",
+        },
+    ]
+
     def requires(self):
         return AMSLFilterConfig(date=self.date)
 
     def run(self):
-        # $ dpkg -S replace | grep mariadb
-        # mariadb-server-10.6: /usr/share/man/man1/replace.1.gz
-        # mariadb-server-10.6: /usr/bin/replace
-
-        # temporary patch until links for BBI are fixed in AMSL
-        a = """{"and":[{"source":["49"]},{"holdings":{"urls":["https://live.amsl.technology/OntoWiki/files/get?setResource=http://amsl.technology/discovery/metadata-usage/Dokument/BASE_23FIDBBI"]}}]}"""
-        b = """{"and":[{"source":["49"]},{"issn":{"url":"https://live.amsl.technology/OntoWiki/files/get?setResource=http://amsl.technology/discovery/metadata-usage/Dokument/KBART_23FIDBBI_2022_04_07"}}]}"""
-        output = shellout(
-            """ jq -c . {input} | replace '{a}' '{b}' > {output} """,
-            a=a,
-            b=b,
-            input=self.input().path,
-        )  # need to compact first
+        # need to compact first, so the replacements match
+        compacted = shellout(
+            """ jq -c . {input} > {output} """, input=self.input().path
+        )
+        fix = compile_rules(self.rules)
+        _, output = tempfile.mkstemp(prefix="siskin-")
+        with open(compacted, "rb") as handle, open(output, "wb") as f:
+            for line in handle:
+                f.write(fix(line))
+                f.write(b"\n")
+        os.remove(compacted)
         luigi.LocalTarget(output).move(self.output().path)
 
     def output(self):
@@ -80,6 +80,7 @@ from gluish.intervals import semiyearly
 from gluish.parameter import ClosestDateParameter
 from gluish.utils import shellout
 
+from siskin.marcscan import filter_file
 from siskin.task import DefaultTask
 
 
@@ -162,6 +163,9 @@ class B3KatFilterSSG(B3KatTask):
         default="9,2", description="ssgn designation to be matched against 84.a"
     )
     date = ClosestDateParameter(default=datetime.date.today())
+    processes = luigi.IntParameter(
+        default=os.cpu_count() or 1, description="processes", significant=False
+    )
 
     def requires(self):
         return B3KatDownload(date=self.date)
@@ -177,31 +181,45 @@ class B3KatFilterSSG(B3KatTask):
         ind1="." ind2="."><marc:subfield
         code="a">digit</marc:subfield></marc:datafield>' >$t
 
+        Records are prefiltered on raw bytes, across processes; only
+        candidates are parsed.
         """
         counter = collections.Counter()
+        conditions = [
+            ("084", "2", "ssgn"),
+            ("084", "a", self.ssg),
+            ("912", "a", "digit"),
+        ]
         self.logger.debug("filtering out records from %s", self.input().path)
-        with open(self.input().path, "rb") as handle:
-            with tempfile.NamedTemporaryFile("wb", delete=False) as output:
-                reader = pymarc.MARCReader(handle)
-                writer = pymarc.MARCWriter(output)
-                for i, record in enumerate(reader):
-                    if i % 100000 == 0:
-                        self.logger.debug(
-                            "filtered %d/%d records, %s", counter["written"], i, counter
-                        )
-                    record = marcx.Record.from_record(record)
-                    if "ssgn" not in record.values("084.2"):
-                        counter["not-ssgn"] += 1
-                        continue
-                    if "9,2" not in record.values("084.a"):
-                        counter["not-9,2"] += 1
-                        continue
-                    if "digit" not in record.values("912.a"):
-                        counter["not-digit"] += 1
-                        continue
-                    writer.write(record)
-                    counter["written"] += 1
-            luigi.LocalTarget(output.name).move(self.output().path)
+        with tempfile.NamedTemporaryFile("wb", delete=False) as output:
+            writer = pymarc.MARCWriter(output)
+            candidates = filter_file(
+                self.input().path, conditions, workers=self.processes, stats=counter
+            )
+            for i, raw in enumerate(candidates):
+                if i % 10000 == 0:
+                    self.logger.debug(
+                        "filtered %d/%d records, %s", counter["written"], i, counter
+                    )
+                try:
+                    record = marcx.Record.from_record(pymarc.Record(data=raw))
+                except (ValueError, pymarc.exceptions.PymarcException) as exc:
+                    self.logger.warning("skipping broken record: %s", exc)
+                    counter["invalid"] += 1
+                    continue
+                if "ssgn" not in record.values("084.2"):
+                    counter["not-ssgn"] += 1
+                    continue
+                if self.ssg not in record.values("084.a"):
+                    counter["not-%s" % self.ssg] += 1
+                    continue
+                if "digit" not in record.values("912.a"):
+                    counter["not-digit"] += 1
+                    continue
+                writer.write(record)
+                counter["written"] += 1
+        self.logger.debug("filtered records: %s", counter)
+        luigi.LocalTarget(output.name).move(self.output().path)
 
     def output(self):
         return luigi.LocalTarget(path=self.path(ext="mrc"))
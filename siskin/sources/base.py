@@ -46,20 +46,20 @@ ftp-pattern = *
 import collections
 import datetime
 import functools
-import json
 import os
-import re
 import tempfile
 
 import luigi
 import requests
-from gluish.format import TSV, Gzip, Zstd
+from gluish.format import TSV, Gzip
 from gluish.intervals import monthly
 from gluish.parameter import ClosestDateParameter
 from gluish.utils import shellout
 
 from siskin.common import FTPMirror
+from siskin.fixrules import compile_rules, load_rules
 from siskin.task import DefaultTask
+from siskin.zstdseek import SeekableZstd
 
 
 class BaseTask(DefaultTask):
@@ -151,9 +151,13 @@ class BaseFix(BaseTask):
         return BaseDirectDownload()
 
     def run(self):
-        # SOLR has a limit on facet_fields value length.
-        max_length = 4000
-        pat_year = re.compile(r"[1-9][0-9][0-9][0-9]")
+        # SOLR has a limit on facet_fields value length; possible analysis
+        # error: Document contains at least one immense term in
+        # field=\"title_fullStr\" (whose UTF8 encoding is longer than the max
+        # length 32766), all of which were skipped. The fixes live in
+        # assets/base/fixrules.json, cf. siskin.fixrules.
+        stats = collections.Counter()
+        fix = compile_rules(load_rules(self.assets("base/fixrules.json")), stats=stats)
         with tempfile.NamedTemporaryFile() as f:
             if self.style == "z":
                 shellout(
@@ -169,47 +173,13 @@ class BaseFix(BaseTask):
                 )
             f.flush()
             f.seek(0)
-            stats = collections.Counter()
             self.logger.debug("applying fixes...")
             with self.output().open("w") as output:
                 for line in f:
-                    stats["total"] += 1
-                    line = line.replace(b"DE-15-FID", b"FID-MEDIEN-DE-15")
-                    doc = json.loads(line)
-                    # we can decode w/o the base64 padding
-                    doc["recordtype"] = "default"  # refs #23424
-                    doc["id"] = doc["id"].replace("=", "")
-                    # possible analysis error: Document contains at least one
-                    # immense term in field=\"title_fullStr\" (whose UTF8
-                    # encoding is longer than the max length 32766), all of
-                    # which were skipped.  Please correct the analyzer to not
-                    # produce such terms.
-                    for key in ("title", "title_full", "title_short", "title_sort"):
-                        if key in doc:
-                            doc[key] = doc[key][:max_length]
-                    if "author" in doc:
-                        if isinstance(doc["author"], str):
-                            doc["author"] = doc["author"][:max_length]
-                            stats["author.isstr"] += 1
-                        else:
-                            for i, v in enumerate(doc["author"]):
-                                if not v:
-                                    stats["author.isempty"] += 1
-                                    continue
-                                doc["author"][i] = v[:max_length]
-                            stats["author.islist"] += 1
-                    if "author_sort" in doc:
-                        doc["author_sort"] = doc["author_sort"][:max_length]
-                    if "author_facet" in doc:
-                        for i, v in enumerate(doc["author_facet"]):
-                            if not v:
-                                continue
-                            doc["author_facet"][i] = v[:max_length]
-                    if "publishDate" in doc:
-                        m = pat_year.search(doc["publishDate"])
-                        if m:
-                            doc["publishDate"] = m.group()
-                    output.write(json.dumps(doc).encode("utf-8"))
+                    result = fix(line)
+                    if result is None:
+                        continue
+                    output.write(result)
                     output.write(b"\n")
 
         self.logger.debug("{}".format(stats))
@@ -250,7 +220,7 @@ class BaseFix(BaseTask):
     def output(self):
         last_modified = self.get_last_modified_date()
         filename = "base-{}.zst".format(last_modified.strftime("%Y-%m-%d"))
-        return luigi.LocalTarget(path=self.path(filename=filename), format=Zstd)
+        return luigi.LocalTarget(path=self.path(filename=filename), format=SeekableZstd)
 
 
 class BaseSingleFile(BaseTask):
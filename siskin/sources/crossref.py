@@ -67,6 +67,7 @@ from six import string_types
 
 from siskin import __version__
 from siskin.benchmark import timed
+from siskin.doiscan import extract_dois
 from siskin.mail import send_mail
 from siskin.sources.folio import FolioFilterConfigFreeze
 from siskin.sources.amsl import AMSLService
@@ -190,6 +191,9 @@ class CrossrefSnapshot(CrossrefTask):
 
     """
 
+    memory = "35%"
+    cpu = 4
+
     feed = luigi.Parameter(
         default="2",
         description="feed id to distinguish between various parallel downloads",
@@ -203,10 +207,11 @@ class CrossrefSnapshot(CrossrefTask):
         scratch = self.path(filename=".snapshot.tmp.zst")
         output = shellout(
             """
-            span-crossref-fast-snapshot -o {output} -v -S '35%' $(find {crossref_sync_dir} -name "feed-2*json.zst")
+            span-crossref-fast-snapshot -o {output} -v -S '{size}' $(find {crossref_sync_dir} -name "feed-2*json.zst")
             """,
             output=scratch,
             crossref_sync_dir=crossref_sync_dir,
+            size=self.sort_buffer(),
         )
         luigi.LocalTarget(scratch).move(self.output().path)
 
@@ -269,6 +274,8 @@ class CrossrefCollections(CrossrefTask):
     A collection of crossref collections, refs. #6985. XXX: Save counts as well.
     """
 
+    memory = "35%"
+
     begin = luigi.DateParameter(
         default=datetime.date(2024, 3, 31),
         description="start of the current crossref update streak",
@@ -284,8 +291,10 @@ class CrossrefCollections(CrossrefTask):
     @timed
     def run(self):
         output = shellout(
-            """jq -rc '.["finc.mega_collection"][]?' <(zstd -cd -T0 {input}) | LC_ALL=C sort -S35% -u > {output}""",
+            """jq -rc '.["finc.mega_collection"][]?' <(zstd -cd -T{threads} {input}) | LC_ALL=C sort -S{size} -u > {output}""",
             input=self.input().get("input").path,
+            threads=self.threads(),
+            size=self.sort_buffer(),
         )
         luigi.LocalTarget(output).move(self.output().path)
 
@@ -298,6 +307,8 @@ class CrossrefCollectionsCount(CrossrefTask):
     Report collections and the number of titles per collection.
     """
 
+    memory = "35%"
+
     begin = luigi.DateParameter(
         default=datetime.date(2024, 3, 31),
         description="start of the current crossref update streak",
@@ -313,8 +324,10 @@ class CrossrefCollectionsCount(CrossrefTask):
     @timed
     def run(self):
         output = shellout(
-            """jq -rc '.["finc.mega_collection"][]?' <(zstd -cd -T0 {input}) | LC_ALL=C sort -S35% > {output}""",
+            """jq -rc '.["finc.mega_collection"][]?' <(zstd -cd -T{threads} {input}) | LC_ALL=C sort -S{size} > {output}""",
             input=self.input().get("input").path,
+            threads=self.threads(),
+            size=self.sort_buffer(),
         )
 
         groups = {}  # Map collection name to its size.
@@ -418,34 +431,33 @@ class CrossrefCollectionsDifference(CrossrefTask):
 
 class CrossrefDOIList(CrossrefTask):
     """
-    A list of Crossref DOIs.
+    A list of Crossref DOIs, lowercase, sorted and unique. The intermediate
+    schema is streamed and scanned for DOI in parallel, cf. siskin.doiscan.
     """
 
+    memory = "50%"
+    cpu = 4
+
     date = ClosestDateParameter(default=datetime.date.today())
 
     def requires(self):
         return {
             "input": CrossrefIntermediateSchema(date=self.date),
-            "jq": Executable(name="jq", message="https://github.com/stedolan/jq"),
         }
 
     @timed
     def run(self):
-        _, stopover = tempfile.mkstemp(prefix="siskin-")
-        # process substitution sometimes results in a broken pipe, so extract beforehand
-        output = shellout(
-            "zstd -cd -T0 {input} > {output}", input=self.input().get("input").path
+        stopover = self.stopover()
+        n = extract_dois(
+            self.input().get("input").path,
+            stopover,
+            field="doi",
+            workers=self.threads(),
+            sort_buffer=self.sort_buffer(),
+            sort_threads=self.threads(),
         )
-        shellout(
-            """jq -r '.doi?' {input} | grep -o "10.*" 2> /dev/null | LC_ALL=C sort -S50% > {output} """,
-            input=output,
-            output=stopover,
-        )
-        os.remove(output)
-        output = shellout(
-            """LC_ALL=C sort -S50% -u {input} > {output} """, input=stopover
-        )
-        luigi.LocalTarget(output).move(self.output().path)
+        self.logger.debug("%d DOI", n)
+        luigi.LocalTarget(stopover).move(self.output().path)
 
     def output(self):
         return luigi.LocalTarget(path=self.path(), format=TSV)
@@ -510,6 +522,8 @@ class CrossrefDOIAndISSNList(CrossrefTask):
     A list of Crossref DOIs with their ISSNs.
     """
 
+    memory = "50%"
+
     date = ClosestDateParameter(default=datetime.date.today())
 
     def requires(self):
@@ -522,12 +536,15 @@ class CrossrefDOIAndISSNList(CrossrefTask):
     def run(self):
         _, stopover = tempfile.mkstemp(prefix="siskin-")
         temp = shellout(
-            "zstd -cd -T0 {input} > {output}", input=self.input().get("input").path
+            "zstd -cd -T{threads} {input} > {output}",
+            input=self.input().get("input").path,
+            threads=self.threads(),
         )
         output = shellout(
-            """jq -r '[.doi?, .["rft.issn"][]?, .["rft.eissn"][]?] | @csv' {input} | LC_ALL=C sort -S50% > {output} """,
+            """jq -r '[.doi?, .["rft.issn"][]?, .["rft.eissn"][]?] | @csv' {input} | LC_ALL=C sort -S{size} > {output} """,
             input=temp,
             output=stopover,
+            size=self.sort_buffer(),
         )
         os.remove(temp)
         luigi.LocalTarget(output).move(self.output().path)
@@ -35,13 +35,16 @@ metha-dir = /path/to/dir
 """
 
 import datetime
+import os
 
 import luigi
 from gluish.common import Executable
+from gluish.format import Gzip
 from gluish.intervals import monthly
 from gluish.parameter import ClosestDateParameter
 from gluish.utils import shellout
 
+from siskin.metamorph import flux_to_json
 from siskin.task import DefaultTask
 
 
@@ -91,22 +94,39 @@ class DataciteIntermediateSchema(DataciteTask):
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
+    processes = luigi.IntParameter(
+        default=os.cpu_count() or 1, description="processes", significant=False
+    )
+    metamorph = luigi.BoolParameter(
+        description="convert with siskin.metamorph instead of flux.sh, experimental",
+        significant=False,
+    )
 
     def requires(self):
         return DataciteCombine(date=self.date)
 
     def run(self):
-        mapdir = "file:///%s" % self.assets("maps/")
-        output = shellout(
-            """flux.sh {flux} in={input} MAP_DIR={mapdir} | pigz -c > {output}""",
-            flux=self.assets("datacite/flux.flux"),
-            mapdir=mapdir,
-            input=self.input().path,
-        )
-        luigi.LocalTarget(output).move(self.output().path)
+        if not self.metamorph:
+            mapdir = "file:///%s" % self.assets("maps/")
+            output = shellout(
+                """flux.sh {flux} in={input} MAP_DIR={mapdir} | pigz -c > {output}""",
+                flux=self.assets("datacite/flux.flux"),
+                mapdir=mapdir,
+                input=self.input().path,
+            )
+            luigi.LocalTarget(output).move(self.output().path)
+            return
+        with self.output().open("w") as output:
+            flux_to_json(
+                self.assets("datacite/flux.flux"),
+                self.input().path,
+                output,
+                workers=self.processes,
+                MAP_DIR=self.assets("maps/"),
+            )
 
     def output(self):
-        return luigi.LocalTarget(path=self.path(ext="ldj.gz"))
+        return luigi.LocalTarget(path=self.path(ext="ldj.gz"), format=Gzip)
 
 
 class DataciteExport(DataciteTask):
@@ -92,6 +92,8 @@ class DBLPIntermediateSchema(DBLPTask):
 class DBLPDOIList(DBLPTask):
     """QnD doi list."""
 
+    memory = "50%"
+
     date = ClosestDateParameter(default=datetime.date.today())
 
     def requires(self):
@@ -102,8 +104,9 @@ class DBLPDOIList(DBLPTask):
             """LC_ALL=C grep "doi.org" <(unpigz -c {input}) |
                              LC_ALL=C sed -e 's@<ee>https://doi.org/@@g;s@</ee>@@g' |
                              LC_ALL=C grep ^10 |
-                             LC_ALL=C sort -S50% > {output}""",
+                             LC_ALL=C sort -S{size} > {output}""",
             input=self.input().path,
+            size=self.sort_buffer(),
         )
         luigi.LocalTarget(output).move(self.output().path)
 
@@ -166,6 +166,8 @@ class DOAJWhitelist(DOAJTask):
     Create a list of ok DOAJ ids.
     """
 
+    memory = "60%"
+
     date = ClosestDateParameter(default=datetime.date.today())
 
     def requires(self):
@@ -174,11 +176,12 @@ class DOAJWhitelist(DOAJTask):
     def run(self):
         # Sort by title, then date, the find the newest date and filter the id.
         output = shellout(
-            """ sort -S30% -t $'\t' -k3,3 -k2,2 < {input} |
+            """ sort -S{size} -t $'\t' -k3,3 -k2,2 < {input} |
                           tac |
-                          sort -S30% -t $'\t' -k3,3 -u |
+                          sort -S{size} -t $'\t' -k3,3 -u |
                           cut -f1 | grep -v '^$' > {output} """,
             input=self.input().path,
+            size=self.sort_buffer(share=2),
             preserve_whitespace=True,
         )
         luigi.LocalTarget(output).move(self.output().path)
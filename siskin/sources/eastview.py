@@ -40,10 +40,7 @@ ftp-pattern = *
 """
 
 import datetime
-import json
 import os
-import tempfile
-import zipfile
 
 import luigi
 from gluish.format import TSV, Gzip
@@ -52,7 +49,7 @@ from gluish.utils import shellout
 
 from siskin.benchmark import timed
 from siskin.common import FTPMirror
-from siskin.conversions import eastview_solr_to_intermediate_schema
+from siskin.conversions import eastview_zip_to_intermediate_schema
 from siskin.task import DefaultTask
 
 
@@ -96,38 +93,34 @@ class EastViewPaths(EastViewTask):
 
 class EastViewIntermediateSchema(EastViewTask):
     """
-    Convert to a single (is) file.
+    Convert to a single (is) file. The XML files in the zip are converted in
+    parallel and compressed on the fly.
     """
 
     date = luigi.DateParameter(default=datetime.date.today())
+    processes = luigi.IntParameter(
+        default=os.cpu_count() or 1, description="processes", significant=False
+    )
 
     def requires(self):
         return EastViewPaths(date=self.date)
 
     def run(self):
-        with tempfile.NamedTemporaryFile(delete=False, mode="w") as tf:
-            zname = None
-            with self.input().open(mode="r") as f:
-                for line in f:
-                    line = line.decode("utf-8").strip()
-                    if not line.endswith("xml.zip"):
-                        continue
-                    zname = line
-                    break
-            if zname is None:
-                raise ValueError("expected a file named xml.zip")
-            with zipfile.ZipFile(zname) as zf:
-                for name in zf.namelist():
-                    if not name.endswith(".xml"):
-                        continue
-                    with zf.open(name) as f:
-                        docs = eastview_solr_to_intermediate_schema(f.read())
-                    self.logger.debug("{} {}".format(name, len(docs)))
-                    for doc in docs:
-                        tf.write(json.dumps(doc) + "\n")
-        output = shellout("pigz -c < {tf} > {output}", tf=tf.name)
-        luigi.LocalTarget(output).move(self.output().path)
-        os.remove(tf.name)
+        zname = None
+        with self.input().open(mode="r") as f:
+            for line in f:
+                line = line.decode("utf-8").strip()
+                if not line.endswith("xml.zip"):
+                    continue
+                zname = line
+                break
+        if zname is None:
+            raise ValueError("expected a file named xml.zip")
+        with self.output().open("w") as output:
+            n = eastview_zip_to_intermediate_schema(
+                zname, output, workers=self.processes
+            )
+        self.logger.debug("{}: {} docs".format(zname, n))
 
     def output(self):
         return luigi.LocalTarget(path=self.path(ext="json.gz"), format=Gzip)
@@ -222,6 +222,8 @@ class ElsevierJournalsDOIList(ElsevierJournalsTask):
     A list of Elsevier journals DOIs.
     """
 
+    memory = "50%"
+
     date = luigi.DateParameter(default=datetime.date.today())
 
     def requires(self):
@@ -239,12 +241,17 @@ class ElsevierJournalsDOIList(ElsevierJournalsTask):
             "unpigz -c {input} > {output}", input=self.input().get("input").path
         )
         shellout(
-            """jq -r '.doi?' {input} | grep -o "10.*" 2> /dev/null | LC_ALL=C sort -S50% > {output} """,
+            """jq -r '.doi?' {input} | grep -o "10.*" 2> /dev/null | LC_ALL=C sort -S{size} > {output} """,
             input=output,
             output=stopover,
+            size=self.sort_buffer(),
         )
         os.remove(output)
-        output = shellout("""sort -S50% -u {input} > {output} """, input=stopover)
+        output = shellout(
+            """sort -S{size} -u {input} > {output} """,
+            input=stopover,
+            size=self.sort_buffer(),
+        )
         luigi.LocalTarget(output).move(self.output().path)
 
     def output(self):
@@ -23,12 +23,15 @@
 # @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
 
 import datetime
+import os
 
 import luigi
+from gluish.format import Zstd
 from gluish.intervals import monthly
 from gluish.parameter import ClosestDateParameter
 from gluish.utils import shellout
 
+from siskin.metamorph import flux_to_json
 from siskin.sources.amsl import AMSLFilterConfig
 from siskin.task import DefaultTask
 
@@ -78,28 +81,45 @@ class IJOCHarvest(IJOCTask):
 
 class IJOCIntermediateSchema(IJOCTask):
     """
-    Convert to intermediate schema via metafacture. Custom morphs and flux are kept in assets/87.
+    Convert to intermediate schema via metafacture, or siskin.metamorph with
+    --metamorph. Custom morphs and flux are kept in assets/87.
     Maps are kept in assets/maps
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
+    processes = luigi.IntParameter(
+        default=os.cpu_count() or 1, description="processes", significant=False
+    )
+    metamorph = luigi.BoolParameter(
+        description="convert with siskin.metamorph instead of flux.sh, experimental",
+        significant=False,
+    )
 
     def requires(self):
         return IJOCHarvest(date=self.date)
 
     def run(self):
-        mapdir = "file:///%s" % self.assets("maps/")
-        output = shellout(
-            """
-                          flux.sh {flux} in={input} MAP_DIR={mapdir} | zstd -T0 -c > {output}""",
-            flux=self.assets("87/87.flux"),
-            mapdir=mapdir,
-            input=self.input().path,
-        )
-        luigi.LocalTarget(output).move(self.output().path)
+        if not self.metamorph:
+            mapdir = "file:///%s" % self.assets("maps/")
+            output = shellout(
+                """flux.sh {flux} in={input} MAP_DIR={mapdir} | zstd -T0 -c > {output}""",
+                flux=self.assets("87/87.flux"),
+                mapdir=mapdir,
+                input=self.input().path,
+            )
+            luigi.LocalTarget(output).move(self.output().path)
+            return
+        with self.output().open("w") as output:
+            flux_to_json(
+                self.assets("87/87.flux"),
+                self.input().path,
+                output,
+                workers=self.processes,
+                MAP_DIR=self.assets("maps/"),
+            )
 
     def output(self):
-        return luigi.LocalTarget(path=self.path(ext="ldj.zst"))
+        return luigi.LocalTarget(path=self.path(ext="ldj.zst"), format=Zstd)
 
 
 class IJOCFincSolr(IJOCTask):
@@ -111,6 +111,9 @@ class IOSIntermediateSchema(IOSTask):
     roughly deduplicate.
     """
 
+    memory = "10%"
+    cpu = 4
+
     date = ClosestDateParameter(default=datetime.date.today())
 
     def requires(self):
@@ -124,12 +127,14 @@ class IOSIntermediateSchema(IOSTask):
             """
             unzip -p {input} '*.xml' |
             span-import -i ios |
-            zstd -c -T0 > {output} &&
+            zstd -c -T{threads} > {output} &&
             cat {backlog} >> {output} &&
-            zstdcat -T0 {output} | LC_ALL=C sort -S10% -u | zstd -c -T0 | sponge {output}
+            zstdcat -T{threads} {output} | LC_ALL=C sort -S{size} -u | zstd -c -T{threads} | sponge {output}
             """,
             input=self.input().get("sync").path,
             backlog=self.input().get("backlog").path,
+            threads=self.threads(),
+            size=self.sort_buffer(),
         )
         luigi.LocalTarget(output).move(self.output().path)
 
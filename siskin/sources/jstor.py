@@ -159,6 +159,8 @@ class JstorMembers(JstorTask):
     TODO: This should only be done once per file.
     """
 
+    memory = "1G"
+
     date = ClosestDateParameter(default=datetime.date.today())
 
     def requires(self):
@@ -177,10 +179,11 @@ class JstorMembers(JstorTask):
                          unzip -l {input} |
                          LC_ALL=C grep "xml$" |
                          LC_ALL=C awk '{{print "{input}\t"$4}}' |
-                         LC_ALL=C sort -S 20% >> {output} """,
+                         LC_ALL=C sort -S {size} >> {output} """,
                     preserve_whitespace=True,
                     input=row.path,
                     output=stopover,
+                    size=self.sort_buffer(),
                     ignoremap={1: self.WARN_CORRUPT_ZIP},
                 )
         luigi.LocalTarget(stopover).move(self.output().path)
@@ -279,6 +282,8 @@ class JstorLatestMembers(JstorTask):
     Issue, refs #12669.
     """
 
+    memory = "70%"
+
     date = ClosestDateParameter(default=datetime.date.today())
     version = luigi.IntParameter(default=2, description="#12669")
 
@@ -298,18 +303,20 @@ class JstorLatestMembers(JstorTask):
                 """
                               tac {input} |
                               grep -v metadata |
-                              LC_ALL=C sort -S 35% -u -k2,2 |
-                              LC_ALL=C sort -S 35% -k1,1 > {output}""",
+                              LC_ALL=C sort -S {size} -u -k2,2 |
+                              LC_ALL=C sort -S {size} -k1,1 > {output}""",
                 input=self.input().path,
+                size=self.sort_buffer(share=2),
             )
         if self.version == 2:
             output = shellout(
                 """
                               tac {input} |
                               grep metadata |
-                              LC_ALL=C sort -S 35% -u -k2,2 |
-                              LC_ALL=C sort -S 35% -k1,1 > {output}""",
+                              LC_ALL=C sort -S {size} -u -k2,2 |
+                              LC_ALL=C sort -S {size} -k1,1 > {output}""",
                 input=self.input().path,
+                size=self.sort_buffer(share=2),
             )
 
         luigi.LocalTarget(output).move(self.output().path)
@@ -408,6 +415,8 @@ class JstorAMSLNames(JstorTask):
     Report technical collection id and collection name as TSV from AMSL, refs #14841.
     """
 
+    memory = "1G"
+
     date = luigi.DateParameter(default=datetime.date.today())
 
     def requires(self):
@@ -418,9 +427,10 @@ class JstorAMSLNames(JstorTask):
             """
                           zstd -cd -T0 {input} |
                           jq -r '.[] | select(.sourceID == "55") | [.technicalCollectionID, .megaCollection] | @tsv' | \
-                          LC_ALL=C sort -S 20% -u > {output}
+                          LC_ALL=C sort -S {size} -u > {output}
                           """,
             input=self.input().path,
+            size=self.sort_buffer(),
         )
         luigi.LocalTarget(output).move(self.output().path)
 
@@ -480,6 +490,8 @@ class JstorCollectionNames(JstorTask):
 
     """
 
+    memory = "1G"
+
     date = luigi.DateParameter(default=datetime.date.today())
 
     def run(self):
@@ -490,9 +502,10 @@ class JstorCollectionNames(JstorTask):
             """
             curl -sL https://www.jstor.org/kbart/collections/all-archive-titles | \
             tail -n +2 | cut -f 27 | tr ';' '\n' | \
-            sed -e 's/^[[:space:]]*//' -e 's/[[:space:]]*$//' | sort -S 20% -u > {output}
+            sed -e 's/^[[:space:]]*//' -e 's/[[:space:]]*$//' | sort -S {size} -u > {output}
             """,
             preserve_whitespace=True,
+            size=self.sort_buffer(),
         )
         shellout(
             """
@@ -899,6 +912,8 @@ class JstorDOIList(JstorTask):
     A list of JSTOR DOIs.
     """
 
+    memory = "20%"
+
     date = ClosestDateParameter(default=datetime.date.today())
 
     def requires(self):
@@ -910,9 +925,10 @@ class JstorDOIList(JstorTask):
             """
                           jq -r '.doi' <(zstd -cd -T0 {input}) |
                           grep -v null |
-                          LC_ALL=C sort -S20% -u > {output}
+                          LC_ALL=C sort -S{size} -u > {output}
                           """,
             input=self.input().path,
+            size=self.sort_buffer(),
         )
         luigi.LocalTarget(output).move(self.output().path)
 
@@ -134,14 +134,19 @@ class OCICitingDOIUnique(OCITask):
     List of all unique citing doi.
     """
 
+    memory = "25%"
+    cpu = 2
+
     def requires(self):
         return OCICitingDOI()
 
     def run(self):
         output = shellout(
-            """zstdcat -T0 "{input}" | LC_ALL=C sort -u -S 25% | zstd -c -T0 > {output}
+            """zstdcat -T{threads} "{input}" | LC_ALL=C sort -u -S {size} | zstd -c -T{threads} > {output}
                           """,
             input=self.input().path,
+            threads=self.threads(),
+            size=self.sort_buffer(),
         )
         luigi.LocalTarget(output).move(self.output().path)
 
@@ -156,14 +161,19 @@ class OCICitedDOIUnique(OCITask):
     List of all unique cited doi.
     """
 
+    memory = "25%"
+    cpu = 2
+
     def requires(self):
         return OCICitedDOI()
 
     def run(self):
         output = shellout(
-            """zstdcat -T0 "{input}" | LC_ALL=C sort -u -S 25% | zstd -c -T0 > {output}
+            """zstdcat -T{threads} "{input}" | LC_ALL=C sort -u -S {size} | zstd -c -T{threads} > {output}
                           """,
             input=self.input().path,
+            threads=self.threads(),
+            size=self.sort_buffer(),
         )
         luigi.LocalTarget(output).move(self.output().path)
 
@@ -178,15 +188,20 @@ class OCIDOIUnique(OCITask):
     Unique DOI in OCI.
     """
 
+    memory = "25%"
+    cpu = 2
+
     def requires(self):
         return [OCICitingDOIUnique(), OCICitedDOIUnique()]
 
     def run(self):
         inputs = " ".join([t.path for t in self.input()])
         output = shellout(
-            """zstdcat -T0 {inputs} | LC_ALL=C sort -u -S 25% | zstd -c -T0 > {output}
+            """zstdcat -T{threads} {inputs} | LC_ALL=C sort -u -S {size} | zstd -c -T{threads} > {output}
                               """,
             inputs=inputs,
+            threads=self.threads(),
+            size=self.sort_buffer(),
         )
         luigi.LocalTarget(output).move(self.output().path)
 
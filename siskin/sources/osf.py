@@ -33,23 +33,27 @@ Refs: #20238.
 
 """
 
-# TODO: We could cache date slices to reduce the time/load on the server, e.g. via
-# daily slices: https://api.osf.io/v2/nodes/?filter[date_created]=2023-03-08
-
 import datetime
+import glob
 import json
-import time
+import os
+import shutil
 
 import luigi
-import requests
 
-from requests.exceptions import ChunkedEncodingError, ProxyError, Timeout
-from gluish.format import Zstd
+from gluish.format import TSV, Zstd
 from gluish.intervals import weekly
 from gluish.parameter import ClosestDateParameter
 from gluish.utils import shellout
 
-from siskin.conversions import osf_to_intermediate
+from siskin.conversions import (
+    osf_contributors_link,
+    osf_next_links,
+    osf_to_intermediate,
+    osf_url_cache,
+)
+from siskin.jsonapi import date_windows, harvest_windows, merge_by_id
+from siskin.language import detect_languages
 from siskin.sources.folio import FolioFilterConfigFreeze
 from siskin.task import DefaultTask
 
@@ -64,6 +68,17 @@ class OSFTask(DefaultTask):
     def closest(self):
         return weekly(date=self.date)
 
+    def url_cache(self, max_tries=5):
+        """
+        Return the URL cache for contributors, shared by prefetch and
+        conversion: osf.url-cache or .urlcache in the source directory.
+        """
+        directory = self.config.get(
+            "osf", "url-cache", fallback=os.path.join(self.BASE, self.TAG, ".urlcache")
+        )
+        token = self.config.get("osf", "token", fallback=None)
+        return osf_url_cache(token=token, max_tries=max_tries, directory=directory)
+
 
 class OSFDownload(OSFTask):
     """
@@ -95,17 +110,75 @@ class OSFDownload(OSFTask):
     real    9505m20.024s
     user    245m58.010s
     sys     21m28.353s
+
+    Since 10/2026 the collection is harvested in date_modified windows, with
+    a few windows in parallel. Each window is checkpointed after every page,
+    so a failed run resumes instead of starting over. With --incremental,
+    only the windows since the last snapshot are fetched and merged into it
+    by id, which takes hours instead of days. Preprints deleted upstream
+    stay in an incremental snapshot, so a full harvest runs anyway, if the
+    last one is older than --full-days.
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
     encoding = luigi.Parameter(default="utf-8", significant=False)
+    since = luigi.DateParameter(
+        default=datetime.date(2012, 1, 1),
+        description="start of the first date_modified window",
+        significant=False,
+    )
+    window_days = luigi.IntParameter(
+        default=90, description="size of date windows in days", significant=False
+    )
+    connections = luigi.IntParameter(
+        default=4, description="windows harvested in parallel", significant=False
+    )
+    incremental = luigi.BoolParameter(
+        description="only fetch changes since the last snapshot and merge",
+        significant=False,
+    )
+    full_days = luigi.IntParameter(
+        default=91,
+        description="full harvest, if the last one is older than this",
+        significant=False,
+    )
+    sleep = luigi.IntParameter(
+        default=10, description="seconds between requests", significant=False
+    )
+    max_retries = luigi.IntParameter(
+        default=100, description="retry budget per window", significant=False
+    )
+
+    def previous_snapshot(self):
+        """
+        Return the path to the most recent earlier download, or None.
+        """
+        candidates = sorted(
+            path
+            for path in glob.glob(os.path.join(self.taskdir(), "*.json.zst"))
+            if path < self.output().path
+        )
+        return candidates[-1] if candidates else None
+
+    def full_harvest_marker(self):
+        """
+        Return the path of the file, that records the date of the last full
+        harvest.
+        """
+        return os.path.join(self.taskdir(), "full-harvest")
+
+    def full_harvest_due(self):
+        """
+        Return True, if the last full harvest is older than full_days.
+        """
+        try:
+            with open(self.full_harvest_marker()) as f:
+                last = datetime.date.fromisoformat(f.read().strip())
+        except (OSError, ValueError):
+            return True
+        return (self.date - last).days > self.full_days
 
     def run(self):
-        page = 1
-        max_retries = 400  # a "global" retry budget
-        sleep_after_retry_s = 60
-        sleep_s = 10  # also sleep between request, we fail after about 450 requests, consistently
-        b_newline = "\n".encode(self.encoding)
         # https://developer.osf.io/#tag/Authentication
         token = self.config.get("osf", "token")
         if token:
@@ -114,55 +187,100 @@ class OSFDownload(OSFTask):
             self.logger.warning(
                 "osf: no auth token configured, performance may degrade"
             )
+        start, paths = self.since, []
+        if self.incremental and self.full_harvest_due():
+            self.logger.warning("osf: last full harvest too old, running full harvest")
+        elif self.incremental:
+            previous = self.previous_snapshot()
+            if previous is None:
+                self.logger.warning("osf: no previous snapshot, running full harvest")
+            else:
+                # overlap by one day, records modified during the last harvest
+                mtime = datetime.date.fromtimestamp(os.path.getmtime(previous))
+                start = mtime - datetime.timedelta(days=1)
+                paths.append(previous)
+                self.logger.info(f"osf: updating {previous} from {start}")
+        windows = date_windows(
+            start,
+            datetime.date.today() + datetime.timedelta(days=1),
+            days=self.window_days,
+        )
+        full = not paths
+        # windows and checkpoints are kept until the merge succeeded, a rerun
+        # only fetches what is missing
+        directory = "{}.parts".format(self.output().path)
+        paths.extend(
+            harvest_windows(
+                "https://api.osf.io/v2/preprints/",
+                windows,
+                directory,
+                workers=self.connections,
+                headers={"Authorization": f"Bearer {token}"},
+                sleep=self.sleep,
+                max_retries=self.max_retries,
+            )
+        )
+
+        def opener(path):
+            if path.endswith(".zst"):
+                return luigi.LocalTarget(path, format=Zstd).open()
+            return open(path, "rb")
+
         with self.output().open("w") as output:
-            while True:
-                link = "https://api.osf.io/v2/preprints/?page={}&page[size]=100".format(
-                    page
-                )
-                self.logger.debug("osf: {}".format(link))
-                try:
-                    resp = requests.get(
-                        link,
-                        headers={"Authorization": f"Bearer {token}"},
-                    )
-                    if resp.status_code == 404:
-                        break
-                    if resp.status_code != 200:
-                        if max_retries > 0:
-                            time.sleep(sleep_after_retry_s)
-                            max_retries -= 1
-                            continue
-                        else:
-                            raise RuntimeError(
-                                "osf api failed with {}".format(resp.status_code)
-                            )
-                    self.logger.debug(
-                        "fetched {} from {}: {}".format(
-                            len(resp.text), link, resp.text[:40]
-                        )
-                    )
-                    output.write(resp.text.encode(self.encoding))
-                    output.write(b_newline)
-                    page += 1
-                    time.sleep(sleep_s)
-                except (ChunkedEncodingError, ProxyError, Timeout) as exc:
-                    self.logger.warn(
-                        f"request failed with {exc}, retries left: {max_retries}"
-                    )
-                    if max_retries > 0:
-                        time.sleep(sleep_after_retry_s)
-                        max_retries -= 1
-                        continue
-                    else:
-                        raise RuntimeError(f"osf api failed with {exc}")
+            n = merge_by_id(paths, output, opener=opener)
+        self.logger.info(f"osf: wrote {n} preprints")
+        shutil.rmtree(directory)
+        if full:
+            with open(self.full_harvest_marker(), "w") as f:
+                f.write(self.date.isoformat())
 
     def output(self):
         return luigi.LocalTarget(path=self.path(ext="json.zst"), format=Zstd)
 
 
+class OSFContributorsPrefetch(OSFTask):
+    """
+    Fetch the contributors of all downloaded preprints into the URL cache,
+    with a bounded number of concurrent requests, including further pages of
+    contributors. After this, the conversion does not need to wait for the
+    network. Output contains prefetch counts.
+    """
+
+    date = ClosestDateParameter(default=datetime.date.today())
+    connections = luigi.IntParameter(
+        default=8, description="concurrent requests", significant=False
+    )
+    max_retries = luigi.IntParameter(
+        default=5, description="number of HTTP request retries", significant=False
+    )
+
+    def requires(self):
+        return OSFDownload()
+
+    def run(self):
+        urls = []
+        with self.input().open() as f:
+            for line in f:
+                for doc in json.loads(line)["data"]:
+                    url = osf_contributors_link(doc)
+                    if url:
+                        urls.append(url)
+        self.logger.debug("osf: prefetching contributors for %d preprints", len(urls))
+        cache = self.url_cache(max_tries=self.max_retries)
+        stats = cache.prefetch(urls, workers=self.connections, follow=osf_next_links)
+        self.logger.debug("osf: prefetch done: %s", dict(stats))
+        with self.output().open("w") as output:
+            for key in ("cached", "fetched", "failed"):
+                output.write_tsv(key, str(stats[key]))
+
+    def output(self):
+        return luigi.LocalTarget(path=self.path(), format=TSV)
+
+
 class OSFIntermediateSchema(OSFTask):
     """
-    Convert to intermediate schema (stub).
+    Convert to intermediate schema. Contributors are prefetched, so the
+    conversion itself does not issue HTTP requests.
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
@@ -172,19 +290,45 @@ class OSFIntermediateSchema(OSFTask):
     encoding = luigi.Parameter(default="utf-8", significant=False)
 
     def requires(self):
-        return OSFDownload()
+        return {
+            "file": OSFDownload(),
+            "contributors": OSFContributorsPrefetch(
+                date=self.date, max_retries=self.max_retries
+            ),
+        }
 
     def run(self):
         i = 0
         bNL = "\n".encode(self.encoding)
         token = self.config.get("osf", "token")
+        cache = self.url_cache(max_tries=self.max_retries)
+        # optional, comma separated ISO 639-3 codes to restrict detection to
+        languages = [
+            v.strip()
+            for v in self.config.get("osf", "languages", fallback="").split(",")
+            if v.strip()
+        ]
         with self.output().open("w") as output:
-            with self.input().open() as f:
+            with self.input().get("file").open() as f:
                 for line in f:
                     resp = json.loads(line)
+                    # detect all abstracts of a page in one batch, results
+                    # are cached and picked up by the conversion
+                    detect_languages(
+                        [
+                            (doc.get("attributes") or {}).get("description")
+                            for doc in resp["data"]
+                        ],
+                        languages=languages,
+                    )
                     for doc in resp["data"]:
                         result = osf_to_intermediate(
-                            doc, max_retries=self.max_retries, token=token
+                            doc,
+                            max_retries=self.max_retries,
+                            token=token,
+                            languages=languages,
+                            cache=cache,
+                            offline=True,
                         )
                         if i % 1000 == 0:
                             self.logger.debug("converted {} docs".format(i))
@@ -34,6 +34,7 @@ oai = http://example.endpoint.com/x/y/z
 """
 
 import datetime
+import os
 
 import luigi
 from gluish.common import Executable
@@ -42,6 +43,7 @@ from gluish.intervals import monthly
 from gluish.parameter import ClosestDateParameter
 from gluish.utils import shellout
 
+from siskin.metamorph import flux_to_json
 from siskin.oai import pqdt_harvest
 from siskin.sources.amsl import AMSLFilterConfig
 from siskin.task import DefaultTask
@@ -133,20 +135,37 @@ class PQDTIntermediateSchema(PQDTTask):
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
+    processes = luigi.IntParameter(
+        default=os.cpu_count() or 1, description="processes", significant=False
+    )
+    metamorph = luigi.BoolParameter(
+        description="convert with siskin.metamorph instead of flux.sh, experimental",
+        significant=False,
+    )
 
     def requires(self):
         # return PQDTCombine(date=self.date)
         return PQDTPrepare(date=self.date)
 
     def run(self):
-        mapdir = "file:///%s" % self.assets("maps/")
-        output = shellout(
-            """flux.sh {flux} in={input} MAP_DIR={mapdir} | pigz -c > {output}""",
-            flux=self.assets("34/flux.flux"),
-            mapdir=mapdir,
-            input=self.input().path,
-        )
-        luigi.LocalTarget(output).move(self.output().path)
+        if not self.metamorph:
+            mapdir = "file:///%s" % self.assets("maps/")
+            output = shellout(
+                """flux.sh {flux} in={input} MAP_DIR={mapdir} | pigz -c > {output}""",
+                flux=self.assets("34/flux.flux"),
+                mapdir=mapdir,
+                input=self.input().path,
+            )
+            luigi.LocalTarget(output).move(self.output().path)
+            return
+        with self.output().open("w") as output:
+            flux_to_json(
+                self.assets("34/flux.flux"),
+                self.input().path,
+                output,
+                workers=self.processes,
+                MAP_DIR=self.assets("maps/"),
+            )
 
     def output(self):
         return luigi.LocalTarget(path=self.path(ext="ldj.gz"), format=Gzip)
@@ -36,14 +36,22 @@ home = /path/to/dir
 
 write-url = https://live.abc.technology/w/i/write
 
+[resources]
+
+memory = 80%
+cpu = 16
+
 """
 
 import datetime
+import functools
+import inspect
 import logging
 import os
 import re
 import socket
 import tempfile
+import time
 import traceback
 
 import luigi
@@ -53,10 +61,46 @@ from gluish.utils import shellout
 from siskin import __version__
 from siskin.configuration import Config
 from siskin.mail import send_mail
+from siskin.resources import (
+    check_disk_space,
+    parse_size,
+    same_filesystem,
+    scheduler_resources,
+    sort_buffer,
+    threads,
+)
+from siskin.runtimes import RUNTIMES, input_size, record
 
 config = Config.instance()
 
 
+def prepared(run):
+    """
+    Wrap the run method of a task: check disk space first and record
+    successful runs in the runtime history.
+    """
+    if inspect.isgeneratorfunction(run):
+
+        @functools.wraps(run)
+        def generator(self, *args, **kwargs):
+            self.preflight()
+            started = time.time()
+            yield from run(self, *args, **kwargs)
+            self.record_runtime(time.time() - started)
+
+        return generator
+
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        self.preflight()
+        started = time.time()
+        result = run(self, *args, **kwargs)
+        self.record_runtime(time.time() - started)
+        return result
+
+    return wrapper
+
+
 class DefaultTask(BaseTask):
     """
     Base task for all siskin tasks.
@@ -68,18 +112,35 @@ class DefaultTask(BaseTask):
 
     A command line parameter named --stamp is used to optionally update
     timestamps in AMSL electronic resource management system.
+
+    Tasks may declare the memory (like "4G" or "35%") and number of cores
+    they use, cf. siskin.resources; the scheduler will not overcommit the
+    machine and commands can be sized with sort_buffer and threads.
+
+    Before a task runs, free disk space is checked against the size of
+    earlier outputs. Temporary files from stopover or in scratch are created
+    on the filesystem of the output, so moving them into place is a rename.
+    Runtimes are recorded for scheduling, cf. siskin.runtimes.
     """
 
     BASE = config.get(
         "core", "home", fallback=os.path.join(tempfile.gettempdir(), "siskin-data")
     )
 
+    memory = None
+    cpu = None
+
     stamp = luigi.BoolParameter(
         default=False,
         description="update processing time of source via AMSL API",
         significant=False,
     )
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "run" in cls.__dict__:
+            cls.run = prepared(cls.__dict__["run"])
+
     @classmethod
     def assets(cls, path):
         """
@@ -88,6 +149,84 @@ class DefaultTask(BaseTask):
         """
         return os.path.join(os.path.dirname(__file__), "assets", path)
 
+    @property
+    def resources(self):
+        """
+        Return luigi resources from the declared memory and cpu, for the
+        resources the scheduler knows.
+        """
+        return scheduler_resources(memory=self.memory, cpu=self.cpu)
+
+    def sort_buffer(self, share=1):
+        """
+        Return a sort -S value within the memory of this task, split across
+        share sort processes running at the same time.
+        """
+        return sort_buffer(self.memory, share=share)
+
+    def threads(self):
+        """
+        Return the number of threads for zstd -T and the like.
+        """
+        return threads(self.cpu)
+
+    def output_directory(self):
+        """
+        Return the directory of the first local output or the task directory.
+        """
+        for target in luigi.task.flatten(self.output()):
+            if isinstance(target, luigi.LocalTarget):
+                return os.path.dirname(os.path.abspath(target.path))
+        return self.taskdir()
+
+    def scratch(self):
+        """
+        Return a directory for temporary files on the filesystem of the
+        output: core.tempdir, if it is on the same device, otherwise a .tmp
+        directory next to the output.
+        """
+        directory = self.output_directory()
+        tempdir = config.get("core", "tempdir", fallback=tempfile.gettempdir())
+        if same_filesystem(tempdir, directory):
+            return tempdir
+        scratch = os.path.join(directory, ".tmp")
+        os.makedirs(scratch, exist_ok=True)
+        return scratch
+
+    def stopover(self):
+        """
+        Return a temporary file on the filesystem of the output, so the final
+        move is a rename.
+        """
+        fd, path = tempfile.mkstemp(prefix=".siskin-", dir=self.scratch())
+        os.close(fd)
+        return path
+
+    def preflight(self):
+        """
+        Raise RuntimeError, if there is not enough disk space for outputs
+        as large as earlier ones, keeping [resources] disk-reserve free.
+        """
+        reserve = parse_size(config.get("resources", "disk-reserve", fallback="0"))
+        paths = [
+            target.path
+            for target in luigi.task.flatten(self.output())
+            if isinstance(target, luigi.LocalTarget)
+        ]
+        needed = check_disk_space(paths, reserve=reserve)
+        self.logger.debug("%s: disk space needed: %s", self, needed)
+
+    def record_runtime(self, seconds):
+        """
+        Append the runtime of this task to the history, never fails.
+        """
+        try:
+            os.makedirs(self.BASE, exist_ok=True)
+            path = os.path.join(self.BASE, RUNTIMES)
+            record(path, self.task_family, seconds, input_size(self))
+        except Exception as err:
+            self.logger.warning("could not record runtime: %s", err)
+
     @property
     def config(self):
         """
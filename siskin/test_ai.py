@@ -0,0 +1,158 @@
+import collections
+import datetime
+import json
+import os
+
+import pytest
+import zstandard
+
+from siskin.task import DefaultTask
+from siskin.workflows.ai import (
+    AICollectionsAndSerialNumbers,
+    AIFusedPipeline,
+    AILicensing,
+    AIRedact,
+    AIShardLicensing,
+    AIShardRedact,
+    AISolrIndex,
+    AISolrIndexDelta,
+    ai_sources,
+)
+
+DATE = datetime.date(2026, 10, 8)
+
+
+@pytest.fixture
+def base(tmpdir, monkeypatch):
+    monkeypatch.setattr(DefaultTask, "BASE", str(tmpdir))
+    return tmpdir
+
+
+def test_fused_pipeline_feeds_redact_and_licensing(base):
+    fused = AIFusedPipeline(date=DATE, drop=True)
+    assert AIRedact(date=DATE).requires() == fused
+    assert AILicensing(date=DATE, drop=True).requires() == fused
+    assert sorted(fused.output()) == ["licensing", "redact"]
+    # redaction does not depend on licensing, it runs for one variant only
+    reduced = AILicensing(date=DATE, drop=True, style="reduced").requires()
+    assert sorted(reduced.output()) == ["licensing"]
+
+    for name, target in fused.output().items():
+        os.makedirs(os.path.dirname(target.path), exist_ok=True)
+        with open(target.path, "wb") as f:
+            f.write(name.encode("utf-8"))
+    for task, name in [
+        (AIRedact(date=DATE), "redact"),
+        (AILicensing(date=DATE, drop=True), "licensing"),
+    ]:
+        task.run()
+        assert os.path.samefile(task.output().path, fused.output()[name].path)
+
+
+def test_sharded_redact(base):
+    task = AIRedact(date=DATE, sharded=True)
+    assert all(isinstance(shard, AIShardRedact) for shard in task.requires().values())
+    for name, target in task.input().items():
+        os.makedirs(os.path.dirname(target.path), exist_ok=True)
+        with open(target.path, "wb") as f:
+            f.write(zstandard.ZstdCompressor().compress(name.encode("utf-8") + b"\n"))
+    task.run()
+    with task.output().open() as f:
+        assert f.read().decode("utf-8").splitlines() == list(ai_sources(DATE))
+
+
+@pytest.mark.parametrize("shard", [AIShardLicensing, AIShardRedact])
+def test_shard_reused_across_dates(base, shard):
+    tasks = [
+        shard(date=DATE - datetime.timedelta(days=i), source="doaj") for i in (1, 0)
+    ]
+    assert "pending" in tasks[0].output().path
+    for i, task in enumerate(tasks):
+        for target in task.input().values():
+            if os.path.exists(target.path):
+                continue
+            os.makedirs(os.path.dirname(target.path), exist_ok=True)
+            with open(target.path, "w") as f:
+                f.write("unchanged\n")
+            os.utime(target.path, ns=(i, i))
+    first, second = [task.output().path for task in tasks]
+    assert tasks[0].input()["kbart"].path != tasks[1].input()["kbart"].path
+    assert first == second
+    assert "pending" not in first
+
+    changed = shard(date=DATE + datetime.timedelta(days=1), source="doaj")
+    for name, target in changed.input().items():
+        os.makedirs(os.path.dirname(target.path), exist_ok=True)
+        if not os.path.exists(target.path):
+            with open(target.path, "w") as f:
+                f.write("changed\n" if name == "kbart" else "unchanged\n")
+    assert changed.output().path != first
+
+
+def test_collections_and_serial_numbers(base):
+    task = AICollectionsAndSerialNumbers(date=DATE)
+    docs = [
+        {"rft.issn": ["1234-5678"], "finc.mega_collection": ["A B"]},
+        {
+            "rft.issn": ["1234-5678"],
+            "rft.eissn": ["8765-4321 "],
+            "finc.mega_collection": ["A B", "C"],
+        },
+        {"finc.mega_collection": ["No ISSN"]},
+    ]
+    data = "".join(json.dumps(doc) + "\n" for doc in docs).encode("utf-8")
+    path = task.input().path
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(zstandard.ZstdCompressor().compress(data))
+    task.run()
+    prefix = "<http://amsl.technology/discovery/Metadatenkollektion/"
+    predicate = "> <http://amsl.technology/coveredMediumID> <urn:ISSN:"
+    with task.output().open() as f:
+        assert f.read().splitlines() == [
+            prefix + "A%20B" + predicate + "1234-5678> .",
+            prefix + "C" + predicate + "1234-5678> .",
+            prefix + "A%20B" + predicate + "8765-4321> .",
+            prefix + "C" + predicate + "8765-4321> .",
+        ]
+
+
+def test_solr_index_stats(base, monkeypatch):
+    def index_file(path, solr, checkpoint=None, **kwargs):
+        open(checkpoint, "w").close()
+        return collections.Counter(docs=3, batches=1)
+
+    monkeypatch.setattr("siskin.workflows.ai.index_file", index_file)
+    task = AISolrIndex(date=DATE, solr="http://localhost:8983/solr/ai")
+    os.makedirs(task.taskdir())
+    task.run()
+    with open(task.output().path) as f:
+        assert sorted(f.read().splitlines()) == ["batches\t1", "docs\t3"]
+
+
+def test_solr_index_delta_stats(base, monkeypatch):
+    def export_delta(path, old, new, output, deletes, **kwargs):
+        for name in (output, deletes):
+            open(name, "w").close()
+        return collections.Counter(updates=2, deletes=0)
+
+    def index_file(path, solr, checkpoint=None, **kwargs):
+        open(checkpoint, "w").close()
+        return collections.Counter(docs=2)
+
+    monkeypatch.setattr("siskin.workflows.ai.export_delta", export_delta)
+    monkeypatch.setattr("siskin.workflows.ai.index_file", index_file)
+    monkeypatch.setattr("siskin.workflows.ai.commit", lambda sess, solr: None)
+    task = AISolrIndexDelta(date=DATE, solr="http://localhost:8983/solr/ai")
+    fingerprints = task.input()["fingerprints"].path
+    os.makedirs(os.path.dirname(fingerprints))
+    open(fingerprints, "w").close()
+    task.run()
+    with open(task.output().path) as f:
+        assert f.read().splitlines() == [
+            "deleted\t0",
+            "deletes\t0",
+            "docs\t2",
+            "updates\t2",
+        ]
+    assert os.path.exists(task.indexed_fingerprints())
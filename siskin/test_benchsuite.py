@@ -0,0 +1,50 @@
+import pytest
+
+from siskin import benchsuite, language
+
+
+def test_run_benchmarks():
+    names = ["olc", "imslp", "eastview", "openurl"]
+    results = benchsuite.run_benchmarks(names, min_time=0.001, repeat=1)
+    assert list(results["benchmarks"]) == names
+    assert results["benchmarks"]["eastview"]["records"] == 2
+    for result in results["benchmarks"].values():
+        assert result["us_per_record"] > 0
+        assert result["relative"] > 0
+    with pytest.raises(ValueError):
+        benchsuite.run_benchmarks(["xxx"])
+
+
+def test_osf_measures_language_detection(tmpdir, monkeypatch):
+    calls = []
+    detector = language.get_language_detector
+    monkeypatch.setattr(
+        language,
+        "get_language_detector",
+        lambda languages=None: calls.append(languages) or detector(languages),
+    )
+    docs, func = benchsuite.setup_osf(str(tmpdir))
+    for _ in range(2):
+        func(docs[0])
+    assert len(calls) == 2
+
+
+def test_compare():
+    baseline = {"benchmarks": {"a": {"relative": 1.0}, "b": {"relative": 2.0}}}
+    results = {
+        "benchmarks": {
+            "a": {"relative": 1.2},
+            "b": {"relative": 2.6},
+            "c": {"relative": 9.0},
+        }
+    }
+    assert benchsuite.compare(results, baseline) == [("b", 2.0, 2.6)]
+    assert benchsuite.compare(results, baseline, threshold=0.1) == [
+        ("a", 1.0, 1.2),
+        ("b", 2.0, 2.6),
+    ]
+
+
+def test_baseline_covers_all_benchmarks():
+    baseline = benchsuite.load_baseline()
+    assert set(baseline["benchmarks"]) == set(benchsuite.BENCHMARKS)
@@ -1,9 +1,27 @@
+import http.server
+import io
 import json
+import os
+import tarfile
+import threading
+import zipfile
 from unittest.mock import patch
 
 import pymarc
+import pytest
 
-from siskin.conversions import de_listify, imslp_xml_to_marc, osf_to_intermediate
+from siskin.conversions import (
+    de_listify,
+    eastview_zip_to_intermediate_schema,
+    imslp_tarball_to_marc,
+    imslp_xml_to_marc,
+    osf_contributors_link,
+    osf_next_links,
+    osf_to_intermediate,
+)
+from siskin.utils import URLCache
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "fixtures")
 
 
 def test_imslp_xml_to_marc():
@@ -298,3 +316,132 @@ def test_osf_to_intermediate():
     with patch("siskin.conversions.URLCache.get", return_value=contributor_fixture):
         for v, expected in cases:
             assert osf_to_intermediate(v) == expected
+
+
+def test_osf_prefetch_and_offline_conversion(tmpdir):
+    """
+    Prefetch contributors from a local stub server, then convert offline.
+    """
+    with open(os.path.join(FIXTURES, "osf/contributors.json")) as f:
+        pages = json.load(f)
+    requested = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            if self.path not in pages:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = json.dumps(pages[self.path]).replace("https://api.osf.io", base)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body.encode("utf-8"))
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    base = "http://127.0.0.1:%d" % server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        with open(os.path.join(FIXTURES, "osf/preprints.ldj")) as f:
+            content = f.read().replace("https://api.osf.io", base)
+        docs = [
+            doc for line in content.splitlines() for doc in json.loads(line)["data"]
+        ]
+        cache = URLCache(directory=str(tmpdir), max_tries=1)
+        urls = [osf_contributors_link(doc) for doc in docs]
+        stats = cache.prefetch(urls, workers=4, follow=osf_next_links)
+        assert stats["fetched"] == 26  # 24 preprints, 2 with a second page
+        assert stats["failed"] == 0
+        assert cache.prefetch(urls, workers=4, follow=osf_next_links)["cached"] == 26
+
+        # offline conversion must not issue any request
+        before = len(requested)
+        results = [osf_to_intermediate(doc, cache=cache, offline=True) for doc in docs]
+        assert len(requested) == before
+        assert len(results[3]["authors"]) == 4
+        assert results[3]["authors"][0] == {
+            "rft.aufirst": "David",
+            "rft.aulast": "Novak",
+        }
+        assert len(results[0]["authors"]) == 1
+
+        # not prefetched, offline: no authors and no request
+        doc = dict(docs[0], relationships=dict(docs[0]["relationships"]))
+        doc["relationships"]["contributors"] = {
+            "links": {"related": {"href": base + "/v2/preprints/missing/contributors/"}}
+        }
+        assert osf_to_intermediate(doc, cache=cache, offline=True)["authors"] == []
+        assert len(requested) == before
+    finally:
+        server.shutdown()
+
+
+def make_imslp_tarball(path, copies=1):
+    """
+    Write a tarball with copies of the IMSLP fixtures, each with a distinct
+    identifier, return the list of identifiers in tarball order.
+    """
+    identifiers = []
+    with tarfile.open(path, "w:gz") as tar:
+        for i in range(copies):
+            for name in sorted(os.listdir(os.path.join(FIXTURES, "imslp"))):
+                with open(os.path.join(FIXTURES, "imslp", name), "rb") as f:
+                    identifier = "%s%05d" % (name[:-4], i)
+                    data = f.read().replace(
+                        name[:-4].encode("utf-8"), identifier.encode("utf-8")
+                    )
+                info = tarfile.TarInfo("imslp/%s.xml" % identifier)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+                if name != "notitle.xml":
+                    identifiers.append(identifier)
+    return identifiers
+
+
+def test_imslp_tarball_to_marc(tmpdir):
+    tarball = str(tmpdir.join("imslp.tar.gz"))
+    identifiers = make_imslp_tarball(tarball, copies=50)
+
+    serial = imslp_tarball_to_marc(
+        tarball, str(tmpdir.join("1.mrc")), max_failures=50, workers=1
+    )
+    parallel = imslp_tarball_to_marc(
+        tarball, str(tmpdir.join("2.mrc")), max_failures=50, workers=2, batch_size=7
+    )
+    with open(serial, "rb") as f:
+        records = list(pymarc.MARCReader(f))
+        f.seek(0)
+        blob = f.read()
+    assert [record["980"]["a"] for record in records] == identifiers
+    with open(parallel, "rb") as f:
+        assert f.read() == blob
+
+    with pytest.raises(RuntimeError):
+        imslp_tarball_to_marc(
+            tarball, str(tmpdir.join("3.mrc")), max_failures=49, workers=1
+        )
+
+
+def test_eastview_zip_to_intermediate_schema(tmpdir):
+    zname = str(tmpdir.join("xml.zip"))
+    with open(os.path.join(FIXTURES, "eastview/udbedu.xml"), "rb") as f:
+        blob = f.read()
+    with zipfile.ZipFile(zname, "w") as zf:
+        for i in range(5):
+            zf.writestr("xml/%d.xml" % i, blob.replace(b"UDB-EDU-1", b"UDB-EDU-%d" % i))
+        zf.writestr("xml/README", b"not xml")
+
+    serial, parallel = io.BytesIO(), io.BytesIO()
+    assert eastview_zip_to_intermediate_schema(zname, serial, workers=1) == 10
+    assert eastview_zip_to_intermediate_schema(zname, parallel, workers=2) == 10
+    assert serial.getvalue() == parallel.getvalue()
+    docs = [json.loads(line) for line in serial.getvalue().splitlines()]
+    assert docs[0]["finc.record_id"] == "UDB-EDU-000001"
+    assert docs[-1]["finc.record_id"] == "UDB-EDU-400002"
+    assert docs[1]["authors"] == [{"rft.au": "Сидоров П.П."}]
+    assert "rft.pages" not in docs[1]
@@ -0,0 +1,64 @@
+import gzip
+import io
+import json
+import random
+
+import pytest
+
+from siskin.doiscan import extract_dois, field_pattern, iter_chunks, normalize
+
+
+def test_normalize():
+    assert normalize(b"10.1000/ABC") == b"10.1000/abc"
+    assert normalize(b"https://doi.org/10.1000/x ") == b"10.1000/x"
+    assert normalize(b"10.1000\\/a\\u00dF") == "10.1000/aß".encode("utf-8")
+    assert normalize(b"10.1000/\\nx") is None
+    assert normalize(b"10.1000/\\x") is None
+    assert normalize(b"null") is None
+    assert normalize(b"") is None
+
+
+def test_field_pattern():
+    pattern = field_pattern("doi")
+    line = b'{"x.doi": "1", "doi" : "10.1/a\\"b", "DOI": "10.2/c"}'
+    assert pattern.findall(line) == [b'10.1/a\\"b']
+    assert field_pattern("DOI").findall(line) == [b"10.2/c"]
+
+
+def test_iter_chunks():
+    data = b"".join(b"line %d\n" % i for i in range(100)) + b"no newline"
+    chunks = list(iter_chunks(io.BytesIO(data), size=7))
+    assert b"".join(chunks) == data
+    assert all(chunk.endswith(b"\n") for chunk in chunks[:-1])
+    assert list(iter_chunks(io.BytesIO(b""))) == []
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("compress", [False, True])
+def test_extract_dois(tmpdir, workers, compress):
+    rnd = random.Random(42)
+    lines, expected = [], set()
+    for i in range(5000):
+        doc = {"finc.record_id": "ai-%d" % i, "rft.atitle": 'a "title"'}
+        if rnd.random() < 0.9:
+            doi = "10.%d/%s" % (
+                rnd.randint(1000, 1100),
+                rnd.choice(["A/b", "a/B", "c<d>"]),
+            )
+            doc["doi"] = rnd.choice(["", "https://doi.org/"]) + doi
+            expected.add(doi.lower())
+        lines.append(json.dumps(doc, ensure_ascii=rnd.random() < 0.5))
+    data = ("\n".join(lines) + "\n").encode("utf-8")
+    path = str(tmpdir.join("is.ldj"))
+    if compress:
+        path += ".gz"
+        data = gzip.compress(data)
+    with open(path, "wb") as f:
+        f.write(data)
+
+    output = str(tmpdir.join("dois.tsv"))
+    n = extract_dois(path, output, workers=workers, chunk_size=4096)
+    with open(output) as f:
+        dois = f.read().splitlines()
+    assert n > len(dois) == len(expected)
+    assert dois == sorted(expected)
@@ -0,0 +1,95 @@
+import collections
+import json
+import os
+
+import pytest
+
+from siskin.fixrules import compile_rules, load_rules
+
+
+def test_compile_rules_unknown_op():
+    with pytest.raises(ValueError):
+        compile_rules([{"op": "xxx"}])
+    with pytest.raises(ValueError):
+        compile_rules([{"field": "title"}])
+
+
+def test_passthrough_without_parse():
+    stats = collections.Counter()
+    fix = compile_rules(
+        [{"op": "truncate", "fields": ["title"], "length": 5}], stats=stats
+    )
+    line = b'{"id": "1",   "author": "1234567890"}\n'
+    assert fix(line) == line.rstrip(b"\n")
+    assert stats["parsed"] == 0
+    assert stats["passthrough"] == 1
+
+
+def test_basefix_rules():
+    path = os.path.join(os.path.dirname(__file__), "assets/base/fixrules.json")
+    fix = compile_rules(load_rules(path))
+    doc = {
+        "id": "YWJj==",
+        "title": "x" * 5000,
+        "author": ["", "y" * 4001],
+        "author_facet": ["z"],
+        "publishDate": "ca. 1999/2000",
+        "institution": ["DE-15-FID"],
+    }
+    result = json.loads(fix(json.dumps(doc).encode("utf-8")))
+    assert result["id"] == "YWJj"
+    assert result["recordtype"] == "default"
+    assert len(result["title"]) == 4000
+    assert result["author"] == ["", "y" * 4000]
+    assert result["author_facet"] == ["z"]
+    assert result["publishDate"] == "1999"
+    assert result["institution"] == ["FID-MEDIEN-DE-15"]
+
+
+def test_unchanged_record_keeps_raw_bytes():
+    fix = compile_rules([{"op": "set", "field": "recordtype", "value": "default"}])
+    line = '{"recordtype":"default","title":"Ä"}'.encode("utf-8")
+    assert fix(line) == line
+    line = '{"title":"Ä","recordtype":"x"}'.encode("utf-8")
+    assert json.loads(fix(line)) == {"title": "Ä", "recordtype": "default"}
+
+
+def test_drop():
+    stats = collections.Counter()
+    fix = compile_rules(
+        [
+            {"op": "drop", "field": "title", "missing": True},
+            {"op": "drop", "field": "format", "pattern": "^Audio"},
+        ],
+        stats=stats,
+    )
+    assert fix(b'{"id": "1"}') is None
+    assert fix(b'{"title": "a", "format": ["Book", "Audio CD"]}') is None
+    assert (
+        fix(b'{"title": "a", "format": "Book"}') == b'{"title": "a", "format": "Book"}'
+    )
+    assert stats["dropped"] == 2
+
+
+def test_drop_missing_without_parse():
+    stats = collections.Counter()
+    fix = compile_rules(
+        [{"op": "drop", "field": "title", "missing": True}], stats=stats
+    )
+    assert fix(b'{"title" : "a"}') == b'{"title" : "a"}'
+    assert fix(b'{"id": "title"}') is None
+    assert fix(b'{"id": "a \\"title\\": b"}') is None
+    assert stats["parsed"] == 0
+    assert stats["passthrough"] == 1
+    assert stats["dropped"] == 2
+
+
+def test_derive_target():
+    fix = compile_rules(
+        [{"op": "derive", "field": "date", "pattern": r"(\d{4})-", "target": "year"}]
+    )
+    assert json.loads(fix(b'{"date": "2020-01-01"}')) == {
+        "date": "2020-01-01",
+        "year": "2020",
+    }
+    assert fix(b'{"date": "unknown"}') == b'{"date": "unknown"}'
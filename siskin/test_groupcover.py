@@ -0,0 +1,85 @@
+import csv
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from siskin.groupcover import groupcover, rewrite_group
+
+PREFS = ["85", "49", "28"]
+
+
+def test_rewrite_group():
+    rows = [
+        ["a", "49", "10.1/x", "DE-15", "DE-14"],
+        ["b", "28", "10.1/X", "DE-15"],
+        ["c", "85", "10.1/x", "DE-14", "DE-Ch1"],
+        ["d", "999", "10.1/x", "DE-Ch1"],
+    ]
+    assert rewrite_group(rows, PREFS) == [
+        ["a", "49", "10.1/x", "DE-14"],
+        ["c", "85", "10.1/x", "DE-Ch1"],
+        ["d", "999", "10.1/x"],
+    ]
+    assert rewrite_group(rows[:1], PREFS) == []
+    # same source, nothing to decide
+    assert rewrite_group([["a", "49", "x", "L"], ["b", "49", "x", "L"]], PREFS) == []
+
+
+def sorted_groupcover(rows, prefs):
+    """
+    The original approach: sort by lowercased DOI, group adjacent rows.
+    """
+    changed, group = [], []
+    for row in sorted(rows, key=lambda row: row[2].lower()):
+        if group and group[0][2].lower() != row[2].lower():
+            changed.extend(rewrite_group(group, prefs))
+            group = []
+        group.append(row)
+    return changed + rewrite_group(group, prefs)
+
+
+def random_rows(n=2000):
+    rnd = random.Random(42)
+    rows = []
+    for i in range(n):
+        doi = "10.%d/%s" % (rnd.randint(0, 300), rnd.choice("aAbB"))
+        labels = rnd.sample(["DE-15", "DE-14", "DE-Ch1", "DE-105"], rnd.randint(0, 3))
+        rows.append(["id-%d" % i, rnd.choice(PREFS + ["1"]), doi] + labels)
+    return rows
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_groupcover(tmpdir, workers):
+    rows = random_rows() + [["no-doi", "28", "", "DE-15"]]
+    path, output = str(tmpdir.join("local.csv")), str(tmpdir.join("changes.csv"))
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+    n = groupcover(path, output, PREFS, buckets=7, workers=workers)
+    with open(output, newline="") as f:
+        changes = list(csv.reader(f))
+    assert n == len(changes) > 0
+    assert sorted(changes) == sorted(sorted_groupcover(rows[:-1], PREFS))
+    assert tmpdir.listdir(lambda p: p.basename.startswith(".groupcover")) == []
+
+
+@pytest.mark.skipif(
+    shutil.which("groupcover") is None, reason="groupcover not installed"
+)
+def test_groupcover_tool_equivalence(tmpdir):
+    rows = random_rows()
+    path, output = str(tmpdir.join("local.csv")), str(tmpdir.join("changes.csv"))
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+    expected = subprocess.check_output(
+        "LC_ALL=C sort --ignore-case -t, -k3 {} | groupcover -lower -prefs '{}'".format(
+            path, " ".join(PREFS)
+        ),
+        shell=True,
+    )
+    groupcover(path, output, PREFS, buckets=7, workers=1)
+    with open(output, newline="") as f:
+        changes = list(csv.reader(f))
+    assert sorted(changes) == sorted(csv.reader(expected.decode("utf-8").splitlines()))
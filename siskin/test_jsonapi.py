@@ -0,0 +1,155 @@
+import datetime
+import http.server
+import io
+import json
+import os
+import threading
+import urllib.parse
+
+import pytest
+
+from siskin.jsonapi import (
+    date_windows,
+    harvest_pages,
+    harvest_windows,
+    iter_records,
+    merge_by_id,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "fixtures")
+
+
+@pytest.fixture
+def api():
+    """
+    A local paginated API over the OSF fixture, supports date_modified
+    filters and page[size]. Set api.fail to make requests fail.
+    """
+    with open(os.path.join(FIXTURES, "osf/preprints.ldj")) as f:
+        docs = [doc for line in f for doc in json.loads(line)["data"]]
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            state.requested.append(self.path)
+            if state.fail and len(state.requested) > state.fail:
+                self.send_response(503)
+                self.end_headers()
+                return
+            query = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(self.path).query))
+            gte = query.get("filter[date_modified][gte]", "")
+            lt = query.get("filter[date_modified][lt]", "9999")
+            size, page = int(query.get("page[size]", 10)), int(query.get("page", 1))
+            selected = [
+                doc
+                for doc in state.docs
+                if gte <= doc["attributes"]["date_modified"] < lt
+            ]
+            if (page - 1) * size > len(selected):
+                self.send_response(404)
+                self.end_headers()
+                return
+            query["page"] = page + 1
+            body = {
+                "data": selected[(page - 1) * size : page * size],
+                "links": {
+                    "next": (
+                        "{}/?{}".format(state.base, urllib.parse.urlencode(query))
+                        if page * size < len(selected)
+                        else None
+                    )
+                },
+            }
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps(body).encode("utf-8"))
+
+        def log_message(self, *args):
+            pass
+
+    class State:
+        pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    state = State()
+    state.docs, state.requested, state.fail = docs, [], 0
+    state.base = "http://127.0.0.1:%d" % server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield state
+    server.shutdown()
+
+
+def read_ids(path):
+    with open(path, "rb") as f:
+        return [doc["id"] for doc in iter_records(f)]
+
+
+def test_date_windows():
+    windows = date_windows(datetime.date(2024, 1, 1), datetime.date(2024, 3, 1), 30)
+    assert windows == [
+        (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31)),
+        (datetime.date(2024, 1, 31), datetime.date(2024, 3, 1)),
+    ]
+
+
+def test_harvest_windows(api, tmpdir):
+    windows = date_windows(datetime.date(2024, 1, 1), datetime.date(2025, 1, 1), 90)
+    paths = harvest_windows(
+        api.base + "/", windows, str(tmpdir), workers=3, page_size=2, retry_sleep=0
+    )
+    assert len(paths) == 5
+    ids = [id for path in paths for id in read_ids(path)]
+    assert sorted(ids) == sorted(doc["id"] for doc in api.docs)
+
+    # finished windows are not fetched again
+    requested = len(api.requested)
+    harvest_windows(api.base + "/", windows, str(tmpdir), workers=3, page_size=2)
+    assert len(api.requested) == requested
+
+    # other bounds, the files of the old layout are removed
+    windows = date_windows(datetime.date(2024, 1, 1), datetime.date(2025, 1, 1), 180)
+    paths = harvest_windows(api.base + "/", windows, str(tmpdir), page_size=2)
+    assert sorted(tmpdir.listdir(fil="*.ldj")) == sorted(paths)
+    assert len(tmpdir.listdir(fil="*.checkpoint")) == len(paths) == 3
+
+
+def test_harvest_pages_resume(api, tmpdir):
+    output = str(tmpdir.join("pages.ldj"))
+    url = api.base + "/?page[size]=5"
+    api.fail = 3
+    with pytest.raises(RuntimeError):
+        harvest_pages(url, output, max_retries=0, retry_sleep=0)
+    assert len(read_ids(output)) == 15
+    # simulate a partial write after the last checkpoint
+    with open(output, "ab") as f:
+        f.write(b'{"data": [{"id": "x00')
+
+    api.fail, api.requested = 0, []
+    assert harvest_pages(url, output, retry_sleep=0) == 2
+    assert "page=4" in api.requested[0]
+    assert read_ids(output) == [doc["id"] for doc in api.docs]
+
+
+def test_merge_by_id(api, tmpdir):
+    snapshot = str(tmpdir.join("snapshot.ldj"))
+    harvest_pages(api.base + "/?page[size]=10", snapshot)
+
+    # update one record, add one record, harvest changes only
+    doc = dict(api.docs[5], attributes=dict(api.docs[5]["attributes"]))
+    doc["attributes"].update(title="Updated", date_modified="2025-01-02T00:00:00")
+    new = dict(doc, id="x0024")
+    api.docs.extend([doc, new])
+    paths = harvest_windows(
+        api.base + "/",
+        date_windows(datetime.date(2025, 1, 1), datetime.date(2025, 2, 1)),
+        str(tmpdir.join("parts")),
+    )
+    buf = io.BytesIO()
+    assert merge_by_id([snapshot] + paths, buf, page_size=7) == 25
+    buf.seek(0)
+    merged = list(iter_records(buf))
+    assert len(merged) == 25
+    assert len(set(doc["id"] for doc in merged)) == 25
+    titles = {doc["id"]: doc["attributes"]["title"] for doc in merged}
+    assert titles["x0005"] == "Updated"
+    assert titles["x0024"] == "Updated"
@@ -0,0 +1,88 @@
+import gzip
+import json
+import os
+
+import pytest
+import zstandard
+
+from siskin.labelsplit import BufferedSplitter, safe_filename, split_labels
+
+
+def write_records(path, n=500):
+    labels = ["DE-15", "DE-14", "DE-Ch1", "FID/X"]
+    with gzip.open(path, "wt") as f:
+        for i in range(n):
+            doc = {"finc.id": "ai-%d" % i, "x.labels": labels[: i % 5]}
+            if i % 7:
+                doc["doi"] = "10.1/%d" % i
+            f.write(json.dumps(doc) + "\n")
+        f.write(json.dumps({"finc.id": "unlabeled"}) + "\n")
+
+
+def test_split_labels(tmpdir):
+    path = str(tmpdir.join("ai.ldj.gz"))
+    write_records(path)
+    directory = str(tmpdir.mkdir("doi"))
+    parts = split_labels(path, directory, bufsize=100)
+    assert sorted(parts) == ["DE-14", "DE-15", "DE-Ch1", "FID/X"]
+    with open(parts["DE-15"][0]) as f:
+        dois = f.read().splitlines()
+    expected = ["10.1/%d" % i for i in range(500) if i % 5 >= 1 and i % 7]
+    assert dois == expected
+    assert parts["DE-15"][1] == len(expected)
+    assert os.path.basename(parts["DE-15"][0]) == "DE-15.tsv"
+    assert os.path.basename(parts["FID/X"][0]).startswith("FID_X-")
+
+
+def test_split_labels_unique_files(tmpdir):
+    path = str(tmpdir.join("ai.ldj.gz"))
+    with gzip.open(path, "wt") as f:
+        for i, label in enumerate(["FID/X", "FID_X", "FID:X"] * 3):
+            doc = {"finc.id": "ai-%d" % i, "x.labels": [label], "doi": "10.1/%d" % i}
+            f.write(json.dumps(doc) + "\n")
+    parts = split_labels(path, str(tmpdir.mkdir("doi")), bufsize=1)
+    assert len({p for p, _ in parts.values()}) == 3
+    for offset, label in enumerate(["FID/X", "FID_X", "FID:X"]):
+        with open(parts[label][0]) as f:
+            assert f.read().split() == ["10.1/%d" % i for i in range(offset, 9, 3)]
+    assert safe_filename("FID/X") != safe_filename("FID:X")
+
+
+def test_split_labels_records(tmpdir):
+    path = str(tmpdir.join("ai.ldj.gz"))
+    write_records(path)
+    directory = str(tmpdir.mkdir("record"))
+    parts = split_labels(path, directory, kind="record", ext="gz", bufsize=1000)
+    with gzip.open(parts["FID/X"][0], "rt") as f:
+        ids = [json.loads(line)["finc.id"] for line in f]
+    assert ids == ["ai-%d" % i for i in range(500) if i % 5 == 4]
+
+
+def test_split_labels_records_zstd(tmpdir):
+    path = str(tmpdir.join("ai.ldj.gz"))
+    write_records(path)
+    directory = str(tmpdir.mkdir("record"))
+    parts = split_labels(path, directory, kind="record", ext="zst", bufsize=1000)
+    with open(parts["DE-Ch1"][0], "rb") as f:
+        data = zstandard.ZstdDecompressor().stream_reader(f).read()
+    ids = [json.loads(line)["finc.id"] for line in data.splitlines()]
+    assert ids == ["ai-%d" % i for i in range(500) if i % 5 >= 3]
+
+
+def test_buffered_splitter(tmpdir):
+    def path_func(key):
+        return str(tmpdir.join(key))
+
+    with BufferedSplitter(path_func, bufsize=1 << 20, max_buffered=10) as splitter:
+        for i in range(20):
+            splitter.write("ab"[i % 2], b"%d\n" % i)
+            assert splitter.buffered <= 10 + 3
+    with open(path_func("a"), "rb") as f:
+        assert f.read().split() == [b"%d" % i for i in range(0, 20, 2)]
+
+
+def test_buffered_splitter_collision(tmpdir):
+    splitter = BufferedSplitter(lambda key: str(tmpdir.join(key.lower())), bufsize=1)
+    splitter.write("A", b"a\n")
+    with pytest.raises(ValueError):
+        splitter.write("a", b"b\n")
@@ -0,0 +1,27 @@
+from siskin import language
+
+
+def test_detect_languages():
+    languages = ("eng", "deu", "fra")
+    texts = [
+        "This is a short English sentence about libraries and books.",
+        "",
+        None,
+        "Das ist ein kurzer deutscher Satz über Bibliotheken und Bücher.",
+        "This is a short English sentence about libraries and books.",
+    ]
+    result = language.detect_languages(texts, default="und", languages=languages)
+    assert result == ["eng", "und", "und", "deu", "eng"]
+    assert language.get_language_detector(languages) is language.get_language_detector(
+        ["fra", "deu", "eng"]
+    )
+
+
+def test_detect_language_cached():
+    text = "Ceci est une phrase courte en français sur les bibliothèques."
+    assert language.detect_language(text, languages=("eng", "fra")) == "fra"
+    size = len(language._cache)
+    assert language.detect_language(text, languages=("eng", "fra")) == "fra"
+    assert len(language._cache) == size
+    language.clear_cache()
+    assert len(language._cache) == 0
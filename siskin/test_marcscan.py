@@ -0,0 +1,84 @@
+import collections
+import io
+
+import pymarc
+
+from siskin.marcscan import compile_conditions, field_values, filter_file, iter_records
+
+CONDITIONS = [("084", "2", "ssgn"), ("084", "a", "9,2"), ("912", "a", "digit")]
+
+
+def make_record(i, ssg=None, digit=False):
+    record = pymarc.Record()
+    record.add_field(pymarc.Field(tag="001", data="rec%05d" % i))
+    record.add_field(
+        pymarc.Field(
+            tag="245",
+            indicators=["0", "0"],
+            subfields=[pymarc.Subfield("a", "Titel Nr. %d über 9,2" % i)],
+        )
+    )
+    if ssg:
+        record.add_field(
+            pymarc.Field(
+                tag="084",
+                indicators=[" ", " "],
+                subfields=[pymarc.Subfield("a", ssg), pymarc.Subfield("2", "ssgn")],
+            )
+        )
+    if digit:
+        record.add_field(
+            pymarc.Field(
+                tag="912",
+                indicators=[" ", " "],
+                subfields=[pymarc.Subfield("a", "digit")],
+            )
+        )
+    return record
+
+
+def make_file(path, n=500):
+    expected = []
+    with open(path, "wb") as f:
+        for i in range(n):
+            record = make_record(i, ssg=["9,2", "6,25", None][i % 3], digit=i % 4 == 0)
+            if i % 3 == 0 and i % 4 == 0:
+                expected.append("rec%05d" % i)
+            f.write(record.as_marc())
+    return expected
+
+
+def test_field_values():
+    raw = make_record(1, ssg="9,2", digit=True).as_marc()
+    assert field_values(raw, "084", "a") == [b"9,2"]
+    assert field_values(raw, "084", "2") == [b"ssgn"]
+    assert field_values(raw, "245", "a") == ["Titel Nr. 1 über 9,2".encode("utf-8")]
+    assert field_values(raw, "650", "a") == []
+    check = compile_conditions(CONDITIONS)
+    assert check(raw) is None
+    assert check(make_record(2, ssg="6,25", digit=True).as_marc()) == 1
+    assert check(make_record(3, digit=True).as_marc()) == 0
+
+
+def test_iter_records():
+    blob = b"".join(make_record(i).as_marc() for i in range(3))
+    records = list(iter_records(io.BytesIO(blob), blocksize=7))
+    assert [pymarc.Record(data=r)["001"].value() for r in records] == [
+        "rec00000",
+        "rec00001",
+        "rec00002",
+    ]
+
+
+def test_filter_file(tmpdir):
+    path = str(tmpdir.join("b3kat.mrc"))
+    expected = make_file(path)
+    for workers, parts in ((1, 1), (1, 7), (2, 5)):
+        stats = collections.Counter()
+        records = list(
+            filter_file(path, CONDITIONS, workers=workers, parts=parts, stats=stats)
+        )
+        assert [pymarc.Record(data=r)["001"].value() for r in records] == expected
+        assert stats["total"] == 500
+        assert stats["candidates"] == len(expected)
+        assert stats["not-ssgn"] == 166
@@ -0,0 +1,158 @@
+import base64
+import gzip
+import io
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from siskin.metamorph import (
+    Metamorph,
+    b64_url_encode,
+    flux_to_json,
+    generic_xml_records,
+    read_flux,
+)
+
+ASSETS = os.path.join(os.path.dirname(__file__), "assets")
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "fixtures", "metamorph")
+MAP_DIR = os.path.join(ASSETS, "maps", "")
+
+FLUXES = [("87/87.flux", "ijoc"), ("34/flux.flux", "pqdt")]
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+@pytest.mark.parametrize("flux,name", FLUXES)
+def test_flux_to_json(flux, name):
+    buf = io.BytesIO()
+    n = flux_to_json(
+        os.path.join(ASSETS, flux),
+        os.path.join(FIXTURES, name + ".xml"),
+        buf,
+        workers=1,
+        MAP_DIR=MAP_DIR,
+    )
+    lines = buf.getvalue().decode("utf-8").splitlines()
+    assert n == len(lines)
+    assert lines == read_lines(os.path.join(FIXTURES, name + ".ldj"))
+
+
+def test_flux_to_json_gzip_workers(tmpdir):
+    path = str(tmpdir.join("ijoc.xml.gz"))
+    with open(os.path.join(FIXTURES, "ijoc.xml"), "rb") as f:
+        with gzip.open(path, "wb") as g:
+            g.write(f.read())
+    buf = io.BytesIO()
+    flux_to_json(
+        os.path.join(ASSETS, "87/87.flux"),
+        path,
+        buf,
+        workers=2,
+        batch_size=1,
+        MAP_DIR=MAP_DIR,
+    )
+    expected = read_lines(os.path.join(FIXTURES, "ijoc.ldj"))
+    assert buf.getvalue().decode("utf-8").splitlines() == expected
+
+
+def test_read_flux():
+    morph, tag, env = read_flux(os.path.join(ASSETS, "datacite/flux.flux"), sid="x")
+    assert morph == os.path.join(ASSETS, "datacite", "morph.xml")
+    assert tag == "Record"
+    assert env["sid"] == "x"
+    assert env["mega_collection"] == "Datacite"
+
+
+def test_datacite_morph_compiles():
+    morph, _, env = read_flux(
+        os.path.join(ASSETS, "datacite/flux.flux"), MAP_DIR=MAP_DIR
+    )
+    assert Metamorph(morph, env).path == morph
+
+
+def test_generic_xml_records():
+    xml = b"""<r xmlns:x="urn:x"><record id="1"><a x:lang="de">t1</a><a>
+    t2</a><b><c>t3</c>tail</b></record><record><a/></record></r>"""
+    records = list(generic_xml_records(io.BytesIO(xml)))
+    assert records == [
+        (
+            "1",
+            [
+                ("id", "1", 0),
+                ("a.lang", "de", 1),
+                ("a.value", "t1", 1),
+                ("a.value", "     t2", 2),
+                ("b.c.value", "t3", 4),
+                ("b.value", "tail", 3),
+            ],
+        ),
+        ("", []),
+    ]
+
+
+def test_metamorph_collectors(tmpdir):
+    path = str(tmpdir.join("morph.xml"))
+    with open(path, "w") as f:
+        f.write("""<metamorph xmlns="http://www.culturegraph.org/metamorph" version="1">
+        <rules>
+          <combine name="pair" value="${k}=${v}" reset="true" sameEntity="true">
+            <data source="a.lang" name="k"/>
+            <data source="a.value" name="v"><case to="upper"/></data>
+          </combine>
+          <choose>
+            <data source="a.value" name="c"><lookup in="m"/></data>
+            <data source="_id" name="c"><constant value="$[default]"/></data>
+          </choose>
+        </rules>
+        <maps><map name="m"><entry name="t2" value="two"/></map></maps>
+        </metamorph>""")
+    morph = Metamorph(path, {"default": "none"})
+    literals = [("a.lang", "de", 1), ("a.value", "t1", 1), ("a.value", "t2", 2)]
+    assert morph.transform("", literals) == [("pair", "de=T1"), ("c", "two")]
+    assert morph.transform("", literals[:1]) == [("c", "none")]
+
+
+def test_metamorph_unsupported(tmpdir):
+    path = str(tmpdir.join("morph.xml"))
+    with open(path, "w") as f:
+        f.write("""<metamorph xmlns="http://www.culturegraph.org/metamorph">
+        <rules><concat name="x" delimiter=","><data source="a"/></concat></rules>
+        </metamorph>""")
+    with pytest.raises(ValueError):
+        Metamorph(path)
+
+
+def test_b64_url_encode():
+    for s in ("oai:x:1", "Müller", "a\r\nb"):
+        expected = base64.b64encode(s.replace("\r\n", "\n").encode("utf-8"))
+        assert b64_url_encode(s) == expected.decode("ascii").rstrip("=")
+
+
+@pytest.mark.skipif(shutil.which("flux.sh") is None, reason="flux.sh not installed")
+@pytest.mark.parametrize("flux,name", FLUXES)
+def test_flux_sh_equivalence(flux, name):
+    output = subprocess.check_output(
+        [
+            "flux.sh",
+            os.path.join(ASSETS, flux),
+            "in=" + os.path.join(FIXTURES, name + ".xml"),
+            "MAP_DIR=file://" + MAP_DIR,
+        ]
+    )
+    expected = read_lines(os.path.join(FIXTURES, name + ".ldj"))
+
+    # compare parsed, keeping repeated keys, but not their order
+    def parse(s):
+        return json.loads(
+            s, object_pairs_hook=lambda pairs: sorted(pairs, key=json.dumps)
+        )
+
+    assert [parse(line) for line in output.decode("utf-8").splitlines()] == [
+        parse(line) for line in expected
+    ]
@@ -0,0 +1,126 @@
+import io
+import os
+import struct
+
+import pytest
+import zstandard
+
+from siskin import cli
+from siskin.multifile import (
+    MultiFileTarget,
+    concat_files,
+    link_file,
+    read_manifest,
+    write_manifest,
+    zstd_padding,
+    zstd_skippable_frame,
+)
+
+
+@pytest.fixture
+def members(tmpdir):
+    paths = []
+    for i, size in enumerate([0, 5000, 4096, 123457]):
+        path = str(tmpdir.join("member-%d" % i))
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+def read_all(paths):
+    data = b""
+    for path in paths:
+        with open(path, "rb") as f:
+            data += f.read()
+    return data
+
+
+@pytest.mark.parametrize("reflink", [True, False])
+def test_concat_files(members, tmpdir, reflink):
+    output = str(tmpdir.join("output"))
+    with open(output, "wb") as f:
+        f.write(b"old content, that must go away" * 10000)
+    stats = concat_files(members, output, reflink=reflink)
+    with open(output, "rb") as f:
+        assert f.read() == read_all(members)
+    assert stats["bytes"] == sum(os.path.getsize(p) for p in members)
+    assert stats["reflink"] + stats["copy_file_range"] + stats["copy"] == len(members)
+
+
+def test_link_file(members, tmpdir):
+    dst = tmpdir.join("linked")
+    dst.write("old")
+    assert link_file(members[1], str(dst)) == "link"
+    assert os.path.samefile(members[1], str(dst))
+    assert read_all([str(dst)]) == read_all(members[1:2])
+    assert [p.basename for p in tmpdir.listdir() if "link" in p.basename] == ["linked"]
+
+
+def test_zstd_padding():
+    frame = zstd_skippable_frame(16)
+    assert len(frame) == 16
+    assert struct.unpack("<II", frame[:8]) == (0x184D2A50, 8)
+    assert zstd_padding(4096, 4096) == b""
+    assert len(zstd_padding(4000, 4096)) == 96
+    # a frame needs at least 8 bytes, so skip to the next block
+    assert len(zstd_padding(4093, 4096)) == 3 + 4096
+    with pytest.raises(ValueError):
+        zstd_skippable_frame(7)
+
+
+def test_manifest(members, tmpdir):
+    target = MultiFileTarget(str(tmpdir.join("all.manifest")))
+    target.write(members)
+    assert target.exists()
+    assert target.members() == members
+    with target.open("rb") as f:
+        assert f.read() == read_all(members)
+
+    with open(members[1], "ab") as f:
+        f.write(b"x")
+    with pytest.raises(ValueError):
+        read_manifest(target.path)
+    os.remove(members[1])
+    with pytest.raises(ValueError):
+        target.open()
+
+
+def test_manifest_text(tmpdir):
+    paths = []
+    for i, text in enumerate(["Ä\n", "b\n"]):
+        paths.append(str(tmpdir.join("member-%d" % i)))
+        with open(paths[-1], "w", encoding="utf-8") as f:
+            f.write(text)
+    target = MultiFileTarget(str(tmpdir.join("text.manifest")))
+    target.write(paths)
+    with target.open() as f:
+        assert f.readlines() == ["Ä\n", "b\n"]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_cat_output_manifest(tmpdir, monkeypatch, compress):
+    paths, pad = [], zstd_padding if compress else None
+    for i, text in enumerate([b"a\n", b"b\n"]):
+        paths.append(str(tmpdir.join("member-%d" % i)))
+        with open(paths[-1], "wb") as f:
+            f.write(zstandard.ZstdCompressor().compress(text) if compress else text)
+    concat = str(tmpdir.join("concat"))
+    concat_files(paths, concat, pad=pad)
+    ext = ".zst.manifest" if compress else ".manifest"
+    target = MultiFileTarget(str(tmpdir.join("all" + ext)))
+    target.write([concat, paths[1]])
+    monkeypatch.setattr(cli, "_get_output_path", lambda args: target.path)
+    out = io.BytesIO()
+    cli._cat_output(["AITask"], out=out)
+    assert out.getvalue() == b"a\nb\nb\n"
+
+
+def test_write_manifest_relative(members, tmpdir):
+    cwd = os.getcwd()
+    os.chdir(str(tmpdir))
+    try:
+        write_manifest([os.path.basename(p) for p in members], "rel.manifest")
+    finally:
+        os.chdir(cwd)
+    assert read_manifest(str(tmpdir.join("rel.manifest"))) == members
@@ -1,4 +1,24 @@
-from siskin.openurl import openurl_parameters_from_intermediateschema
+import collections
+import json
+import os
+import shutil
+import sys
+from urllib.parse import quote_plus
+
+import pytest
+import zstandard
+
+from siskin import cli
+
+from siskin.openurl import (
+    compile_openurl_plan,
+    fast_quote_plus,
+    openurl_link_from_intermediateschema,
+    openurl_links,
+    openurl_parameters_from_intermediateschema,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "fixtures")
 
 
 def test_openurl_from_intermediateschema():
@@ -131,3 +151,60 @@ def test_openurl_from_intermediateschema():
     for _, doc, want in cases:
         result = openurl_parameters_from_intermediateschema(doc)
         assert result == want
+
+
+def test_fast_quote_plus():
+    for value in ("", "plain", "a b/ü%+&=~.-_", "ÄÖ€ 𝄞", "10.1234/x(y)"):
+        assert fast_quote_plus(value) == quote_plus(value)
+
+
+def test_compile_openurl_plan():
+    with open(os.path.join(FIXTURES, "intermediate/docs.ldj")) as f:
+        docs = [json.loads(line) for line in f]
+    docs += [
+        dict(doc, **{"rft.genre": genre})
+        for doc in docs[:3]
+        for genre in ("proceeding", "unknown", "journal")
+    ]
+    docs.append({"rft.atitle": "title only", "rft.volume": 1})
+    link = compile_openurl_plan(rfr_id="example.org")
+    for doc in docs:
+        assert link(doc) == openurl_link_from_intermediateschema(
+            doc, rfr_id="example.org"
+        )
+    assert link({}) is None
+
+
+def test_openurl_links():
+    with open(os.path.join(FIXTURES, "intermediate/docs.ldj"), "rb") as f:
+        lines = f.readlines()
+    lines.insert(3, b'{"finc.id": "broken", "rft.genre": "book"}\n')
+    stats = collections.Counter()
+    serial = b"".join(openurl_links(lines, workers=1, batch_size=7, stats=stats))
+    parallel = b"".join(openurl_links(lines, workers=2, batch_size=7))
+    assert serial == parallel
+    assert stats == {"written": 30, "failed": 1}
+    rows = [line.split(b"\t") for line in serial.splitlines()]
+    assert rows[0][0] == b"ai-0-0"
+    assert rows[1][1].decode("utf-8") == openurl_link_from_intermediateschema(
+        json.loads(lines[1])
+    )
+
+
+@pytest.mark.skipif(shutil.which("unzstd") is None, reason="unzstd not installed")
+@pytest.mark.parametrize("truncate", [False, True])
+def test_cmd_openurl_zstd(tmpdir, monkeypatch, capfdbinary, truncate):
+    with open(os.path.join(FIXTURES, "intermediate/docs.ldj"), "rb") as f:
+        data = zstandard.ZstdCompressor().compress(f.read())
+    path = str(tmpdir.join("docs.ldj.zst"))
+    with open(path, "wb") as f:
+        f.write(data[: len(data) // 2] if truncate else data)
+    monkeypatch.setattr(cli, "_get_output_path", lambda args: path)
+    monkeypatch.setattr(sys, "argv", ["siskin openurl", "-w", "1", "AITask"])
+    if truncate:
+        with pytest.raises(SystemExit) as exc:
+            cli.cmd_openurl()
+        assert exc.value.code == 1
+    else:
+        cli.cmd_openurl()
+        assert len(capfdbinary.readouterr().out.splitlines()) == 30
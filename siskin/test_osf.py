@@ -0,0 +1,97 @@
+import datetime
+import http.server
+import json
+import os
+import tempfile
+import threading
+
+import pytest
+import zstandard
+
+from siskin.sources.osf import (
+    OSFContributorsPrefetch,
+    OSFDownload,
+    OSFIntermediateSchema,
+)
+from siskin.task import DefaultTask, config
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "fixtures")
+DATE = datetime.date(2026, 10, 8)
+
+
+@pytest.fixture
+def osf_api():
+    """
+    Serve the contributor fixtures, yield the base URL and requested paths.
+    """
+    with open(os.path.join(FIXTURES, "osf/contributors.json")) as f:
+        pages = json.load(f)
+    requested = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            if self.path not in pages:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = json.dumps(pages[self.path]).replace("https://api.osf.io", base)
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(body.encode("utf-8"))
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield base, requested
+    server.shutdown()
+
+
+@pytest.fixture
+def base(tmpdir, monkeypatch):
+    monkeypatch.setattr(DefaultTask, "BASE", str(tmpdir.join("home")))
+    saved = dict(config["osf"]) if config.has_section("osf") else None
+    config.remove_section("osf")
+    config.read_dict({"osf": {"token": ""}})
+    yield tmpdir
+    config.remove_section("osf")
+    if saved is not None:
+        config.read_dict({"osf": saved})
+
+
+def test_prefetch_and_conversion_share_cache(base, osf_api, monkeypatch):
+    url, requested = osf_api
+    with open(os.path.join(FIXTURES, "osf/preprints.ldj"), "rb") as f:
+        content = f.read().replace(b"https://api.osf.io", url.encode("utf-8"))
+    path = OSFContributorsPrefetch(date=DATE).input().path
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(zstandard.ZstdCompressor().compress(content))
+
+    # each task in a process of its own, with a different temporary directory
+    monkeypatch.setattr(tempfile, "tempdir", str(base.mkdir("a")))
+    OSFContributorsPrefetch(date=DATE, connections=4, max_retries=1).run()
+    assert len(requested) == 26
+    monkeypatch.setattr(tempfile, "tempdir", str(base.mkdir("b")))
+    task = OSFIntermediateSchema(date=DATE, max_retries=1)
+    task.run()
+    assert len(requested) == 26
+
+    with task.output().open() as f:
+        docs = [json.loads(line) for line in f]
+    assert len(docs) == 24
+    assert all(doc["authors"] for doc in docs)
+    assert docs[3]["authors"][0] == {"rft.aufirst": "David", "rft.aulast": "Novak"}
+
+
+def test_full_harvest_due(base):
+    task = OSFDownload(date=DATE, full_days=30)
+    assert task.full_harvest_due()
+    os.makedirs(task.taskdir())
+    for days, due in ((7, False), (30, False), (31, True)):
+        with open(task.full_harvest_marker(), "w") as f:
+            f.write((DATE - datetime.timedelta(days=days)).isoformat())
+        assert task.full_harvest_due() is due
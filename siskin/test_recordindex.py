@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from siskin.recordindex import RecordIndex, build_index, frame_keys
+from siskin.zstdseek import SeekableZstdWriter
+
+SOURCES = ["49", "28", "55"]
+ISILS = ["DE-15", "DE-14", "DE-Ch1"]
+
+
+def record(i):
+    # records are sorted by source, like a concatenation of sources
+    doc = {"finc.id": "ai-%d" % i, "finc.source_id": SOURCES[i * 3 // 3000]}
+    doc["x.labels"] = ISILS[: i % 4] if i % 50 else ["DE-Bo1"]
+    return json.dumps(doc, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+@pytest.fixture
+def licensing(tmpdir):
+    path = str(tmpdir.join("ai.ldj.zst"))
+    with SeekableZstdWriter(path, frame_size=2048) as w:
+        for i in range(3000):
+            w.write(record(i))
+    return path
+
+
+def test_frame_keys():
+    data = record(1) + record(2) + b'{"finc.source_id": "7", "x.labels": []}\n'
+    assert frame_keys(data) == {"source:49", "source:7", "isil:DE-15", "isil:DE-14"}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_record_index(licensing, tmpdir, workers):
+    path = str(tmpdir.join("ai.idx"))
+    build_index(licensing, path, workers=workers)
+    index = RecordIndex(path)
+    assert index.keys("source:") == ["source:28", "source:49", "source:55"]
+    frames = index.frames(source="28")
+    assert 0 < len(frames) < index.index["frames"] / 2
+
+    ids = [json.loads(line)["finc.id"] for line in index.records(source="28")]
+    assert ids == ["ai-%d" % i for i in range(1000, 2000)]
+    ids = [json.loads(line)["finc.id"] for line in index.records(isil="DE-Bo1")]
+    assert ids == ["ai-%d" % i for i in range(0, 3000, 50)]
+    assert len(index.frames(source="55", isil="DE-Bo1")) < len(frames)
+    assert list(index.records(source="55", isil="DE-Ch1")) == [
+        record(i) for i in range(2000, 3000) if i % 4 == 3 and i % 50
+    ]
+    assert index.frames(isil="XX") == []
+
+
+def test_record_index_changed(licensing, tmpdir):
+    path = str(tmpdir.join("ai.idx"))
+    build_index(licensing, path, workers=1)
+    with open(licensing, "ab") as f:
+        f.write(b"x")
+    with pytest.raises(ValueError):
+        RecordIndex(path)
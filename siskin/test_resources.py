@@ -0,0 +1,149 @@
+import configparser
+import os
+import time
+
+import luigi
+import pytest
+
+from siskin.resources import (
+    check_disk_space,
+    configure_scheduler,
+    estimate_size,
+    parse_size,
+    same_filesystem,
+    scheduler_resources,
+    sort_buffer,
+    task_resources,
+    threads,
+)
+from siskin.task import DefaultTask
+
+MACHINE = {"memory": 4096, "cpu": 4}
+
+
+def test_parse_size():
+    assert parse_size("1024") == 1024
+    assert parse_size("512M") == 512 << 20
+    assert parse_size("4g") == 4 << 30
+    assert parse_size("1.5GiB") == 3 << 29
+    assert parse_size("25%", total=400) == 100
+    with pytest.raises(ValueError):
+        parse_size("25%")
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_task_resources():
+    assert task_resources(machine=MACHINE) == {}
+    assert task_resources("50%", 2, machine=MACHINE) == {"memory": 2048, "cpu": 2}
+    # never more than the machine has, or the task would never run
+    assert task_resources("64G", 64, machine=MACHINE) == MACHINE
+
+
+def test_sort_buffer_and_threads():
+    assert sort_buffer("50%", machine=MACHINE) == "2048M"
+    assert sort_buffer("50%", share=2, machine=MACHINE) == "1024M"
+    assert sort_buffer(None, machine=MACHINE) == "1024M"
+    assert threads(None, machine=MACHINE) == 1
+    assert threads(16, machine=MACHINE) == 4
+
+
+def test_configure_scheduler():
+    config = configparser.ConfigParser()
+    config.read_dict({"resources": {"memory": "2G", "cpu": "3"}})
+    luigi_config = luigi.configuration.get_config()
+    try:
+        configure_scheduler(config)
+        assert luigi_config.getintdict("resources") == {"memory": 2048, "cpu": 3}
+        luigi_config.set("resources", "cpu", "7")
+        configure_scheduler(config)
+        # explicit luigi configuration wins
+        assert luigi_config.getintdict("resources") == {"memory": 2048, "cpu": 7}
+    finally:
+        luigi_config.remove_section("resources")
+
+
+class Sized(DefaultTask):
+    memory = "64G"
+    cpu = 64
+
+
+def test_scheduler_resources():
+    scheduler = {"memory": 2048}
+    assert scheduler_resources("64G", 2, scheduler=scheduler) == {"memory": 2048}
+    assert scheduler_resources("1G", scheduler=scheduler) == {"memory": 1024}
+    assert scheduler_resources("1G", 2, scheduler={}) == {}
+
+
+def test_resources_luigid_without_capacity():
+    # luigid reads a luigi.cfg without [resources]; siskin run does not
+    # configure it, so tasks must not request more than one unit of anything
+    luigi_config = luigi.configuration.get_config()
+    assert not luigi_config.has_section("resources")
+    configure_scheduler(configparser.ConfigParser(), local=False)
+    assert not luigi_config.has_section("resources")
+    assert Sized().resources == {}
+    luigi_config.add_section("resources")
+    try:
+        luigi_config.set("resources", "cpu", "1")
+        assert Sized().resources == {"cpu": 1}
+    finally:
+        luigi_config.remove_section("resources")
+
+
+class Heavy(luigi.Task):
+    """
+    Records its run interval, uses most of the machine.
+    """
+
+    resources = task_resources("60%", machine=MACHINE)
+
+    name = luigi.Parameter()
+    directory = luigi.Parameter()
+
+    def run(self):
+        start = time.time()
+        time.sleep(0.5)
+        with self.output().open("w") as output:
+            output.write("{} {}".format(start, time.time()))
+
+    def output(self):
+        return luigi.LocalTarget(os.path.join(self.directory, self.name))
+
+
+def test_heavy_tasks_do_not_overlap(tmpdir):
+    luigi_config = luigi.configuration.get_config()
+    configure_scheduler(configparser.ConfigParser())
+    luigi_config.set("resources", "memory", str(MACHINE["memory"]))
+    try:
+        tasks = [Heavy(name=name, directory=str(tmpdir)) for name in "ab"]
+        assert luigi.build(tasks, workers=2, local_scheduler=True)
+    finally:
+        luigi_config.remove_section("resources")
+    (a0, a1), (b0, b1) = [map(float, tmpdir.join(name).read().split()) for name in "ab"]
+    assert a1 <= b0 or b1 <= a0
+
+
+def test_estimate_size(tmpdir):
+    assert estimate_size(str(tmpdir.join("date-2026-01-08.tsv"))) == 0
+    for i, size in enumerate([100, 300, 200]):
+        path = tmpdir.join("date-2026-01-0%d.tsv" % (i + 1))
+        path.write("x" * size)
+        os.utime(str(path), (i, i))
+    tmpdir.join("date-2026-01-01.csv").write("x" * 1000)
+    tmpdir.join(".siskin-tmp.tsv").write("x" * 1000)
+    path = str(tmpdir.join("date-2026-01-08.tsv"))
+    assert estimate_size(path, margin=1) == 300
+    assert estimate_size(path, history=1, margin=1) == 200
+    assert estimate_size(path) == 330
+
+
+def test_check_disk_space(tmpdir):
+    tmpdir.join("date-2026-01-01.tsv").write("x" * 1000)
+    path = str(tmpdir.join("missing", "date-2026-01-08.tsv"))
+    assert check_disk_space([path]) == {os.stat(str(tmpdir)).st_dev: 0}
+    path = str(tmpdir.join("date-2026-01-08.tsv"))
+    assert list(check_disk_space([path]).values()) == [1100]
+    with pytest.raises(RuntimeError, match="not enough disk space"):
+        check_disk_space([path], reserve=1 << 60)
+    assert same_filesystem(path, str(tmpdir.join("a", "b")))
@@ -0,0 +1,98 @@
+import os
+
+import luigi
+
+from siskin.runtimes import (
+    RuntimePredictor,
+    critical_paths,
+    load_history,
+    plan,
+    record,
+    simulate,
+)
+
+
+def test_history_and_predictor(tmpdir):
+    path = str(tmpdir.join("runtimes.tsv"))
+    for seconds, size in [(100, 1000), (300, 1000), (200, 1000), (10, 0)]:
+        record(path, "A", seconds, size)
+    record(path, "B", 5)
+    with open(path, "a") as handle:
+        handle.write("broken line\n")
+    history = load_history(path)
+    assert history["A"][0] == (100, 1000)
+    assert len(history["A"]) == 4
+
+    predictor = RuntimePredictor(history, window=3, default=42)
+    # one run without size in the window, median duration
+    assert predictor.predict("A", size=2000) == 200
+    assert RuntimePredictor(history, window=2).predict("A") == 105
+    predictor = RuntimePredictor({"A": history["A"][:3]})
+    # median rate of 0.2s per byte, scaled to the input
+    assert predictor.predict("A", size=2000) == 400
+    assert predictor.predict("C") == 60
+    assert load_history(str(tmpdir.join("missing"))) == {}
+
+
+def long_pole():
+    """
+    A root with one long dependency and four short ones.
+    """
+    graph = {"root": ["long", "s1", "s2", "s3", "s4"], "long": []}
+    graph.update({s: [] for s in ("s1", "s2", "s3", "s4")})
+    durations = {"root": 1, "long": 8, "s1": 2, "s2": 2, "s3": 2, "s4": 2}
+    return graph, durations
+
+
+def test_critical_paths():
+    graph, durations = long_pole()
+    graph["s1"] = ["s0"]
+    graph["s0"] = []
+    durations["s0"] = 1
+    lengths = critical_paths(graph, durations)
+    assert lengths == {
+        "root": 1,
+        "long": 9,
+        "s0": 4,
+        "s1": 3,
+        "s2": 3,
+        "s3": 3,
+        "s4": 3,
+    }
+
+
+def test_simulate_longest_first():
+    graph, durations = long_pole()
+    priorities = critical_paths(graph, durations)
+    assert simulate(graph, durations, priorities, workers=2) == 9
+    # the long pole last
+    shortest = {task: -length for task, length in priorities.items()}
+    assert simulate(graph, durations, shortest, workers=2) == 13
+    assert simulate(graph, durations, priorities, workers=1) == 17
+    assert simulate({}, {}, {}) == 0
+
+
+class Step(luigi.Task):
+    name = luigi.Parameter()
+    deps = luigi.ListParameter(default=[])
+    directory = luigi.Parameter()
+
+    def requires(self):
+        return [Step(name=dep, directory=self.directory) for dep in self.deps]
+
+    def output(self):
+        return luigi.LocalTarget(os.path.join(self.directory, self.name))
+
+
+def test_plan(tmpdir):
+    path = str(tmpdir.join("runtimes.tsv"))
+    record(path, "Step", 10)
+    directory = str(tmpdir.mkdir("out"))
+    tmpdir.join("out", "done").write("")
+    root = Step(name="root", deps=["a", "done"], directory=directory)
+    schedule = plan([root], path=path, workers=2)
+    a = Step(name="a", directory=directory)
+    assert set(schedule.graph) == {root, a}
+    assert schedule.priorities == {root: 10, a: 20}
+    assert (root.priority, a.priority) == (10, 20)
+    assert schedule.makespan == 20
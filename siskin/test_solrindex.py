@@ -0,0 +1,185 @@
+import gzip
+import http.server
+import io
+import json
+import threading
+import urllib.parse
+
+import pytest
+import requests
+
+from siskin.solrindex import (
+    delete_ids,
+    diff_fingerprints,
+    export_delta,
+    index_file,
+    iter_batches,
+    write_fingerprints,
+)
+
+
+@pytest.fixture
+def solr():
+    """
+    A local imitation of a Solr update handler at /solr/biblio/update, which
+    accepts JSON arrays of documents, deletes and commits. Set solr.fail to answer
+    with 503 after that many updates, solr.bad to reject a document id.
+    """
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            docs = json.loads(body)
+            if isinstance(docs, dict):
+                with state.lock:
+                    state.deleted.extend(docs["delete"])
+                docs = []
+            with state.lock:
+                state.requests += 1
+                failing = state.fail and state.requests > state.fail
+                bad = any(doc["id"] == state.bad for doc in docs)
+                if not failing and not bad:
+                    state.batches.append([doc["id"] for doc in docs])
+            self.send_response(503 if failing else 400 if bad else 200)
+            self.end_headers()
+            self.wfile.write(b'{"responseHeader": {"status": 0}}')
+
+        def do_GET(self):
+            query = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(self.path).query))
+            if query.get("commit") == "true":
+                state.commits += 1
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b'{"responseHeader": {"status": 0}}')
+
+        def log_message(self, *args):
+            pass
+
+    class State:
+        pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    state = State()
+    state.lock = threading.Lock()
+    state.batches, state.requests, state.commits = [], 0, 0
+    state.deleted = []
+    state.fail, state.bad = 0, None
+    state.url = "http://127.0.0.1:%d/solr/biblio" % server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield state
+    server.shutdown()
+
+
+def write_export(path, n=1000):
+    with gzip.open(path, "wb") as f:
+        for i in range(n):
+            doc = {"id": "ai-%05d" % i, "title": "Title %d" % i * (i % 7 + 1)}
+            f.write(json.dumps(doc).encode("utf-8") + b"\n")
+            if i % 100 == 0:
+                f.write(b"\n")
+
+
+def indexed(state):
+    return [id for batch in state.batches for id in batch]
+
+
+def test_iter_batches():
+    data = b'{"id": 1}\n\n{"id": 2}\n' + b'{"id": 3, "x": "' + b"x" * 100 + b'"}\n'
+    batches = list(iter_batches(io.BytesIO(data), max_docs=2, max_bytes=50))
+    assert [len(docs) for _, docs in batches] == [2, 1]
+    assert sum(consumed for consumed, _ in batches) == len(data)
+
+
+def test_index_file(solr, tmpdir):
+    path = str(tmpdir.join("export.ndj.gz"))
+    write_export(path)
+    stats = index_file(path, solr.url, workers=4, max_docs=64, max_bytes=4096)
+    assert stats["docs"] == 1000
+    assert stats["batches"] == len(solr.batches)
+    assert sorted(indexed(solr)) == ["ai-%05d" % i for i in range(1000)]
+    assert all(len(batch) <= 64 for batch in solr.batches)
+    assert solr.commits == 1
+
+
+def test_index_file_resume(solr, tmpdir):
+    path = str(tmpdir.join("export.ndj.gz"))
+    checkpoint = str(tmpdir.join("export.checkpoint"))
+    write_export(path)
+    solr.fail = 5
+    with pytest.raises(RuntimeError):
+        index_file(
+            path,
+            solr.url,
+            workers=2,
+            max_docs=50,
+            checkpoint=checkpoint,
+            max_retries=0,
+        )
+    with open(checkpoint) as f:
+        state = json.load(f)
+    assert 0 < state["docs"] <= 250 and not state["done"]
+    # everything before the checkpoint offset has been acknowledged
+    acknowledged = {"ai-%05d" % i for i in range(state["docs"])}
+    assert acknowledged <= set(indexed(solr))
+
+    solr.fail, solr.batches = 0, []
+    stats = index_file(path, solr.url, workers=2, max_docs=50, checkpoint=checkpoint)
+    assert stats["docs"] == 1000 - state["docs"]
+    assert sorted(indexed(solr)) == ["ai-%05d" % i for i in range(state["docs"], 1000)]
+    # done, nothing to do
+    assert index_file(path, solr.url, checkpoint=checkpoint)["docs"] == 0
+
+
+def test_index_file_bad_document(solr, tmpdir):
+    path = str(tmpdir.join("export.ndj.gz"))
+    write_export(path, n=100)
+    solr.bad = "ai-00042"
+    with pytest.raises(RuntimeError):
+        index_file(path, solr.url, workers=2, max_docs=10, retry_sleep=0)
+    # a rejected batch is not retried and stops indexing
+    assert "ai-00042" not in indexed(solr)
+    assert solr.requests < 10
+
+
+def write_lines(path, docs):
+    with open(path, "w") as f:
+        for doc in docs:
+            f.write(json.dumps(doc) + "\n")
+
+
+def test_export_delta(tmpdir):
+    old = [{"id": "b", "v": 1}, {"id": "a", "v": 1}, {"id": "c", "v": 1}]
+    new = [{"id": "d", "v": 1}, {"id": "a", "v": 2}, {"id": "b", "v": 1}]
+    paths = {}
+    for name, docs in (("old", old), ("new", new)):
+        write_lines(str(tmpdir.join(name)), docs)
+        paths[name] = str(tmpdir.join(name + ".fp"))
+        assert write_fingerprints(str(tmpdir.join(name)), paths[name]) == 3
+    with open(paths["new"]) as f:
+        assert [line.split("\t")[0] for line in f] == ["a", "b", "d"]
+
+    delta, deletes = str(tmpdir.join("delta")), str(tmpdir.join("deletes"))
+    stats = export_delta(
+        str(tmpdir.join("new")),
+        paths["old"],
+        paths["new"],
+        delta,
+        deletes,
+        buffer_size="1M",
+    )
+    assert stats == {"updates": 2, "deletes": 1}
+    with open(delta) as f:
+        assert [json.loads(line) for line in f] == new[:2]
+    with open(deletes) as f:
+        assert f.read() == "c\n"
+
+    # no previous index, everything is new
+    assert [op for op, _, _ in diff_fingerprints(None, paths["new"])] == ["update"] * 3
+    assert list(diff_fingerprints(paths["new"], paths["new"])) == []
+
+
+def test_delete_ids(solr):
+    ids = ["ai-%05d" % i for i in range(25)]
+    assert delete_ids(requests.Session(), solr.url, iter(ids), batch_size=10) == 25
+    assert solr.deleted == ids
+    assert solr.requests == 3
@@ -0,0 +1,113 @@
+import http.server
+import json
+import re
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+from siskin.solrquery import RateLimiter, any_query, count_terms
+
+DOCS = [
+    {"institution": ["DE-15"], "issn": ["0171-4880", "1234-5678"]},
+    {"institution": ["DE-15"], "issn": ["0171-4880"]},
+    {"institution": ["DE-14"], "issn": ["0171-5801"]},
+    {"institution": ["DE-15", "DE-14"], "issn": ["2222-3333"]},
+    {"institution": ["DE-15"], "issn": ["1111-222X"]},
+]
+
+
+def analyze(value):
+    """
+    Like the isn field type of the finc schema: no hyphens, lower case.
+    """
+    return value.replace("-", "").lower()
+
+
+@pytest.fixture
+def solr():
+    """
+    A local imitation of a Solr select handler, which understands just
+    enough of field filters and field facet queries. The issn field is
+    analyzed, a raw term query would not match.
+    """
+
+    def values(doc, field):
+        if field == "issn":
+            return {analyze(v) for v in doc[field]}
+        return set(doc[field])
+
+    def matches(doc, fq):
+        field, value = fq.split(":", 1)
+        m = re.match(r"\((.*)\)$", value)
+        if m:
+            wanted = {analyze(v) for v in re.findall(r'"([^"]*)"', m.group(1))}
+            return bool(values(doc, field) & wanted)
+        return value in values(doc, field)
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            params = urllib.parse.parse_qs(body.decode("utf-8"))
+            docs = [d for d in DOCS if all(matches(d, fq) for fq in params["fq"])]
+            counts = {}
+            for q in params.get("facet.query", []):
+                field, value = re.match(r"\{!field f=(\w+)\}(.*)", q).groups()
+                counts[q] = sum(1 for d in docs if analyze(value) in values(d, field))
+            with state.lock:
+                state.requests += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            body = {"response": {"numFound": len(docs)}}
+            body["facet_counts"] = {"facet_queries": counts}
+            self.wfile.write(json.dumps(body).encode("utf-8"))
+
+        def log_message(self, *args):
+            pass
+
+    class State:
+        pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    state = State()
+    state.lock = threading.Lock()
+    state.requests = 0
+    state.url = "http://127.0.0.1:%d/solr/biblio" % server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield state
+    server.shutdown()
+
+
+def test_any_query():
+    assert any_query("issn", ["1234-5678", 'a"b\\']) == (
+        'issn:("1234-5678" OR "a\\"b\\\\")'
+    )
+
+
+def test_count_terms(solr):
+    issns = ["0171-4880", "0171-5801", "1234-5678", "2222-3333", "9999-9999"]
+    counts = count_terms(
+        solr.url, "issn", issns + issns[:1], fq=["institution:DE-15"], batch_size=2
+    )
+    assert counts == {
+        "0171-4880": 2,
+        "0171-5801": 0,
+        "1234-5678": 1,
+        "2222-3333": 1,
+        "9999-9999": 0,
+    }
+    assert solr.requests == 3
+
+    # raw values, as in holding files, are analyzed like the indexed ones
+    counts = count_terms(solr.url, "issn", ["1111-222x", "12345678"])
+    assert counts == {"1111-222x": 1, "12345678": 1}
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(rate=100)
+    started = time.monotonic()
+    for _ in range(11):
+        limiter.wait()
+    assert time.monotonic() - started >= 0.09
@@ -0,0 +1,77 @@
+import os
+import tempfile
+
+import luigi
+import pytest
+from gluish.utils import shellout
+
+from siskin.runtimes import RUNTIMES, load_history
+from siskin.task import DefaultTask, config
+
+
+class ScratchTask(DefaultTask):
+    """
+    Writes the temporary directory in use and a stopover to its output.
+    """
+
+    TAG = "test"
+
+    def run(self):
+        output = shellout(
+            "echo {tempdir} {stopover} > {output}",
+            tempdir=tempfile.gettempdir(),
+            stopover=self.stopover(),
+        )
+        luigi.LocalTarget(output).move(self.output().path)
+
+    def output(self):
+        return luigi.LocalTarget(path=self.path())
+
+
+@pytest.fixture
+def task(tmpdir, monkeypatch):
+    monkeypatch.setattr(ScratchTask, "BASE", str(tmpdir))
+    saved = dict(config["resources"]) if config.has_section("resources") else None
+    config.remove_section("resources")
+    config.add_section("resources")
+    yield ScratchTask()
+    config.remove_section("resources")
+    if saved is not None:
+        config.read_dict({"resources": saved})
+
+
+def test_run_keeps_process_tempdir(task, tmpdir, monkeypatch):
+    monkeypatch.setattr("siskin.task.same_filesystem", lambda a, b: False)
+    tempdir = tempfile.gettempdir()
+    task.run()
+    assert tempfile.gettempdir() == tempdir
+    with task.output().open() as handle:
+        used, stopover = handle.read().split()
+    # only stopover and scratch move next to the output
+    assert used == tempdir
+    assert os.path.dirname(stopover) == task.scratch() != tempdir
+    assert os.stat(stopover).st_dev == os.stat(str(tmpdir)).st_dev
+    # runtime recorded for scheduling
+    assert list(load_history(str(tmpdir.join(RUNTIMES)))) == ["ScratchTask"]
+
+
+def test_scratch_next_to_output(task, monkeypatch):
+    monkeypatch.setattr("siskin.task.same_filesystem", lambda a, b: False)
+    assert task.scratch() == os.path.join(task.taskdir(), ".tmp")
+    assert os.path.isdir(task.scratch())
+
+
+def test_stopover(task):
+    path = task.stopover()
+    assert os.path.basename(path).startswith(".siskin-")
+    assert os.path.dirname(path) == task.scratch()
+    os.remove(path)
+
+
+def test_preflight(task):
+    task.run()
+    os.rename(task.output().path, task.output().path + "-earlier")
+    config.set("resources", "disk-reserve", "{}".format(1 << 60))
+    with pytest.raises(RuntimeError, match="not enough disk space"):
+        task.run()
+    assert not task.complete()
@@ -5,6 +5,7 @@ import json
 import os
 import tempfile
 
+import pytest
 import requests
 import responses
 
@@ -12,11 +13,15 @@ from siskin.utils import (
     SetEncoder,
     URLCache,
     dictcheck,
+    fanout,
     get_task_import_cache,
     load_set,
     nwise,
+    ordered_pool_map,
     random_string,
+    read_checkpoint,
     scrape_html_listing,
+    write_checkpoint,
     xmlstream,
 )
 
@@ -74,6 +79,15 @@ def test_load_set():
     os.remove(tf.name)
 
 
+def test_checkpoint(tmpdir):
+    path = str(tmpdir.join("checkpoint"))
+    assert read_checkpoint(path) is None
+    write_checkpoint(path, {"offset": 1})
+    write_checkpoint(path, {"offset": 2})
+    assert read_checkpoint(path) == {"offset": 2}
+    assert os.listdir(str(tmpdir)) == ["checkpoint"]
+
+
 def test_get_cache_file(tmpdir):
     cache = URLCache(directory=str(tmpdir))
     fn = cache.get_cache_file("http://x.com")
@@ -142,3 +156,30 @@ def test_xmlstream():
     filename = handle.name
     assert [v for v in xmlstream(filename, "b")] == [b"<b>C</b>", b"<b>C</b>"]
     os.remove(filename)
+
+
+def test_ordered_pool_map():
+    items = iter(range(100))
+    assert list(ordered_pool_map(abs, (-v for v in items), workers=3)) == list(
+        range(100)
+    )
+    assert list(ordered_pool_map(len, ["a", "bb"], workers=1)) == [1, 2]
+
+
+def test_fanout(tmpdir):
+    upper, count = str(tmpdir.join("upper")), str(tmpdir.join("count"))
+    fanout(
+        "seq 100000 | sed -e 's/^/a/'",
+        ["tr a A > %s" % upper, "wc -l > %s" % count],
+        bufsize=4096,
+    )
+    with open(upper) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "A1" and lines[-1] == "A100000"
+    with open(count) as f:
+        assert f.read().strip() == "100000"
+
+    with pytest.raises(RuntimeError):
+        fanout("seq 10 | false", ["cat > /dev/null"])
+    with pytest.raises(RuntimeError):
+        fanout("seq 100000", ["false", "cat > /dev/null"])
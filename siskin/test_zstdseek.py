@@ -0,0 +1,101 @@
+import shutil
+import subprocess
+
+import luigi
+import pytest
+import zstandard
+
+from siskin.zstdseek import (
+    SeekableZstd,
+    SeekableZstdReader,
+    SeekableZstdWriter,
+    write_seekable,
+)
+
+LINES = [b'{"id": %d, "title": "%s"}\n' % (i, b"x" * (i % 97)) for i in range(5000)]
+
+
+@pytest.fixture(params=[1, 3])
+def seekable(request, tmpdir):
+    path = str(tmpdir.join("data.ldj.zst"))
+    with SeekableZstdWriter(path, frame_size=4096, workers=request.param) as w:
+        for line in LINES:
+            w.write(line)
+    return path
+
+
+def decompress_all(path):
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        return reader.read()
+
+
+def test_roundtrip(seekable):
+    assert decompress_all(seekable) == b"".join(LINES)
+    with SeekableZstdReader(seekable) as r:
+        assert len(r) > 10
+        assert r.size == len(b"".join(LINES))
+        for i in range(len(r) - 1):
+            assert r.frame(i).endswith(b"\n")
+        assert b"".join(r.iter_frames(workers=3)) == b"".join(LINES)
+
+
+@pytest.mark.parametrize(
+    "start,stop", [(0, 10), (1, 2), (2500, 2600), (4990, None), (6000, None)]
+)
+def test_lines(seekable, start, stop):
+    with SeekableZstdReader(seekable) as r:
+        assert list(r.lines(start, stop)) == LINES[start:stop]
+
+
+def test_lines_unaligned_frames(tmpdir):
+    path = str(tmpdir.join("raw.zst"))
+    data = b"".join(LINES)
+    with SeekableZstdWriter(path, frame_size=1000) as w:
+        # no newline in sight, so frames get cut anywhere
+        w.frame_size = 1 << 30
+        for i in range(0, len(data), 1000):
+            w._emit(data[i : i + 1000])
+    with SeekableZstdReader(path) as r:
+        assert list(r.lines(123, 130)) == LINES[123:130]
+        assert r.read(100000, 50) == data[100000:100050]
+
+
+def test_target_format(tmpdir):
+    target = luigi.LocalTarget(str(tmpdir.join("t.zst")), format=SeekableZstd)
+    with target.open("w") as output:
+        output.write("a\tb\n")
+    with target.open() as handle:
+        assert handle.read() == b"a\tb\n"
+    failing = luigi.LocalTarget(str(tmpdir.join("f.zst")), format=SeekableZstd)
+    with pytest.raises(ValueError), failing.open("w") as output:
+        output.write("x\n")
+        raise ValueError()
+    assert not failing.exists()
+
+
+def test_write_seekable(tmpdir):
+    path = str(tmpdir.join("seq.zst"))
+    write_seekable("seq 1 10000", path, frame_size=1000)
+    with SeekableZstdReader(path) as r:
+        assert list(r.lines(9999)) == [b"10000\n"]
+    with pytest.raises(RuntimeError):
+        write_seekable("seq 1 10; false", path)
+    with SeekableZstdReader(path) as r:
+        assert list(r.lines(9999)) == [b"10000\n"]
+    assert tmpdir.listdir() == [tmpdir.join("seq.zst")]
+
+
+def test_writer_error_leaves_no_file(tmpdir):
+    path = str(tmpdir.join("data.ldj.zst"))
+    with pytest.raises(ValueError):
+        with SeekableZstdWriter(path, frame_size=4096, workers=3) as w:
+            for line in LINES:
+                w.write(line)
+            raise ValueError("interrupted")
+    assert tmpdir.listdir() == []
+
+
+@pytest.mark.skipif(shutil.which("zstd") is None, reason="zstd not installed")
+def test_zstdcat(seekable):
+    assert subprocess.check_output(["zstd", "-cdq", seekable]) == b"".join(LINES)
@@ -27,6 +27,8 @@ Various utilities.
 
 from __future__ import print_function
 
+import collections
+import concurrent.futures
 import datetime
 import errno
 import hashlib
@@ -38,6 +40,7 @@ import os
 import random
 import re
 import string
+import subprocess
 import tempfile
 import xml.etree.cElementTree as ET
 
@@ -245,6 +248,28 @@ def load_set_from_file(filename, func=lambda v: v):
     return load_set(filename, func=func)
 
 
+def read_checkpoint(path):
+    """
+    Return the JSON object stored in a checkpoint file, or None, if there is
+    no checkpoint yet.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def write_checkpoint(path, checkpoint):
+    """
+    Store a JSON serializable checkpoint atomically, so a crash leaves either
+    the old or the new checkpoint.
+    """
+    tmp = "{}.tmp".format(path)
+    with open(tmp, "w") as handle:
+        json.dump(checkpoint, handle)
+    os.replace(tmp, path)
+
+
 def sha1obj(obj):
     """
     Return a sha1 of various python objects. This is not comprehensive yet, so
@@ -360,7 +385,10 @@ class URLCache(object):
             r = self.sess.get(url, timeout=600)
             if r.status_code >= 400:
                 raise RuntimeError("%s on %s" % (r.status_code, url))
-            with tempfile.NamedTemporaryFile(delete=False) as output:
+            # Same directory as the cache, so the rename stays on one device.
+            with tempfile.NamedTemporaryFile(
+                delete=False, dir=self.directory, prefix=".urlcache-"
+            ) as output:
                 output.write(r.text.encode("utf-8"))
             os.rename(output.name, self.get_cache_file(url))
 
@@ -370,6 +398,61 @@ class URLCache(object):
         with open(self.get_cache_file(url)) as handle:
             return handle.read()
 
+    def prefetch(self, urls, workers=8, force=False, follow=None):
+        """
+        Fetch a number of URLs into the cache, with at most `workers` requests
+        in flight. Already cached URLs are skipped, unless `force` is set.
+        Optionally, `follow` is a function that takes the content of a fetched
+        page and returns a list of more URLs to fetch, e.g. the next page of a
+        paginated API.
+
+        Failed requests are logged and counted, but do not stop the prefetch.
+        Returns a counter with "cached", "fetched" and "failed" URLs.
+        """
+        stats = collections.Counter()
+        seen = set()
+
+        def task(url):
+            status = "cached"
+            if force or not self.is_cached(url):
+                self.get(url, force=force)
+                status = "fetched"
+            if follow is None:
+                return status, []
+            with open(self.get_cache_file(url)) as handle:
+                return status, follow(handle.read())
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            queue = collections.deque(urls)
+            while queue or pending:
+                while queue and len(pending) < workers * 4:
+                    url = queue.popleft()
+                    if url in seen:
+                        continue
+                    seen.add(url)
+                    future = executor.submit(task, url)
+                    future.url = url
+                    pending.add(future)
+                if not pending:
+                    continue
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    try:
+                        status, more = future.result()
+                    except (RuntimeError, requests.exceptions.RequestException) as exc:
+                        logger.warning("prefetch failed: %s: %s", future.url, exc)
+                        stats["failed"] += 1
+                        continue
+                    stats[status] += 1
+                    queue.extend(more)
+                    if stats[status] % 1000 == 0:
+                        logger.debug("prefetch: %s", dict(stats))
+
+        return stats
+
 
 def scrape_html_listing(url, with_head=False):
     """
@@ -421,6 +504,81 @@ def scrape_html_listing(url, with_head=False):
     return sorted(links)
 
 
+def ordered_pool_map(
+    func, iterable, workers=None, initializer=None, initargs=(), inflight=4
+):
+    """
+    Like map, but run func in a pool of `workers` processes (default: number
+    of CPUs). Yields results in input order. At most `inflight` items per
+    worker are submitted ahead, so the iterable is consumed lazily and memory
+    stays bounded. With workers=1, everything runs in this process.
+
+    Function, items and results must be picklable.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for item in iterable:
+            yield func(item)
+        return
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        pending = collections.deque()
+        for item in iterable:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= workers * inflight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def fanout(command, branches, bufsize=1 << 20):
+    """
+    Run a shell command and feed its standard output to the standard input of
+    each of the branch commands, like tee with process substitutions, but
+    wait for all commands to finish. Commands run in bash with pipefail.
+    Raises RuntimeError, if any command fails.
+    """
+
+    def bash(cmd, **kwargs):
+        return subprocess.Popen(["/bin/bash", "-o", "pipefail", "-c", cmd], **kwargs)
+
+    logger.debug("%s | fanout: %s", command, branches)
+    consumers = [bash(branch, stdin=subprocess.PIPE) for branch in branches]
+    producer = bash(command, stdout=subprocess.PIPE)
+    alive = list(consumers)
+    while alive:
+        chunk = producer.stdout.read(bufsize)
+        if not chunk:
+            break
+        for proc in list(alive):
+            try:
+                proc.stdin.write(chunk)
+            except BrokenPipeError:
+                alive.remove(proc)
+    # a failed producer is reported below, so just stop it, if we stopped early
+    if producer.poll() is None and not alive:
+        producer.kill()
+    producer.stdout.close()
+    for proc in consumers:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+    failed = [
+        (cmd, proc.wait())
+        for cmd, proc in zip([command] + branches, [producer] + consumers)
+    ]
+    failed = [(cmd, code) for cmd, code in failed if code != 0]
+    if failed:
+        raise RuntimeError(
+            "; ".join("%s exitcode: %s" % (cmd, code) for cmd, code in failed)
+        )
+
+
 def compare_files(a, b):
     """
     Compare two paths by sha1 checksum. Returns True, if files are
@@ -32,15 +32,18 @@
 import binascii
 import collections
 import datetime
+import hashlib
 import itertools
 import json
 import os
 import re
+import shlex
+import shutil
+import sys
 import tempfile
-import urllib
+import urllib.parse
 
 import luigi
-import rdflib
 import requests
 from bs4 import BeautifulSoup
 from dateutil.relativedelta import relativedelta
@@ -50,6 +53,18 @@ from gluish.parameter import ClosestDateParameter
 from gluish.utils import shellout
 
 from siskin.benchmark import timed
+from siskin.groupcover import groupcover
+from siskin.labelsplit import split_labels
+from siskin.multifile import MultiFileTarget, concat_files, link_file, zstd_padding
+from siskin.recordindex import RecordIndex, build_index
+from siskin.solrindex import (
+    commit,
+    delete_ids,
+    export_delta,
+    index_file,
+    write_fingerprints,
+)
+from siskin.solrquery import count_terms
 from siskin.sources.amsl import (
     AMSLFilterConfigFreeze,
     AMSLFreeContent,
@@ -86,7 +101,25 @@ from siskin.sources.osf import OSFExport, OSFIntermediateSchema
 from siskin.sources.thieme import ThiemeISSNList
 from siskin.sources.folio import FolioFilterConfigFreeze
 from siskin.task import DefaultTask
-from siskin.utils import URLCache, load_set_from_target
+from siskin.utils import URLCache, fanout, load_set_from_target
+from siskin.zstdseek import SeekableZstd
+
+
+def seekable_zstd(threads=0):
+    """
+    Return a command compressing stdin into seekable zstd, cf. siskin.zstdseek.
+    """
+    return "{} -m siskin.zstdseek -T{}".format(sys.executable, threads)
+
+
+def licensing_input(target):
+    """
+    Return the AILicensing file or the AILicensingSharded members, quoted for
+    a shell command, as zstd reads multiple files in a row.
+    """
+    if isinstance(target, MultiFileTarget):
+        return " ".join(shlex.quote(path) for path in target.members())
+    return shlex.quote(target.path)
 
 
 class AITask(DefaultTask):
@@ -97,12 +130,39 @@ class AITask(DefaultTask):
     def closest(self):
         return weekly(self.date)
 
+    def input_digest(self, content_limit=1 << 28):
+        """
+        Return a short digest of all inputs, or None, if an input does not
+        exist yet. Paths do not count, as AMSL lists are fetched to a new
+        dated path every day. Files up to content_limit bytes count with their
+        content, larger ones with size and modification time.
+        """
+        if getattr(self, "_input_digest", None):
+            return self._input_digest
+        digest = hashlib.sha1()
+        for target in luigi.task.flatten(self.input()):
+            if not os.path.exists(target.path):
+                return None
+            st = os.stat(target.path)
+            if st.st_size > content_limit:
+                digest.update(
+                    "stat\t{}\t{}\n".format(st.st_size, st.st_mtime_ns).encode("utf-8")
+                )
+                continue
+            digest.update("content\t{}\n".format(st.st_size).encode("utf-8"))
+            with open(target.path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        self._input_digest = digest.hexdigest()[:16]
+        return self._input_digest
+
 
 # Tasks for sigelage and deduplication, solr export and blob server export follow.
 #
 # AIIntermediateSchema (merge)
 # AIRedact (prepare file for blob)
 # AILicensing (apply licensing)
+# AIFusedPipeline (OA flag, redact and licensing in one pass)
 #
 # AILocalData                      |
 # AIInstitutionChanges             | (doi deduplication per isil)
@@ -113,32 +173,41 @@ class AITask(DefaultTask):
 # See also: https://git.io/JUTOO
 
 
+def ai_sources(date):
+    """
+    The intermediate schema tasks of the AI sources by name. Together they
+    make up AIIntermediateSchema, one shard per source.
+    """
+    # 02/2026, downsizing; deprecating various sources
+    # CeeolIntermediateSchema(stamp=True),
+    # DegruyterIntermediateSchema(date=self.date, stamp=True),
+    # GenderopenIntermediateSchema(date=self.date, stamp=True),
+    # LissaIntermediateSchema(date=self.date, stamp=True),
+    # ThiemeIntermediateSchema(date=self.date, stamp=True),
+    return {
+        "crossref": CrossrefIntermediateSchema(date=date, stamp=True),
+        "doaj": DOAJIntermediateSchema(date=date, stamp=True, format="doaj-oai"),
+        "jstor": JstorIntermediateSchemaCombined(date=date, stamp=True),
+        "olc": OLCIntermediateSchema(date=date, stamp=True),
+        "osf": OSFIntermediateSchema(date=date, stamp=True),
+        "ios": IOSIntermediateSchema(date=date, stamp=True),
+    }
+
+
 class AIIntermediateSchema(AITask):
     """
     Create an intermediate schema record from all AI sources. Everything that
     is put here, will pass along the ISIL attachment and deduplication
     pipeline.
 
-    All inputs must be zstd compressed.
+    All inputs must be zstd compressed. They are concatenated with reflinks or
+    copy_file_range, where the filesystem supports it.
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
 
     def requires(self):
-        # 02/2026, downsizing; deprecating various sources
-        # CeeolIntermediateSchema(stamp=True),
-        # DegruyterIntermediateSchema(date=self.date, stamp=True),
-        # GenderopenIntermediateSchema(date=self.date, stamp=True),
-        # LissaIntermediateSchema(date=self.date, stamp=True),
-        # ThiemeIntermediateSchema(date=self.date, stamp=True),
-        return [
-            CrossrefIntermediateSchema(date=self.date, stamp=True),
-            DOAJIntermediateSchema(date=self.date, stamp=True, format="doaj-oai"),
-            JstorIntermediateSchemaCombined(date=self.date, stamp=True),
-            OLCIntermediateSchema(date=self.date, stamp=True),
-            OSFIntermediateSchema(date=self.date, stamp=True),
-            IOSIntermediateSchema(date=self.date, stamp=True),
-        ]
+        return list(ai_sources(self.date).values())
 
     @timed
     def run(self):
@@ -156,9 +225,10 @@ class AIIntermediateSchema(AITask):
                         % (target.path, binascii.hexlify(head))
                     )
 
-        _, stopover = tempfile.mkstemp(prefix="siskin-")
-        for target in self.input():
-            shellout("cat {input} >> {output}", input=target.path, output=stopover)
+        paths = [target.path for target in self.input()]
+        stopover = self.stopover()
+        stats = concat_files(paths, stopover, pad=zstd_padding)
+        self.logger.debug("AIIntermediateSchema: %s", dict(stats))
         luigi.LocalTarget(stopover).move(self.output().path)
 
     def output(self):
@@ -167,24 +237,33 @@ class AIIntermediateSchema(AITask):
 
 class AIRedact(AITask):
     """
-    Redact intermediate schema.
+    Redact intermediate schema. Redaction runs in AIFusedPipeline, together
+    with the licensing AILocalData and friends use (drop, default style).
+    With --sharded, redact each source separately with AIShardRedact and
+    concatenate the shards.
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
+    sharded = luigi.BoolParameter(description="use AIShardRedact", significant=False)
 
     def requires(self):
-        return AIApplyOpenAccessFlag(date=self.date)
+        if self.sharded:
+            return {
+                name: AIShardRedact(date=self.date, source=name)
+                for name in ai_sources(self.date)
+            }
+        return AIFusedPipeline(date=self.date, drop=True)
 
     @timed
     def run(self):
-        """
-        A bit slower: jq 'del(.["x.fulltext"])' input > output
-        """
-        output = shellout(
-            "span-redact <(zstd -cd -T0 {input}) | zstd -c -T0 > {output}",
-            input=self.input().path,
-        )
-        luigi.LocalTarget(output).move(self.output().path)
+        stopover = self.stopover()
+        if self.sharded:
+            paths = [target.path for target in self.input().values()]
+            stats = concat_files(paths, stopover, pad=zstd_padding)
+            self.logger.debug("AIRedact: %s", dict(stats))
+        else:
+            link_file(self.input().get("redact").path, stopover)
+        luigi.LocalTarget(stopover).move(self.output().path)
 
     def output(self):
         return luigi.LocalTarget(path=self.path(ext="ldj.zst"), format=Zstd)
@@ -199,6 +278,8 @@ class AILicensing(AITask):
     Example crontab (assuming virtual environment named siskin):
 
         00 12  * * * source $HOME/.virtualenvs/siskin/bin/activate && taskdo AMSLFilterConfigFreeze --local-scheduler
+
+    Tagging runs in AIFusedPipeline, which also applies the OA flag.
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
@@ -210,7 +291,10 @@ class AILicensing(AITask):
         default="default", description="licensing style, e.g. default or reduced"
     )
 
-    def requires(self):
+    def filter_config(self):
+        """
+        The frozen AMSL filter config of the jour fixe.
+        """
         if self.override:
             jourfixe = self.date
         else:
@@ -219,32 +303,317 @@ class AILicensing(AITask):
                 jourfixe = jourfixe + relativedelta(months=-1)
 
         self.logger.debug("AILicensing date: %s (override=%s)", jourfixe, self.override)
+        return AMSLFilterConfigFreeze(date=jourfixe, style=self.style)
+
+    def requires(self):
+        return AIFusedPipeline(
+            date=self.date, override=self.override, drop=self.drop, style=self.style
+        )
+
+    def run(self):
+        stopover = self.stopover()
+        link_file(self.input().get("licensing").path, stopover)
+        luigi.LocalTarget(stopover).move(self.output().path)
+
+    def output(self):
+        return luigi.LocalTarget(path=self.path(ext="ldj.zst"), format=SeekableZstd)
+
+
+class AIShardLicensing(AITask):
+    """
+    Open access flag and licensing for the intermediate schema of a single
+    source, cf. AILicensingSharded. The output is named after a digest of
+    the inputs, so as long as source, licensing config and OA lists do not
+    change, the shard is reused, whatever the date.
+    """
+
+    cpu = 2
+
+    date = ClosestDateParameter(default=datetime.date.today())
+    source = luigi.Parameter(description="source name, e.g. crossref")
+    override = luigi.BoolParameter(
+        description="do not use jour fixe", significant=False
+    )
+    drop = luigi.BoolParameter(description="drop records w/o isil")
+    style = luigi.Parameter(
+        default="default", description="licensing style, e.g. default or reduced"
+    )
 
+    def requires(self):
+        sources = ai_sources(self.date)
+        if self.source not in sources:
+            raise ValueError(
+                "unknown source {}, use one of: {}".format(
+                    self.source, ", ".join(sources)
+                )
+            )
+        licensing = AILicensing(
+            date=self.date, override=self.override, drop=self.drop, style=self.style
+        )
         return {
-            "is": AIApplyOpenAccessFlag(date=self.date),
-            "config": AMSLFilterConfigFreeze(date=jourfixe, style=self.style),
+            "file": sources[self.source],
+            "config": licensing.filter_config(),
+            "amslfc": AMSLFreeContent(date=self.date),
+            "kbart": AMSLOpenAccessKBART(date=self.date),
         }
 
     def run(self):
-        """
-        A recent version of span might be required.
-        """
-        if self.drop:
-            output = shellout(
-                "span-tag -D -unfreeze {config} <(zstd -cd -T0 {input}) | zstd -c -T0 > {output}",
-                config=self.input().get("config").path,
-                input=self.input().get("is").path,
-            )
-        else:
-            output = shellout(
-                "span-tag -unfreeze {config} <(zstd -cd -T0 {input}) | zstd -c -T0 > {output}",
-                config=self.input().get("config").path,
-                input=self.input().get("is").path,
+        output = shellout(
+            """
+            zstd -cd -T{threads} {input} |
+            span-oa-filter -B -b 25000 -f {kbart} -fc {amslfc} -xsid 48 -oasid 28 -oasid 30 -oasid 34 |
+            span-tag {drop} -unfreeze {config} | {seekable} > {output}
+            """,
+            input=self.input().get("file").path,
+            kbart=self.input().get("kbart").path,
+            amslfc=self.input().get("amslfc").path,
+            drop="-D" if self.drop else "",
+            config=self.input().get("config").path,
+            threads=self.threads(),
+            seekable=seekable_zstd(self.threads()),
+        )
+        luigi.LocalTarget(output).move(self.output().path)
+
+    def output(self):
+        filename = "source-{}-drop-{}-style-{}-{}.ldj.zst".format(
+            self.source,
+            "true" if self.drop else "false",
+            self.style,
+            self.input_digest() or "pending",
+        )
+        return luigi.LocalTarget(path=self.path(filename=filename), format=SeekableZstd)
+
+
+class AIShardRedact(AITask):
+    """
+    Open access flag and redaction for the intermediate schema of a single
+    source, cf. AIRedact --sharded. Named after a digest of the inputs, like
+    AIShardLicensing.
+    """
+
+    cpu = 2
+
+    date = ClosestDateParameter(default=datetime.date.today())
+    source = luigi.Parameter(description="source name, e.g. crossref")
+
+    def requires(self):
+        sources = ai_sources(self.date)
+        if self.source not in sources:
+            raise ValueError(
+                "unknown source {}, use one of: {}".format(
+                    self.source, ", ".join(sources)
+                )
             )
+        return {
+            "file": sources[self.source],
+            "amslfc": AMSLFreeContent(date=self.date),
+            "kbart": AMSLOpenAccessKBART(date=self.date),
+        }
+
+    def run(self):
+        output = shellout(
+            """
+            zstd -cd -T{threads} {input} |
+            span-oa-filter -B -b 25000 -f {kbart} -fc {amslfc} -xsid 48 -oasid 28 -oasid 30 -oasid 34 |
+            span-redact /dev/stdin | zstd -c -T{threads} > {output}
+            """,
+            input=self.input().get("file").path,
+            kbart=self.input().get("kbart").path,
+            amslfc=self.input().get("amslfc").path,
+            threads=self.threads(),
+        )
         luigi.LocalTarget(output).move(self.output().path)
 
     def output(self):
-        return luigi.LocalTarget(path=self.path(ext="ldj.zst"), format=Zstd)
+        filename = "source-{}-{}.ldj.zst".format(
+            self.source, self.input_digest() or "pending"
+        )
+        return luigi.LocalTarget(path=self.path(filename=filename), format=Zstd)
+
+
+class AILicensingSharded(AITask):
+    """
+    Like AILicensing, but one file per source, listed in a manifest. A new
+    version of one source only reprocesses that source.
+    """
+
+    date = ClosestDateParameter(default=datetime.date.today())
+    override = luigi.BoolParameter(
+        description="do not use jour fixe", significant=False
+    )
+    drop = luigi.BoolParameter(description="drop records w/o isil")
+    style = luigi.Parameter(
+        default="default", description="licensing style, e.g. default or reduced"
+    )
+
+    def requires(self):
+        return {
+            name: AIShardLicensing(
+                date=self.date,
+                source=name,
+                override=self.override,
+                drop=self.drop,
+                style=self.style,
+            )
+            for name in ai_sources(self.date)
+        }
+
+    def run(self):
+        self.output().write([target.path for target in self.input().values()])
+
+    def output(self):
+        return MultiFileTarget(path=self.path(ext="ldj.zst.manifest"))
+
+
+class AILicensingIndex(AITask):
+    """
+    Frame index of AILicensing by source id and ISIL, cf. AILicensingSubset.
+    """
+
+    date = ClosestDateParameter(default=datetime.date.today())
+    drop = luigi.BoolParameter(description="drop records w/o isil")
+    style = luigi.Parameter(
+        default="default", description="licensing style, e.g. default or reduced"
+    )
+    processes = luigi.IntParameter(
+        default=os.cpu_count() or 1, description="processes", significant=False
+    )
+
+    @property
+    def cpu(self):
+        # reserve one core per process
+        return self.processes
+
+    def requires(self):
+        return AILicensing(date=self.date, drop=self.drop, style=self.style)
+
+    def run(self):
+        stopover = self.stopover()
+        n = build_index(self.input().path, stopover, workers=self.processes)
+        self.logger.debug("%d index keys", n)
+        luigi.LocalTarget(stopover).move(self.output().path)
+
+    def output(self):
+        return luigi.LocalTarget(path=self.path(ext="json"))
+
+
+class AILicensingSubset(AITask):
+    """
+    All AILicensing records of a source, an ISIL or both, decompressing only
+    the frames, that contain them.
+
+        $ taskcat AILicensingSubset --source 49 --isil DE-15 | head
+    """
+
+    date = ClosestDateParameter(default=datetime.date.today())
+    drop = luigi.BoolParameter(description="drop records w/o isil")
+    style = luigi.Parameter(
+        default="default", description="licensing style, e.g. default or reduced"
+    )
+    source = luigi.Parameter(default="", description="finc.source_id")
+    isil = luigi.Parameter(default="", description="ISIL")
+
+    def requires(self):
+        return AILicensingIndex(date=self.date, drop=self.drop, style=self.style)
+
+    def run(self):
+        if not self.source and not self.isil:
+            raise RuntimeError("source or isil required")
+        index = RecordIndex(self.input().path)
+        with self.output().open("w") as output:
+            for line in index.records(
+                source=self.source or None, isil=self.isil or None
+            ):
+                output.write(line)
+
+    def output(self):
+        return luigi.LocalTarget(path=self.path(ext="ldj.zst"), format=SeekableZstd)
+
+
+class AIFusedPipeline(AITask):
+    """
+    AIApplyOpenAccessFlag, AIRedact and AILicensing in a single pass over
+    AIIntermediateSchema: decompress once, apply the OA flag, then feed the
+    records to span-redact and span-tag at the same time.
+
+    AILicensing and AIRedact link to the outputs. Redaction does not depend
+    on licensing parameters, so it only runs for the variant AIRedact asks
+    for (drop, default style). The OA flagged file is written only with
+    --keep-oa.
+    """
+
+    cpu = 8
+
+    date = ClosestDateParameter(default=datetime.date.today())
+    override = luigi.BoolParameter(
+        description="do not use jour fixe", significant=False
+    )
+    drop = luigi.BoolParameter(description="drop records w/o isil")
+    style = luigi.Parameter(
+        default="default", description="licensing style, e.g. default or reduced"
+    )
+    keep_oa = luigi.BoolParameter(
+        description="keep AIApplyOpenAccessFlag output", significant=False
+    )
+
+    @property
+    def redact(self):
+        return self.drop and self.style == "default"
+
+    def requires(self):
+        oa = AIApplyOpenAccessFlag(date=self.date).requires()
+        licensing = AILicensing(
+            date=self.date, override=self.override, drop=self.drop, style=self.style
+        )
+        return dict(oa, config=licensing.filter_config())
+
+    @timed
+    def run(self):
+        outputs = self.output()
+        stopovers = {name: self.stopover() for name in outputs}
+        threads = self.threads()
+        branches = [
+            "span-tag {} -unfreeze {} | {} > {}".format(
+                "-D" if self.drop else "",
+                self.input().get("config").path,
+                seekable_zstd(threads),
+                stopovers["licensing"],
+            ),
+        ]
+        if self.redact:
+            branches.append(
+                "span-redact /dev/stdin | zstd -c -T{} > {}".format(
+                    threads, stopovers["redact"]
+                )
+            )
+        if self.keep_oa:
+            branches.append("zstd -c -T{} > {}".format(threads, stopovers["oa"]))
+        fanout(
+            """zstd -cd -T{threads} {input} |
+            span-oa-filter -B -b 25000 -f {kbart} -fc {amslfc} -xsid 48 -oasid 28 -oasid 30 -oasid 34""".format(
+                threads=threads,
+                input=self.input().get("file").path,
+                kbart=self.input().get("kbart").path,
+                amslfc=self.input().get("amslfc").path,
+            ),
+            branches,
+        )
+        for name, target in outputs.items():
+            luigi.LocalTarget(stopovers[name]).move(target.path)
+
+    def output(self):
+        outputs = {
+            "licensing": luigi.LocalTarget(
+                path=self.path(ext="licensing.ldj.zst"), format=SeekableZstd
+            ),
+        }
+        if self.redact:
+            outputs["redact"] = luigi.LocalTarget(
+                path=self.path(ext="redact.ldj.zst"), format=Zstd
+            )
+        if self.keep_oa:
+            outputs["oa"] = AIApplyOpenAccessFlag(date=self.date).output()
+        return outputs
 
 
 class AILocalData(AITask):
@@ -252,27 +621,35 @@ class AILocalData(AITask):
     Extract a CSV about source, id, doi and institutions for deduplication.
     """
 
+    cpu = 2
+
     date = ClosestDateParameter(default=datetime.date.today())
     batchsize = luigi.IntParameter(default=25000, significant=False)
     style = luigi.Parameter(
         default="default", description="licensing style, e.g. default or reduced"
     )
+    sharded = luigi.BoolParameter(
+        description="use AILicensingSharded", significant=False
+    )
 
     def requires(self):
+        if self.sharded:
+            return AILicensingSharded(date=self.date, drop=True, style=self.style)
         return AILicensing(date=self.date, drop=True, style=self.style)
 
     def run(self):
         """
-        Unzip on the fly, extract fields as CSV, sort be third column.
+        Unzip on the fly, extract fields as CSV. AIInstitutionChanges sorts or
+        partitions by DOI, as needed.
         """
         output = shellout(
             """
-            zstd -cd -T0 {input} |
-            span-local-data -b {size} |
-            LC_ALL=C sort --ignore-case -S20% -t, -k3 > {output}
+            zstd -cd -T{threads} {input} |
+            span-local-data -b {size} > {output}
             """,
             size=self.batchsize,
-            input=self.input().path,
+            threads=self.threads(),
+            input=licensing_input(self.input()),
         )
         luigi.LocalTarget(output).move(self.output().path)
 
@@ -283,25 +660,65 @@ class AILocalData(AITask):
 class AIInstitutionChanges(AITask):
     """
     Calculate institution changes based on DOI duplicates. Experimental, using
-    https://github.com/miku/groupcover with preferences.
+    https://github.com/miku/groupcover with preferences. With --partition,
+    siskin.groupcover groups hash partitioned buckets in parallel instead of
+    sorting; it has not been compared with groupcover on production data yet.
     """
 
+    memory = "20%"
+
+    # Source ids, most preferred last.
+    prefs = "85 55 89 60 50 105 101 53 49 28 48 121"
+
     date = ClosestDateParameter(default=datetime.date.today())
     style = luigi.Parameter(
         default="default", description="licensing style, e.g. default or reduced"
     )
+    sharded = luigi.BoolParameter(
+        description="use AILicensingSharded", significant=False
+    )
+    buckets = luigi.IntParameter(
+        default=256, description="number of partitions", significant=False
+    )
+    processes = luigi.IntParameter(
+        default=os.cpu_count() or 1, description="processes", significant=False
+    )
+    partition = luigi.BoolParameter(
+        description="group hash partitions with siskin.groupcover, experimental",
+        significant=False,
+    )
+
+    @property
+    def cpu(self):
+        # reserve one core per process
+        return self.processes if self.partition else 1
 
     def requires(self):
-        return AILocalData(date=self.date, style=self.style)
+        return AILocalData(date=self.date, style=self.style, sharded=self.sharded)
 
     def run(self):
-        output = shellout(
-            """
-            groupcover -lower -prefs '85 55 89 60 50 105 101 53 49 28 48 121' < {input} > {output}
-            """,
-            input=self.input().path,
+        if not self.partition:
+            output = shellout(
+                """
+                LC_ALL=C sort --ignore-case -S{size} -t, -k3 {input} |
+                groupcover -lower -prefs '{prefs}' > {output}
+                """,
+                size=self.sort_buffer(),
+                prefs=self.prefs,
+                input=self.input().path,
+            )
+            luigi.LocalTarget(output).move(self.output().path)
+            return
+        stopover = self.stopover()
+        n = groupcover(
+            self.input().path,
+            stopover,
+            prefs=self.prefs.split(),
+            buckets=self.buckets,
+            workers=self.processes,
         )
-        luigi.LocalTarget(output).move(self.output().path)
+        self.logger.debug("%d institution changes", n)
+        luigi.LocalTarget(stopover).move(self.output().path)
 
     def output(self):
         return luigi.LocalTarget(path=self.path(), format=TSV)
@@ -312,15 +729,26 @@ class AIIntermediateSchemaDeduplicated(AITask):
     A DOI deduplicated version of the intermediate schema. Experimental.
     """
 
+    cpu = 2
+
     date = ClosestDateParameter(default=datetime.date.today())
     style = luigi.Parameter(
         default="default", description="licensing style, e.g. default or reduced"
     )
+    sharded = luigi.BoolParameter(
+        description="use AILicensingSharded", significant=False
+    )
 
     def requires(self):
+        if self.sharded:
+            licensing = AILicensingSharded(date=self.date, drop=True, style=self.style)
+        else:
+            licensing = AILicensing(date=self.date, drop=True, style=self.style)
         return {
-            "changes": AIInstitutionChanges(date=self.date, style=self.style),
-            "file": AILicensing(date=self.date, drop=True, style=self.style),
+            "changes": AIInstitutionChanges(
+                date=self.date, style=self.style, sharded=self.sharded
+            ),
+            "file": licensing,
         }
 
     def run(self):
@@ -330,10 +758,11 @@ class AIIntermediateSchemaDeduplicated(AITask):
         """
         output = shellout(
             """
-            zstd -cd -T0 {input} |
-            span-update-labels -b 20000 -f <(cut -d, -f1,4- {file}) | zstd -c -T0 > {output}
+            zstd -cd -T{threads} {input} |
+            span-update-labels -b 20000 -f <(cut -d, -f1,4- {file}) | zstd -c -T{threads} > {output}
             """,
-            input=self.input().get("file").path,
+            input=licensing_input(self.input().get("file")),
+            threads=self.threads(),
             file=self.input().get("changes").path,
         )
         luigi.LocalTarget(output).move(self.output().path)
@@ -345,6 +774,8 @@ class AIIntermediateSchemaDeduplicated(AITask):
 class AILicensingViaFolio(AITask):
     """ """
 
+    cpu = 4
+
     date = ClosestDateParameter(default=datetime.date.today())
     drop = luigi.BoolParameter(description="drop records w/o isil")
 
@@ -360,11 +791,12 @@ class AILicensingViaFolio(AITask):
         )  # keep only records with at least one ISIL
         output = shellout(
             """
-            zstdcat -T0 {input} | span-tag {extra_flags} -unfreeze {config} | zstd -c -T0 > {output}
+            zstdcat -T{threads} {input} | span-tag {extra_flags} -unfreeze {config} | zstd -c -T{threads} > {output}
         """,
             input=self.input().get("data"),
             config=self.input().get("config"),
             extra_flags=extra_flags,
+            threads=self.threads(),
         )
         luigi.LocalTarget(output).move(self.output().path)
 
@@ -378,6 +810,9 @@ class AIExport(AITask):
     indexing. Each source handles its own licensing and solr export.
 
     With 8 workers, it takes about 16h to index (1 shard, 3 replica).
+
+    Like AIIntermediateSchema, the exports are concatenated without copying
+    where possible.
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
@@ -394,20 +829,167 @@ class AIExport(AITask):
         }
 
     def run(self):
-        _, tmp = tempfile.mkstemp(prefix="siskin-")
-        for _, target in self.input().items():
-            shellout(
-                """cat {input} >> {output}""",
-                input=target.path,
-                output=tmp,
-            )
-        luigi.LocalTarget(tmp).move(self.output().path)
+        paths = [target.path for _, target in self.input().items()]
+        stopover = self.stopover()
+        stats = concat_files(paths, stopover, pad=zstd_padding)
+        self.logger.debug("AIExport: %s", dict(stats))
+        luigi.LocalTarget(stopover).move(self.output().path)
         self.create_symlink("latest")
 
     def output(self):
         return luigi.LocalTarget(path=self.path(ext="zst"), format=Zstd)
 
 
+class AISolrIndex(AITask):
+    """
+    Index AIExport into a solr core, --solr defaults to ai-solr from the
+    configuration. Batches are posted in parallel and progress is
+    checkpointed, so a rerun after a failure continues where it stopped.
+    Output are the indexing statistics.
+    """
+
+    date = ClosestDateParameter(default=datetime.date.today())
+    solr = luigi.Parameter(default="", description="solr core URL", significant=False)
+    connections = luigi.IntParameter(
+        default=8, description="concurrent requests", significant=False
+    )
+    batch_size = luigi.IntParameter(
+        default=2000, description="max documents per request", significant=False
+    )
+    batch_bytes = luigi.IntParameter(
+        default=1 << 23, description="max bytes per request", significant=False
+    )
+
+    def requires(self):
+        return AIExport(date=self.date)
+
+    def run(self):
+        solr = self.solr or self.config.get("ai", "ai-solr")
+        checkpoint = self.output().path + ".checkpoint"
+        stats = index_file(
+            self.input().path,
+            solr.rstrip("/"),
+            workers=self.connections,
+            max_docs=self.batch_size,
+            max_bytes=self.batch_bytes,
+            checkpoint=checkpoint,
+        )
+        self.logger.info("indexed into %s: %s", solr, stats)
+        with self.output().open("w") as output:
+            for key, value in stats.items():
+                output.write_tsv(key, str(value))
+        os.remove(checkpoint)
+
+    def output(self):
+        return luigi.LocalTarget(path=self.path(), format=TSV)
+
+
+class AIExportFingerprints(AITask):
+    """
+    Id, content hash and offset of each AIExport document, sorted by id.
+    """
+
+    memory = "25%"
+
+    date = ClosestDateParameter(default=datetime.date.today())
+
+    def requires(self):
+        return AIExport(date=self.date)
+
+    def run(self):
+        stopover = self.stopover()
+        n = write_fingerprints(
+            self.input().path, stopover, buffer_size=self.sort_buffer()
+        )
+        self.logger.debug("fingerprinted %d documents", n)
+        luigi.LocalTarget(stopover).move(self.output().path)
+
+    def output(self):
+        return luigi.LocalTarget(path=self.path(ext="tsv"), format=TSV)
+
+
+class AISolrIndexDelta(AITask):
+    """
+    Index only the documents, that changed since the last run of this task,
+    and delete the ones, that are gone. The fingerprints of the last indexed
+    export are kept in the task directory; without them, everything is
+    indexed (but nothing deleted), so start with an empty or freshly indexed
+    core. Output are the indexing statistics.
+    """
+
+    memory = "25%"
+
+    date = ClosestDateParameter(default=datetime.date.today())
+    solr = luigi.Parameter(default="", description="solr core URL", significant=False)
+    connections = luigi.IntParameter(
+        default=8, description="concurrent requests", significant=False
+    )
+    batch_size = luigi.IntParameter(
+        default=2000, description="max documents per request", significant=False
+    )
+    batch_bytes = luigi.IntParameter(
+        default=1 << 23, description="max bytes per request", significant=False
+    )
+
+    def requires(self):
+        return {
+            "export": AIExport(date=self.date),
+            "fingerprints": AIExportFingerprints(date=self.date),
+        }
+
+    def indexed_fingerprints(self):
+        return os.path.join(self.taskdir(), "indexed-fingerprints.tsv")
+
+    def run(self):
+        solr = (self.solr or self.config.get("ai", "ai-solr")).rstrip("/")
+        indexed = self.indexed_fingerprints()
+        old = indexed if os.path.exists(indexed) else None
+        if old is None:
+            self.logger.warning("no fingerprints of a previous run, indexing all")
+
+        # The delta is reproducible, so the checkpoint stays valid on rerun.
+        delta, deletes = self.output().path + ".delta", self.output().path + ".deletes"
+        checkpoint = self.output().path + ".checkpoint"
+        os.makedirs(self.taskdir(), exist_ok=True)
+        stats = export_delta(
+            self.input()["export"].path,
+            old,
+            self.input()["fingerprints"].path,
+            delta,
+            deletes,
+            buffer_size=self.sort_buffer(),
+        )
+        stats.update(
+            index_file(
+                delta,
+                solr,
+                workers=self.connections,
+                max_docs=self.batch_size,
+                max_bytes=self.batch_bytes,
+                checkpoint=checkpoint,
+                final_commit=False,
+            )
+        )
+        sess = requests.Session()
+        with open(deletes) as handle:
+            ids = (line.rstrip("\n") for line in handle)
+            stats["deleted"] = delete_ids(sess, solr, ids, batch_size=self.batch_size)
+        commit(sess, solr)
+
+        stopover = self.stopover()
+        shutil.copyfile(self.input()["fingerprints"].path, stopover)
+        os.replace(stopover, indexed)
+        self.logger.info("indexed delta into %s: %s", solr, dict(stats))
+        with self.output().open("w") as output:
+            for key, value in sorted(stats.items()):
+                output.write_tsv(key, str(value))
+        for path in (delta, deletes, checkpoint):
+            os.remove(path)
+
+    def output(self):
+        return luigi.LocalTarget(path=self.path(), format=TSV)
+
+
 class AIUpdate(AITask, luigi.WrapperTask):
     """
     A wrapper task for updates, refs #5702.
@@ -419,7 +1001,7 @@ class AIUpdate(AITask, luigi.WrapperTask):
     )
 
     def requires(self):
-        return [AIExport(date=self.date, style=self.style), AIRedact(date=self.date)]
+        return [AIExport(date=self.date), AIRedact(date=self.date)]
 
     def output(self):
         return self.input()
@@ -431,7 +1013,7 @@ class AIUpdate(AITask, luigi.WrapperTask):
 
 class AIDOIStats(AITask):
     """
-    DOI overlaps between various sources.
+    DOI overlaps between various sources, compared lowercase.
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
@@ -448,8 +1030,8 @@ class AIDOIStats(AITask):
     def run(self):
         with self.output().open("w") as output:
             for k1, k2 in itertools.combinations(list(self.input().keys()), 2):
-                s1 = load_set_from_target(self.input().get(k1))
-                s2 = load_set_from_target(self.input().get(k2))
+                s1 = load_set_from_target(self.input().get(k1), func=str.lower)
+                s2 = load_set_from_target(self.input().get(k2), func=str.lower)
                 output.write_tsv(
                     k1, k2, str(len(s1)), str(len(s2)), str(len(s1.intersection(s2)))
                 )
@@ -515,7 +1097,7 @@ class AIISSNOverlaps(AITask):
 
 class AICollectionsAndSerialNumbers(AITask):
     """
-    Turtlized coverage report, ..., refs #5156.
+    Coverage report as N-Triples, ..., refs #5156.
 
     XXX: The collection names are not that uniform. Would need to extract those
     names from AMSL - however, the raw data contains these names ...
@@ -528,44 +1110,47 @@ class AICollectionsAndSerialNumbers(AITask):
 
     def run(self):
         """
-        Create a graph with two namespaces.
+        Write each distinct collection, ISSN pair as a triple, as soon as it
+        is seen, as N-Triples. Only the pairs are kept in memory. Lines are
+        bytes, decompressed in process.
         """
-        g = rdflib.Graph()
-        ns = {
-            "amsl": rdflib.Namespace("http://amsl.technology/"),
-            "disco": rdflib.Namespace(
-                "http://amsl.technology/discovery/Metadatenkollektion/"
-            ),
-        }
-
-        p = ns["amsl"].coveredMediumID
-        disco = ns["disco"]
+        disco = "http://amsl.technology/discovery/Metadatenkollektion/"
+        predicate = "<http://amsl.technology/coveredMediumID>"
+        seen = set()
 
-        with self.input().open() as handle:
-            for i, line in enumerate(handle):
-                if i % 100000 == 0:
-                    self.logger.debug("%s %s", i, len(g))
-
-                doc = json.loads(line)
-                issns = list(
-                    itertools.chain(doc.get("rft.issn", []), doc.get("rft.eissn", []))
-                )
-                colls = doc.get("finc.mega_collection", [])
-
-                for issn in issns:
-                    for c in colls:
-                        s = disco[urllib.quote(c.encode("utf-8"))]
-
-                        uri = "urn:ISSN:%s" % urllib.quote(issn)
-                        o = rdflib.URIRef(uri.strip())
-
-                        g.add((s, p, o))
+        source = luigi.LocalTarget(self.input().path, format=SeekableZstd)
+        with source.open() as handle:
+            with self.output().open("w") as output:
+                for i, line in enumerate(handle):
+                    if i % 1000000 == 0:
+                        self.logger.debug("%s %s", i, len(seen))
+                    if b"issn" not in line:
+                        continue
+                    doc = json.loads(line)
+                    issns = list(
+                        itertools.chain(
+                            doc.get("rft.issn", []), doc.get("rft.eissn", [])
+                        )
+                    )
+                    colls = doc.get("finc.mega_collection", [])
 
-        with self.output().open("w") as output:
-            output.write(g.serialize(format="turtle"))
+                    for issn in issns:
+                        for c in colls:
+                            if (c, issn) in seen:
+                                continue
+                            seen.add((c, issn))
+                            output.write(
+                                "<%s%s> %s <urn:ISSN:%s> .\n"
+                                % (
+                                    disco,
+                                    urllib.parse.quote(c),
+                                    predicate,
+                                    urllib.parse.quote(issn.strip()),
+                                )
+                            )
 
     def output(self):
-        return luigi.LocalTarget(path=self.path(ext="ttl"))
+        return luigi.LocalTarget(path=self.path(ext="nt"))
 
 
 class AICoverageISSN(AITask):
@@ -661,6 +1246,9 @@ class AIISSNCoverageCatalogMatches(AITask):
 
     date = ClosestDateParameter(default=datetime.date.today())
     isil = luigi.Parameter(default="DE-15")
+    connections = luigi.IntParameter(
+        default=4, description="concurrent requests", significant=False
+    )
 
     def requires(self):
         return AICoverageISSN(date=self.date, isil=self.isil)
@@ -673,43 +1261,69 @@ class AIISSNCoverageCatalogMatches(AITask):
         adapter = requests.adapters.HTTPAdapter(max_retries=3)
         cache.sess.mount("http://", adapter)
 
+        def result_page(issn):
+            return (
+                "https://katalog.ub.uni-leipzig.de/Search/Results?lookfor=%s&type=ISN"
+                % issn
+            )
+
         with self.input().open() as handle:
-            with self.output().open("w") as output:
-                for i, row in enumerate(handle.iter_tsv(cols=("issn", "status"))):
-                    if row.status == "NOT_FOUND":
-                        link = (
-                            "https://katalog.ub.uni-leipzig.de/Search/Results?lookfor=%s&type=ISN"
-                            % row.issn
-                        )
-                        self.logger.info("fetch #%05d: %s" % (i, link))
-                        body = cache.get(link)
-                        if "Keine Ergebnisse!" in body:
-                            output.write_tsv(row.issn, "ERR_NOT_IN_CATALOG", link)
-                        else:
-                            soup = BeautifulSoup(body)
-                            rs = soup.findAll("div", {"class": "floatleft"})
-                            if len(rs) == 0:
-                                output.write_tsv(row.issn, "ERR_LAYOUT", link)
-                                continue
-                            first = rs[0]
-                            match = re.search(
-                                r"Treffer([0-9]+)-([0-9]+)von([0-9]+)", first.text
-                            )
-                            if match:
-                                total = match.group(3)
-                                output.write_tsv(
-                                    row.issn, "FOUND_RESULTS_%s" % total, link
-                                )
-                            else:
-                                output.write_tsv(row.issn, "ERR_NO_MATCH", link)
+            rows = list(handle.iter_tsv(cols=("issn", "status")))
+
+        # Result pages cannot be batched, but they can be fetched concurrently.
+        links = [result_page(row.issn) for row in rows if row.status == "NOT_FOUND"]
+        stats = cache.prefetch(links, workers=self.connections)
+        self.logger.debug("prefetched %d result pages: %s", len(links), dict(stats))
+
+        with self.output().open("w") as output:
+            for row in rows:
+                if row.status != "NOT_FOUND":
+                    continue
+                link = result_page(row.issn)
+                body = cache.get(link)
+                if "Keine Ergebnisse!" in body:
+                    output.write_tsv(row.issn, "ERR_NOT_IN_CATALOG", link)
+                    continue
+                soup = BeautifulSoup(body)
+                rs = soup.findAll("div", {"class": "floatleft"})
+                if len(rs) == 0:
+                    output.write_tsv(row.issn, "ERR_LAYOUT", link)
+                    continue
+                match = re.search(r"Treffer([0-9]+)-([0-9]+)von([0-9]+)", rs[0].text)
+                if match:
+                    output.write_tsv(
+                        row.issn, "FOUND_RESULTS_%s" % match.group(3), link
+                    )
+                else:
+                    output.write_tsv(row.issn, "ERR_NO_MATCH", link)
 
     def output(self):
         return luigi.LocalTarget(path=self.path(), format=TSV)
 
 
 class AIISSNCoverageSolrMatches(AITask):
+    """
+    Number of documents per ISSN of the holding file in the finc index (for
+    ISSNs not found in AI) or in the AI index. ISSNs are counted in batches,
+    with a few concurrent requests.
+
+    Example output:
+
+    finc    0171-4880   12  http://.../select?q=institution:DE-15+AND+issn:0171-4880&wt=json
+    ai      0171-5801   3   http://.../select?q=institution:DE-15+AND+issn:0171-5801&wt=json
+    """
+
     date = ClosestDateParameter(default=datetime.date.today())
     isil = luigi.Parameter(default="DE-15")
+    batch_size = luigi.IntParameter(
+        default=200, description="ISSNs per request", significant=False
+    )
+    connections = luigi.IntParameter(
+        default=4, description="concurrent requests", significant=False
+    )
+    rate = luigi.FloatParameter(
+        default=10, description="max requests per second", significant=False
+    )
 
     def requires(self):
         return AICoverageISSN(date=self.date, isil=self.isil)
@@ -718,38 +1332,36 @@ class AIISSNCoverageSolrMatches(AITask):
         if self.isil != "DE-15":
             raise RuntimeError("not implemented except for DE-15")
 
-        cache = URLCache(directory=os.path.join(tempfile.gettempdir(), ".urlcache"))
-        adapter = requests.adapters.HTTPAdapter(max_retries=3)
-        cache.sess.mount("http://", adapter)
-
-        finc = self.config.get("ai", "finc-solr")
-        ai = self.config.get("ai", "ai-solr")
-
-        def numFound(link):
-            """Given a SOLR query URL, return the number of docs found."""
-            body = cache.get(link)
-            content = json.loads(body)
-            return content["response"]["numFound"]
-
+        indices = {
+            "finc": self.config.get("ai", "finc-solr"),
+            "ai": self.config.get("ai", "ai-solr"),
+        }
         with self.input().open() as handle:
-            with self.output().open("w") as output:
-                for i, row in enumerate(handle.iter_tsv(cols=("issn", "status"))):
-                    if row.status == "NOT_FOUND":
-                        link = "%s/select?q=institution:%s+AND+issn:%s&wt=json" % (
-                            finc,
-                            self.isil,
-                            row.issn,
-                        )
-                        self.logger.info("fetch #%05d: %s", i, link)
-                        output.write_tsv("finc", row.issn, numFound(link), link)
-                    else:
-                        link = "%s/select?q=institution:%s+AND+issn:%s&wt=json" % (
-                            ai,
-                            self.isil,
-                            row.issn,
-                        )
-                        self.logger.info("fetch #%05d: %s", i, link)
-                        output.write_tsv("ai", row.issn, numFound(link), link)
+            rows = [
+                ("finc" if row.status == "NOT_FOUND" else "ai", row.issn)
+                for row in handle.iter_tsv(cols=("issn", "status"))
+            ]
+
+        counts = {}
+        for name, solr in indices.items():
+            counts[name] = count_terms(
+                solr,
+                "issn",
+                [issn for index, issn in rows if index == name],
+                fq=["institution:%s" % self.isil],
+                batch_size=self.batch_size,
+                workers=self.connections,
+                rate=self.rate,
+            )
+
+        with self.output().open("w") as output:
+            for name, issn in rows:
+                link = "%s/select?q=institution:%s+AND+issn:%s&wt=json" % (
+                    indices[name],
+                    self.isil,
+                    issn,
+                )
+                output.write_tsv(name, issn, str(counts[name][issn]), link)
 
     def output(self):
         return luigi.LocalTarget(path=self.path(), format=TSV)
@@ -764,6 +1376,8 @@ class AIApplyOpenAccessFlag(AITask):
     3. Gold-OA
     """
 
+    cpu = 2
+
     date = ClosestDateParameter(default=datetime.date.today())
 
     def requires(self):
@@ -785,10 +1399,11 @@ class AIApplyOpenAccessFlag(AITask):
 
         output = shellout(
             """
-            zstd -cd -T0 {input} |
+            zstd -cd -T{threads} {input} |
             span-oa-filter -B -b 25000 -f {kbart} -fc {amslfc} -xsid 48 -oasid 28 -oasid 30 -oasid 34 |
-            zstd -c -T0 > {output}""",
+            zstd -c -T{threads} > {output}""",
             input=self.input().get("file").path,
+            threads=self.threads(),
             kbart=self.input().get("kbart").path,
             amslfc=self.input().get("amslfc").path,
         )
@@ -798,29 +1413,58 @@ class AIApplyOpenAccessFlag(AITask):
         return luigi.LocalTarget(path=self.path(ext="ldj.zst"), format=Zstd)
 
 
-class AIDOIList(AITask):
+class AISplitByISIL(AITask):
     """
-    List of DOI for a given ISIL,
-
-    taskcat AILicensing | jq -r 'select(.["x.labels"][]? | contains ("DE-15")) | .doi?'
+    Split AILicensing into one DOI list (kind=doi) or one zstd compressed
+    record file (kind=record) per ISIL, in a single pass. Output is a TSV of
+    ISIL, number of lines and path.
     """
 
     date = ClosestDateParameter(default=datetime.date.today())
-    isil = luigi.Parameter(default="DE-15")
+    kind = luigi.ChoiceParameter(choices=["doi", "record"], default="doi")
 
     def requires(self):
         return AILicensing(date=self.date)
 
     def run(self):
-        output = shellout(
-            """
-            zstd -cd -T0 {input} |
-            jq -r 'select(.["x.labels"][]? | contains ("{isil}")) | .doi?' > {output}
-            """,
-            input=self.input().path,
-            isil=self.isil,
+        directory = os.path.join(self.taskdir(), "%s-%s" % (self.kind, self.date))
+        os.makedirs(directory, exist_ok=True)
+        parts = split_labels(
+            self.input().path,
+            directory,
+            kind=self.kind,
+            ext="zst" if self.kind == "record" else None,
         )
-        luigi.LocalTarget(output).move(self.output().path)
+        with self.output().open("w") as output:
+            for isil, (path, n) in parts.items():
+                output.write_tsv(isil, str(n), path)
+
+    def output(self):
+        return luigi.LocalTarget(path=self.path(), format=TSV)
+
+
+class AIDOIList(AITask):
+    """
+    List of DOI for a given ISIL, from the DOI lists of all ISIL, which are
+    created together by AISplitByISIL.
+    """
+
+    date = ClosestDateParameter(default=datetime.date.today())
+    isil = luigi.Parameter(default="DE-15")
+
+    def requires(self):
+        return AISplitByISIL(date=self.date, kind="doi")
+
+    def run(self):
+        stopover = self.stopover()
+        with self.input().open() as handle:
+            for row in handle.iter_tsv(cols=("isil", "n", "path")):
+                if row.isil == self.isil:
+                    shutil.copyfile(row.path, stopover)
+                    break
+            else:
+                self.logger.warning("no records for %s", self.isil)
+        luigi.LocalTarget(stopover).move(self.output().path)
 
     def output(self):
         return luigi.LocalTarget(path=self.path(ext="tsv"))
@@ -0,0 +1,433 @@
+# coding: utf-8
+# pylint: disable=C0103,C0301
+
+# Copyright 2026 by Leipzig University Library, http://ub.uni-leipzig.de
+#                   The Finc Authors, http://finc.info
+#
+# This file is part of some open source application.
+#
+# Some open source application is free software: you can redistribute
+# it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# Some open source application is distributed in the hope that it will
+# be useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Foobar.  If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+"""
+Seekable zstd files.
+
+* https://github.com/facebook/zstd/blob/dev/contrib/seekable_format/zstd_seekable_compression_format.md
+
+The data is cut into independent frames of about frame_size bytes, ending
+at a newline, and a seek table with the compressed and decompressed size of
+each frame is appended as a skippable frame. Every zstd decoder (zstdcat)
+reads such a file like any other, but with the seek table, frames can be
+decompressed independently, in parallel, or starting at any line.
+
+    >>> with SeekableZstdWriter("file.ldj.zst") as w:
+    ...     w.write(b'{"id": 1}\\n')
+
+    >>> with SeekableZstdReader("file.ldj.zst") as r:
+    ...     for line in r.lines(1000000, 1000010):
+    ...         print(line)
+
+Targets can use the SeekableZstd format instead of gluish's Zstd.
+"""
+
+import argparse
+import bisect
+import collections
+import concurrent.futures
+import io
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+
+import luigi
+import zstandard
+
+logger = logging.getLogger("siskin")
+
+SEEK_TABLE_MAGIC = 0x184D2A5E
+SEEKABLE_MAGIC = 0x8F92EAB1
+FOOTER_SIZE = 9
+
+Frame = collections.namedtuple(
+    "Frame", ["offset", "size", "decompressed_offset", "decompressed_size"]
+)
+
+
+def seek_table(frames):
+    """
+    Return the seek table for a list of (compressed size, decompressed size)
+    as a skippable frame, without checksums.
+    """
+    entries = b"".join(struct.pack("<II", c, d) for c, d in frames)
+    payload = entries + struct.pack("<IBI", len(frames), 0, SEEKABLE_MAGIC)
+    return struct.pack("<II", SEEK_TABLE_MAGIC, len(payload)) + payload
+
+
+def read_seek_table(f):
+    """
+    Return the list of Frames from the seek table at the end of a binary
+    file object. Raises ValueError, if there is none.
+    """
+    f.seek(0, os.SEEK_END)
+    filesize = f.tell()
+    if filesize < 8 + FOOTER_SIZE:
+        raise ValueError("file too short for a seek table")
+    f.seek(-FOOTER_SIZE, os.SEEK_END)
+    n, descriptor, magic = struct.unpack("<IBI", f.read(FOOTER_SIZE))
+    if magic != SEEKABLE_MAGIC:
+        raise ValueError("no seek table found")
+    entry_size = 12 if descriptor & 0x80 else 8
+    table_size = 8 + n * entry_size + FOOTER_SIZE
+    if table_size > filesize:
+        raise ValueError("seek table larger than file")
+    f.seek(-table_size, os.SEEK_END)
+    skippable, size = struct.unpack("<II", f.read(8))
+    if skippable != SEEK_TABLE_MAGIC or size != table_size - 8:
+        raise ValueError("malformed seek table")
+    entries = f.read(n * entry_size)
+    frames, offset, decompressed_offset = [], 0, 0
+    for i in range(n):
+        c, d = struct.unpack_from("<II", entries, i * entry_size)
+        frames.append(Frame(offset, c, decompressed_offset, d))
+        offset += c
+        decompressed_offset += d
+    return frames
+
+
+class SeekableZstdWriter(object):
+    """
+    Compress written bytes (or str, encoded as UTF-8) into a seekable zstd
+    file (a path or a binary file object). Frames end at a newline, unless a
+    line is longer than 16 frames. With workers > 1, frames are compressed
+    in threads. A path is written under a temporary name and renamed on
+    close, so it never holds a file without its seek table.
+    """
+
+    def __init__(self, f, frame_size=1 << 22, level=3, workers=1, closefd=True):
+        self.path, self.tmp = None, None
+        if isinstance(f, str):
+            directory = os.path.dirname(os.path.abspath(f))
+            fd, self.tmp = tempfile.mkstemp(dir=directory, prefix=".zstdseek-")
+            self.path, f, closefd = f, os.fdopen(fd, "wb"), True
+        self.f = f
+        self.closefd = closefd
+        self.frame_size = frame_size
+        self.level = level
+        self.buf = bytearray()
+        self.frames = []
+        self.local = threading.local()
+        self.executor = None
+        if workers > 1:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self.workers = workers
+        self.pending = collections.deque()
+        self.closed = False
+
+    def _compress(self, data):
+        if not hasattr(self.local, "cctx"):
+            self.local.cctx = zstandard.ZstdCompressor(
+                level=self.level, write_checksum=True
+            )
+        return self.local.cctx.compress(data), len(data)
+
+    def _emit(self, data):
+        if self.executor is None:
+            self._put(self._compress(data))
+            return
+        self.pending.append(self.executor.submit(self._compress, data))
+        while len(self.pending) > 2 * self.workers:
+            self._put(self.pending.popleft().result())
+
+    def _put(self, result):
+        frame, size = result
+        self.f.write(frame)
+        self.frames.append((len(frame), size))
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.buf += data
+        while len(self.buf) >= self.frame_size:
+            cut = self.buf.rfind(b"\n", 0, self.frame_size) + 1
+            if cut == 0:
+                cut = self.buf.find(b"\n", self.frame_size) + 1
+            if cut == 0:
+                if len(self.buf) < 16 * self.frame_size:
+                    break
+                cut = len(self.buf)
+            self._emit(bytes(self.buf[:cut]))
+            del self.buf[:cut]
+        return len(data)
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self.buf:
+                self._emit(bytes(self.buf))
+                self.buf = bytearray()
+            while self.pending:
+                self._put(self.pending.popleft().result())
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.f.write(seek_table(self.frames))
+            if self.closefd:
+                self.f.close()
+            else:
+                self.f.flush()
+        except BaseException:
+            self._discard()
+            raise
+        if self.tmp is not None:
+            os.rename(self.tmp, self.path)
+            self.tmp = None
+
+    def _discard(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+        if self.closefd and not self.f.closed:
+            self.f.close()
+        if self.tmp is not None:
+            os.remove(self.tmp)
+            self.tmp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        # Do not complete an atomic file on error.
+        self.closed = True
+        if self.tmp is not None:
+            self._discard()
+            return
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+        if self.closefd:
+            if hasattr(self.f, "__exit__"):
+                self.f.__exit__(exc_type, exc, tb)
+            else:
+                self.f.close()
+
+
+class SeekableZstdReader(object):
+    """
+    Random and parallel access to a seekable zstd file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "rb")
+        self.frames = read_seek_table(self.f)
+        self.local = threading.local()
+        self._line_counts = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def size(self):
+        """
+        Size of the decompressed data.
+        """
+        if not self.frames:
+            return 0
+        last = self.frames[-1]
+        return last.decompressed_offset + last.decompressed_size
+
+    def frame(self, i):
+        """
+        Return the decompressed data of frame i.
+        """
+        if not hasattr(self.local, "dctx"):
+            self.local.dctx = zstandard.ZstdDecompressor()
+        frame = self.frames[i]
+        data = os.pread(self.f.fileno(), frame.size, frame.offset)
+        if len(data) != frame.size:
+            raise ValueError("{}: truncated frame {}".format(self.path, i))
+        return self.local.dctx.decompress(data, max_output_size=frame.decompressed_size)
+
+    def iter_frames(self, start=0, stop=None, workers=4, inflight=2, indices=None):
+        """
+        Yield the decompressed frames from start to stop (exclusive), or the
+        frames with the given indices, in order, decompressed by a pool of
+        threads.
+        """
+        if indices is None:
+            indices = range(len(self.frames))[start:stop]
+        if workers <= 1:
+            for i in indices:
+                yield self.frame(i)
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = collections.deque()
+            for i in indices:
+                pending.append(executor.submit(self.frame, i))
+                if len(pending) >= workers * inflight:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def read(self, offset, size):
+        """
+        Return size bytes of the decompressed data, starting at offset.
+        """
+        offsets = [frame.decompressed_offset for frame in self.frames]
+        i = max(bisect.bisect_right(offsets, offset) - 1, 0)
+        buf = bytearray()
+        for data in self.iter_frames(start=i, workers=1):
+            if not buf:
+                data = data[offset - self.frames[i].decompressed_offset :]
+            buf += data
+            if len(buf) >= size:
+                break
+        return bytes(buf[:size])
+
+    def line_counts(self, workers=4):
+        """
+        Return the number of newlines in each frame; computed once.
+        """
+        if self._line_counts is None:
+            self._line_counts = [
+                data.count(b"\n") for data in self.iter_frames(workers=workers)
+            ]
+        return self._line_counts
+
+    def lines(self, start=0, stop=None, workers=4):
+        """
+        Yield lines (bytes, with newline) from line number start to stop
+        (exclusive), decompressing only the frames needed. Frames need not
+        end at a newline.
+        """
+        if start == 0:
+            first, skip = 0, 0
+        else:
+            cumulative = [0]
+            for count in self.line_counts(workers=workers):
+                cumulative.append(cumulative[-1] + count)
+            first = bisect.bisect_left(cumulative, start) - 1
+            if first >= len(self.frames):
+                return
+            skip = start - cumulative[first]
+        n, carry = start, b""
+        for data in self.iter_frames(start=first, workers=workers):
+            if skip:
+                data = data.split(b"\n", skip)[-1]
+                skip = 0
+            parts = (carry + data).split(b"\n")
+            carry = parts.pop()
+            for part in parts:
+                if stop is not None and n >= stop:
+                    return
+                yield part + b"\n"
+                n += 1
+        if carry and (stop is None or n < stop):
+            yield carry
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def write_seekable(command, output, **kwargs):
+    """
+    Run a shell command and compress its standard output into a seekable
+    zstd file. Keyword arguments are passed to SeekableZstdWriter. Raises
+    RuntimeError and leaves no output, if the command fails.
+    """
+    proc = subprocess.Popen(
+        ["bash", "-o", "pipefail", "-c", command], stdout=subprocess.PIPE
+    )
+    with SeekableZstdWriter(output, **kwargs) as writer:
+        shutil.copyfileobj(proc.stdout, writer, 1 << 20)
+        if proc.wait() != 0:
+            raise RuntimeError(
+                "command failed with %d: %s" % (proc.returncode, command)
+            )
+
+
+class SeekableZstdFormat(luigi.format.Format):
+    """
+    Seekable zstd, readable with plain zstdcat.
+    """
+
+    input = "bytes"
+    output = "bytes"
+
+    def __init__(self, frame_size=1 << 22, level=3, workers=1):
+        self.frame_size = frame_size
+        self.level = level
+        self.workers = workers
+
+    def pipe_reader(self, input_pipe):
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            input_pipe, read_across_frames=True
+        )
+        return io.BufferedReader(reader, 1 << 20)
+
+    def pipe_writer(self, output_pipe):
+        return SeekableZstdWriter(
+            output_pipe,
+            frame_size=self.frame_size,
+            level=self.level,
+            workers=self.workers,
+        )
+
+
+SeekableZstd = SeekableZstdFormat()
+
+
+def main():
+    """
+    Compress standard input into a seekable zstd file, so shell pipelines can
+    use it in place of zstd -c:
+
+        $ span-tag ... | python -m siskin.zstdseek -T0 > file.ldj.zst
+    """
+    parser = argparse.ArgumentParser(description="write seekable zstd")
+    parser.add_argument("-o", "--output", help="output file, default: stdout")
+    parser.add_argument("-T", "--threads", type=int, default=1, help="0: all CPUs")
+    parser.add_argument("-l", "--level", type=int, default=3)
+    parser.add_argument("--frame-size", type=int, default=1 << 22)
+    args = parser.parse_args()
+    workers = args.threads or os.cpu_count() or 1
+    output = args.output or sys.stdout.buffer
+    with SeekableZstdWriter(
+        output,
+        frame_size=args.frame_size,
+        level=args.level,
+        workers=workers,
+        closefd=bool(args.output),
+    ) as writer:
+        shutil.copyfileobj(sys.stdin.buffer, writer, 1 << 20)
+
+
+if __name__ == "__main__":
+    main()